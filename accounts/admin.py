@@ -1,3 +1,106 @@
 from django.contrib import admin
+from django.contrib.admin import ShowFacets
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
-# Register your models here.
+from . import exports
+from .models import AnalyticsRollup, JobDescription, LLMCall, LLMUsageDaily, ResumeAnalysis, SkillGap, UserProfile
+
+
+def _export_action(kind, fmt):
+    def action(modeladmin, request, queryset):
+        # Re-apply the export projection to the selected rows
+        build_queryset = exports.EXPORTS[kind][0]
+        return exports.streaming_response(kind, fmt, build_queryset().filter(pk__in=queryset.values('pk')))
+    action.__name__ = f'export_{fmt}'
+    action.short_description = f"Export selected as {fmt.upper()}"
+    return action
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'first_name', 'last_name', 'email', 'updated_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'first_name', 'last_name', 'email')
+    readonly_fields = ('created_at', 'updated_at')
+    actions = [_export_action('profiles', 'csv'), _export_action('profiles', 'jsonl')]
+
+
+@admin.register(ResumeAnalysis)
+class ResumeAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user_profile', 'job_title', 'job_company', 'match_score', 'created_at')
+    list_select_related = ('user_profile__user',)
+    list_filter = ('created_at',)
+    search_fields = ('job_title', 'job_company', 'user_profile__user__username')
+    readonly_fields = ('created_at', 'rescored_at')
+    raw_id_fields = ('user_profile', 'job')
+    actions = [_export_action('analyses', 'csv'), _export_action('analyses', 'jsonl')]
+
+
+@admin.register(AnalyticsRollup)
+class AnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = ('user_profile', 'analysis_count', 'average_fit', 'updated_at')
+    list_select_related = ('user_profile__user',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(SkillGap)
+class SkillGapAdmin(admin.ModelAdmin):
+    list_display = ('label', 'missing_count', 'updated_at')
+    ordering = ('-missing_count',)
+    search_fields = ('skill',)
+
+
+@admin.register(JobDescription)
+class JobDescriptionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'company', 'info_extracted', 'requirements_extracted', 'created_at')
+    search_fields = ('title', 'company', 'text_hash')
+    readonly_fields = ('text_hash', 'created_at')
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Rows written only by accounts/llm_ledger.py"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LLMUsageDaily)
+class LLMUsageDailyAdmin(ReadOnlyAdmin):
+    list_display = ('day', 'user', 'task', 'model', 'calls', 'errors', 'cache_hits',
+                    'input_tokens', 'cached_tokens', 'output_tokens', 'total_tokens', 'average_latency_ms')
+    list_select_related = ('user',)
+    list_filter = ('task', 'model')
+    date_hierarchy = 'day'
+    search_fields = ('user__username',)
+    ordering = ('-day', 'user', 'task')
+
+
+class CappedCountPaginator(Paginator):
+    """Counts at most MAX_COUNT rows, so paging a large table never counts all of it."""
+    MAX_COUNT = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list[:self.MAX_COUNT].count()
+
+
+@admin.register(LLMCall)
+class LLMCallAdmin(ReadOnlyAdmin):
+    # The raw ledger is large: totals are in LLMUsageDaily, so no full or facet counts
+    # and no filters that need SELECT DISTINCT; newest first by primary key
+    list_display = ('created_at', 'user', 'task', 'model', 'input_tokens', 'cached_tokens',
+                    'output_tokens', 'latency_ms', 'cache_hit', 'outcome')
+    list_select_related = ('user',)
+    list_filter = ('outcome',)
+    paginator = CappedCountPaginator
+    raw_id_fields = ('user',)
+    ordering = ('-pk',)
+    show_full_result_count = False
+    show_facets = ShowFacets.NEVER
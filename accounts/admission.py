@@ -0,0 +1,244 @@
+"""
+Admission control for the LLM-backed views.
+
+A resume upload or job analysis holds a worker for 30-160s.  Without a cap a
+few users can tie up every worker and starve page loads, logins and cheap
+JSON endpoints such as ``get_analysis_details``.  ``admission_controlled``
+wraps a (sync or async) view so that its POSTs:
+
+* run at most ``ADMISSION_USER_LIMIT`` distinct requests at a time per user
+  (further ones get an immediate 429).  A repeat of a request the user
+  already has running -- a double submit, a browser retry -- is let through
+  instead, so it joins that run through ``singleflight`` rather than being
+  refused;
+* run at most ``ADMISSION_GLOBAL_LIMIT`` at a time in this process; when all
+  slots are busy up to ``ADMISSION_QUEUE_SIZE`` requests wait for a slot, for
+  at most ``ADMISSION_MAX_WAIT`` seconds, and the rest get a 429 right away.
+
+A 429 is JSON for XHR clients and a "try again" page otherwise.  Its
+``Retry-After`` is the recent median time a slot is held, or
+``ADMISSION_RETRY_AFTER`` before there is any.  Limits are per process, so
+size ``ADMISSION_GLOBAL_LIMIT`` below the worker's thread count.  Setting it
+to 0 turns admission control off.  GET requests are never gated.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from . import metrics, singleflight
+
+logger = logging.getLogger(__name__)
+
+ASYNC_POLL_INTERVAL = 0.05
+
+REJECTED_USER = 'user'
+REJECTED_GLOBAL = 'global'
+
+
+def _settings():
+    return (
+        getattr(settings, 'ADMISSION_GLOBAL_LIMIT', 4),
+        getattr(settings, 'ADMISSION_USER_LIMIT', 1),
+        getattr(settings, 'ADMISSION_QUEUE_SIZE', 8),
+        getattr(settings, 'ADMISSION_MAX_WAIT', 15),
+    )
+
+
+class _Gate:
+    """Slot counts shared by every gated view of this process."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.running = 0
+        self.waiting = 0
+        self.per_user = defaultdict(Counter)  # user_id -> {request key: requests running}
+
+    def _try_take(self, user_id, key, global_limit):
+        if self.running < global_limit:
+            self.running += 1
+            if key in self.per_user[user_id]:
+                metrics.incr('admission.joined')
+            self.per_user[user_id][key] += 1
+            return True
+        return False
+
+    def _check_user(self, user_id, key, user_limit):
+        running = self.per_user.get(user_id)
+        return not running or key in running or len(running) < user_limit
+
+    def enter(self, user_id, key):
+        """Take a slot, waiting if needed; returns None or the rejection reason."""
+        global_limit, user_limit, queue_size, max_wait = _settings()
+        with self.cond:
+            if not self._check_user(user_id, key, user_limit):
+                return REJECTED_USER
+            if self._try_take(user_id, key, global_limit):
+                return None
+            if self.waiting >= queue_size:
+                return REJECTED_GLOBAL
+            self.waiting += 1
+            metrics.incr('admission.queued')
+            deadline = time.monotonic() + max_wait
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self.cond.wait(remaining):
+                        return REJECTED_GLOBAL
+                    if not self._check_user(user_id, key, user_limit):
+                        return REJECTED_USER
+                    if self._try_take(user_id, key, global_limit):
+                        return None
+            finally:
+                self.waiting -= 1
+
+    async def aenter(self, user_id, key):
+        """Async version of :meth:`enter`; polls instead of blocking the event loop."""
+        global_limit, user_limit, queue_size, max_wait = _settings()
+        with self.cond:
+            if not self._check_user(user_id, key, user_limit):
+                return REJECTED_USER
+            if self._try_take(user_id, key, global_limit):
+                return None
+            if self.waiting >= queue_size:
+                return REJECTED_GLOBAL
+            self.waiting += 1
+        metrics.incr('admission.queued')
+        deadline = time.monotonic() + max_wait
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(ASYNC_POLL_INTERVAL)
+                with self.cond:
+                    if not self._check_user(user_id, key, user_limit):
+                        return REJECTED_USER
+                    if self._try_take(user_id, key, global_limit):
+                        return None
+            return REJECTED_GLOBAL
+        finally:
+            with self.cond:
+                self.waiting -= 1
+
+    def leave(self, user_id, key):
+        with self.cond:
+            self.running -= 1
+            running = self.per_user[user_id]
+            running[key] -= 1
+            if not running[key]:
+                del running[key]
+            if not running:
+                del self.per_user[user_id]
+            self.cond.notify_all()
+
+
+_gate = _Gate()
+
+
+def request_key(request):
+    """
+    Key of a POST by its user, path, fields and uploaded files' content; the
+    CSRF token is left out so a resubmit from another tab matches too.
+    """
+    fields = sorted((name, value) for name, value in request.POST.lists() if name != 'csrfmiddlewaretoken')
+    files = sorted((name, singleflight.file_digest(f)) for name in request.FILES for f in request.FILES.getlist(name))
+    return singleflight.request_key(request.user.pk, request.path, repr(fields), repr(files))
+
+
+def retry_after():
+    """Seconds a rejected client should wait: the recent median time a slot is held."""
+    held = metrics.snapshot()['timings'].get('admission.held')
+    if held and held['count']:
+        return max(1, math.ceil(held['p50']))
+    return getattr(settings, 'ADMISSION_RETRY_AFTER', 30)
+
+
+def too_busy(request, reason):
+    seconds = retry_after()
+    if reason == REJECTED_USER:
+        message = "You already have an analysis running. Please wait for it to finish."
+    else:
+        message = "The server is busy with other analyses right now. Please try again shortly."
+    accepts_json = 'application/json' in request.headers.get('Accept', '')
+    if accepts_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = JsonResponse({'status': 'error', 'message': message, 'retry_after': seconds}, status=429)
+    else:
+        response = render(request, 'account/try_later.html', {'message': message, 'retry_after': seconds}, status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def _rejected(request, reason, started):
+    metrics.incr(f'admission.rejected_{reason}')
+    logger.warning(f"🚦 Admission rejected ({reason}) for user {request.user.pk} on {request.path}")
+    metrics.observe('admission.wait', time.monotonic() - started)
+    return too_busy(request, reason)
+
+
+def admission_controlled(view):
+    """Apply the per-user and global concurrency caps to a view's POST requests."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != 'POST' or _settings()[0] <= 0:
+                return await view(request, *args, **kwargs)
+            started = time.monotonic()
+            key = await sync_to_async(request_key)(request)
+            reason = await _gate.aenter(request.user.pk, key)
+            if reason is not None:
+                return _rejected(request, reason, started)
+            admitted = time.monotonic()
+            metrics.incr('admission.admitted')
+            metrics.observe('admission.wait', admitted - started)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _gate.leave(request.user.pk, key)
+                metrics.observe('admission.held', time.monotonic() - admitted)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or _settings()[0] <= 0:
+            return view(request, *args, **kwargs)
+        started = time.monotonic()
+        key = request_key(request)
+        reason = _gate.enter(request.user.pk, key)
+        if reason is not None:
+            return _rejected(request, reason, started)
+        admitted = time.monotonic()
+        metrics.incr('admission.admitted')
+        metrics.observe('admission.wait', admitted - started)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _gate.leave(request.user.pk, key)
+            metrics.observe('admission.held', time.monotonic() - admitted)
+    return wrapper
+
+
+def stats(data=None):
+    """Current slot usage plus admission counters from a metrics snapshot."""
+    counters = (data or metrics.snapshot())['counters']
+    global_limit, user_limit, queue_size, max_wait = _settings()
+    with _gate.cond:
+        running, waiting = _gate.running, _gate.waiting
+    return {
+        'running': running,
+        'waiting': waiting,
+        'global_limit': global_limit,
+        'user_limit': user_limit,
+        'queue_size': queue_size,
+        'max_wait': max_wait,
+        'admitted': counters.get('admission.admitted', 0),
+        'queued': counters.get('admission.queued', 0),
+        'joined': counters.get('admission.joined', 0),
+        'rejected_user': counters.get('admission.rejected_user', 0),
+        'rejected_global': counters.get('admission.rejected_global', 0),
+    }
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Keep the analytics rollups in step with created/deleted analyses
+        from django.db.models.signals import post_delete, post_save
+        from . import rollups
+        from .models import ResumeAnalysis
+
+        post_save.connect(rollups.on_analysis_saved, sender=ResumeAnalysis, dispatch_uid='rollups_saved')
+        post_delete.connect(rollups.on_analysis_deleted, sender=ResumeAnalysis, dispatch_uid='rollups_deleted')
@@ -0,0 +1,228 @@
+"""
+Async versions of the LLM-backed views, for deployment under ASGI.
+
+While a request waits on LlamaParse/Gemini the event loop is free to serve
+other requests, so a few processes can hold many in-flight analyses instead
+of one per sync worker thread.  Enabled with ``USE_ASYNC_VIEWS=True`` (see
+``accounts/urls.py``); the sync views in ``views.py`` stay the default for
+WSGI deployments.
+"""
+import asyncio
+import json
+import logging
+import os
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import FileSystemStorage
+from django.shortcuts import redirect, render
+from django.utils.functional import SimpleLazyObject
+
+from .experience import calculate_experience
+from .forms import JobDescUploadForm, MultiJobDescForm, ResumeUploadForm
+from .llm_client import (
+    aextract_resume_by_section,
+    aparse_resume_with_llama,
+)
+from .models import ResumeAnalysis, UserProfile
+from .views import analysis_history_version, analysis_kwargs, apply_parsed_resume, reused_analysis_message
+from . import admission, db_routers, job_descriptions, llm_ledger, near_duplicates, rollups, singleflight, speculative
+
+logger = logging.getLogger(__name__)
+
+arender = sync_to_async(render)
+
+
+async def _save_upload(uploaded_file):
+    """Save an uploaded file to media storage and return its path."""
+    def save():
+        fs = FileSystemStorage()
+        return fs.path(fs.save(uploaded_file.name, uploaded_file))
+    return await sync_to_async(save)()
+
+
+async def _get_parsed_resume(request, user_profile):
+    parsed_resume = await request.session.aget('parsed_resume', None)
+    if not parsed_resume and user_profile.parsed_resume_data:
+        parsed_resume = user_profile.parsed_resume_data
+    return parsed_resume
+
+
+async def _speculated_text(user_id, digest):
+    """Text from a speculative parse of the file with ``digest`` (waiting for one still running), or None."""
+    return await sync_to_async(speculative.document_text, thread_sensitive=False)(user_id, digest, lambda: None)
+
+
+async def _process_resume_upload(user_profile, resume_file, digest):
+    """Parse an uploaded resume, extract its fields and save them on the profile."""
+    file_path = await _save_upload(resume_file)
+    logger.debug(f"[async] Resume saved to: {file_path}")
+
+    resume_text = await _speculated_text(user_profile.user_id, digest) or await aparse_resume_with_llama(file_path)
+    parsed_json, resume_sections = await aextract_resume_by_section(
+        resume_text, user_profile.resume_sections, user_profile.parsed_resume_data
+    )
+    parsed_json.update(calculate_experience(parsed_json))
+
+    user_profile.resume_file = resume_file
+    if parsed_json.get('extraction_status') != 'partial':
+        # A partial result keeps the old fields, so it keeps the sections they were extracted from
+        user_profile.resume_sections = resume_sections
+    parsed_json = apply_parsed_resume(user_profile, parsed_json)
+    await user_profile.asave()
+    return parsed_json
+
+
+async def _parse_job_file(user_id, digest, file_path):
+    return await _speculated_text(user_id, digest) or await aparse_resume_with_llama(file_path)
+
+
+async def _analyze_job_description(user_profile, parsed_resume, job_text):
+    """Compare with the stored job description while its title/company are resolved, then save the analysis."""
+    async def resolve_job():
+        await sync_to_async(speculative.wait_for_job, thread_sensitive=False)(job_text)
+        return await job_descriptions.aresolve_job(job_text)
+
+    job, _ = await sync_to_async(job_descriptions.get_or_create_job)(job_text)
+    comparison_result, job = await asyncio.gather(
+        job_descriptions.acompare_with_job(parsed_resume, job),
+        resolve_job(),
+    )
+    analysis = await ResumeAnalysis.objects.acreate(
+        **analysis_kwargs(user_profile, job, comparison_result, parsed_resume)
+    )
+    logger.debug(f"[async] Analysis saved with ID: {analysis.id}")
+    return comparison_result
+
+
+@login_required
+@llm_ledger.budgeted
+@admission.admission_controlled
+async def profile(request):
+    """
+    Async profile page: upload resume, parse it once, store JSON in session and database.
+    """
+    user = await request.auser()
+    user_profile, _ = await UserProfile.objects.aget_or_create(user=user)
+    parsed_resume = await _get_parsed_resume(request, user_profile)
+
+    if request.method == "POST":
+        await request.session.apop('parsed_resume', None)
+
+        form = ResumeUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            resume_file = form.cleaned_data['resume']
+            digest = await sync_to_async(singleflight.file_digest)(resume_file)
+
+            try:
+                parsed_json, _ = await singleflight.arun_once(
+                    singleflight.request_key(user.id, 'resume_upload', digest),
+                    lambda: _process_resume_upload(user_profile, resume_file, digest),
+                )
+                await request.session.aset('parsed_resume', parsed_json)
+
+                if parsed_json.get('extraction_status') == 'partial':
+                    messages.warning(request, "⚠️ Resume uploaded, but only contact details could be extracted. Please re-upload later or edit your profile.")
+                else:
+                    messages.success(request, "✅ Resume uploaded and parsed successfully!")
+            except Exception as e:
+                logger.error(f"CRITICAL ERROR in async resume parsing: {type(e).__name__}: {str(e)}")
+                messages.error(request, f"❌ Error parsing resume: {str(e)}")
+            return redirect('profile')
+    else:
+        form = ResumeUploadForm()
+
+    await user_profile.arefresh_from_db()
+    return await arender(request, 'account/profile.html', {
+        'resume_form': form,
+        'parsed_resume': parsed_resume,
+        'user_profile': user_profile,
+        'fragment_cache_ttl': settings.FRAGMENT_CACHE_TTL,
+    })
+
+
+@login_required
+@db_routers.replica_reads
+@llm_ledger.budgeted
+@admission.admission_controlled
+async def dashboard(request):
+    """
+    Async dashboard: upload job description and compare with parsed resume JSON.
+
+    The comparison and the job title/company extraction are independent, so
+    they run concurrently.
+    """
+    user = await request.auser()
+    try:
+        user_profile = await UserProfile.objects.aget(user=user)
+    except UserProfile.DoesNotExist:
+        return redirect('profile')
+
+    parsed_resume = await _get_parsed_resume(request, user_profile)
+    if not parsed_resume:
+        return redirect('profile')  # ensure resume is uploaded first
+
+    comparison_result = None
+
+    if request.method == "POST":
+        form = JobDescUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            job_text = ""
+
+            if form.cleaned_data.get('job_desc'):
+                digest = await sync_to_async(singleflight.file_digest)(form.cleaned_data['job_desc'])
+                file_path = await _save_upload(form.cleaned_data['job_desc'])
+                try:
+                    job_text, _ = await singleflight.arun_once(
+                        singleflight.request_key(user.id, 'job_desc_upload', digest),
+                        lambda: _parse_job_file(user.id, digest, file_path),
+                    )
+                except Exception as e:
+                    logger.error(f"CRITICAL ERROR parsing job description file: {type(e).__name__}: {str(e)}")
+                    messages.error(request, f"❌ Error parsing job description file: {str(e)}")
+                    return redirect('dashboard')
+                finally:
+                    try:
+                        os.remove(file_path)
+                    except OSError as cleanup_error:
+                        logger.warning(f"Could not clean up temporary file: {cleanup_error}")
+            elif form.cleaned_data.get('job_text'):
+                job_text = form.cleaned_data['job_text']
+
+            prior_analysis, similarity = None, 0.0
+            if job_text and not form.cleaned_data.get('force_fresh'):
+                prior_analysis, similarity = await sync_to_async(near_duplicates.find_prior_analysis)(
+                    user_profile, job_text, parsed_resume
+                )
+            if prior_analysis is not None:
+                comparison_result = prior_analysis.comparison_result()
+                messages.info(request, reused_analysis_message(prior_analysis, similarity))
+            elif job_text:
+                try:
+                    # Identical analyses already in flight (double submits, retries) share one run
+                    comparison_result, _ = await singleflight.arun_once(
+                        singleflight.request_key(user.id, 'analysis', job_text, json.dumps(parsed_resume, sort_keys=True)),
+                        lambda: _analyze_job_description(user_profile, parsed_resume, job_text),
+                    )
+                except Exception as e:
+                    logger.error(f"CRITICAL ERROR in async job description analysis: {type(e).__name__}: {str(e)}")
+                    messages.error(request, f"❌ Error analyzing job description: {str(e)}")
+    else:
+        form = JobDescUploadForm()
+
+    # Evaluated lazily by the template (render runs in a thread), only when the cached fragment is missing
+    analysis_history = ResumeAnalysis.objects.filter(user_profile=user_profile).order_by('-created_at')[:10]
+
+    return await arender(request, 'account/dashboard.html', {
+        'job_form': form,
+        'multi_job_form': MultiJobDescForm(),
+        'comparison_result': comparison_result,
+        'parsed_resume': parsed_resume,
+        'user_profile': user_profile,
+        'analysis_history': analysis_history,
+        'analytics': SimpleLazyObject(lambda: rollups.user_stats(user_profile)),
+        'history_version': await sync_to_async(analysis_history_version)(user_profile),
+        'fragment_cache_ttl': settings.FRAGMENT_CACHE_TTL,
+    })
@@ -0,0 +1,103 @@
+"""
+Read routing to an optional database replica.
+
+When ``DATABASES`` has a ``replica`` alias (see settings), views wrapped in
+``replica_reads`` read the analysis history and analysis details from it,
+taking that load off the primary that the uploads and analyses write to.
+Everything else -- all writes, and reads outside those views -- stays on
+``default``.
+
+A replica lags the primary, so right after a user writes (any non-GET
+request through a ``replica_reads`` view) their reads stay on the primary
+for ``DB_REPLICA_PIN_SECONDS``; a new analysis is then always in the
+history the redirect shows.
+"""
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import metrics
+
+REPLICA_ALIAS = 'replica'
+PIN_SESSION_KEY = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Models whose reads may be served by the replica
+REPLICA_MODELS = {'accounts.resumeanalysis', 'accounts.jobdescription'}
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in connections.settings
+
+
+@contextmanager
+def reading_from_replica():
+    """Route reads of ``REPLICA_MODELS`` in this block to the replica, if there is one."""
+    token = _use_replica.set(replica_configured())
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def _pin_until():
+    return time.time() + getattr(settings, 'DB_REPLICA_PIN_SECONDS', 5)
+
+
+def replica_reads(view):
+    """Serve a view's history/detail reads from the replica, except just after the user's own writes."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not replica_configured():
+                return await view(request, *args, **kwargs)
+            if request.method not in SAFE_METHODS:
+                await request.session.aset(PIN_SESSION_KEY, _pin_until())
+                return await view(request, *args, **kwargs)
+            if await request.session.aget(PIN_SESSION_KEY, 0) > time.time():
+                metrics.incr('db.replica_pinned')
+                return await view(request, *args, **kwargs)
+            with reading_from_replica():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_configured():
+            return view(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            request.session[PIN_SESSION_KEY] = _pin_until()
+            return view(request, *args, **kwargs)
+        if request.session.get(PIN_SESSION_KEY, 0) > time.time():
+            metrics.incr('db.replica_pinned')
+            return view(request, *args, **kwargs)
+        with reading_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """``DATABASE_ROUTERS`` entry used when the replica is configured."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.label_lower in REPLICA_MODELS:
+            metrics.incr('db.replica_reads')
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so instances read from the replica are still saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,190 @@
+import re
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+
+import numpy as np
+
+RESEARCH_KEYWORDS = ["research", "assistant", "fellow", "intern"]
+
+
+def parse_date(date_str, today=None, is_start=False):
+    today = today or datetime.today()
+    if not date_str or str(date_str).lower() in ("current", "present", "null"):
+        return today if not is_start else None
+    try:
+        dt = datetime.strptime(date_str, "%m-%Y")
+        return dt.replace(day=1 if is_start else 28)
+    except:
+        try:
+            return datetime(int(date_str), 1, 1) if is_start else datetime(int(date_str), 12, 31)
+        except:
+            return None
+
+def merge_and_sum(experiences):
+    intervals = []
+    today = datetime.today()
+    for exp in experiences:
+        start = parse_date(exp.get("start"), today, is_start=True)
+        end = parse_date(exp.get("end"), today, is_start=False)
+        if start and end:
+            intervals.append((start, end))
+    if not intervals:
+        return 0
+    intervals.sort(key=lambda x: x[0])
+    merged = []
+    cur_start, cur_end = intervals[0]
+    for s, e in intervals[1:]:
+        if s <= cur_end:
+            cur_end = max(cur_end, e)
+        else:
+            merged.append((cur_start, cur_end))
+            cur_start, cur_end = s, e
+    merged.append((cur_start, cur_end))
+    total_months = sum((relativedelta(e, s).years*12 + relativedelta(e, s).months + 1) for s, e in merged)
+    return total_months
+
+def classify_experience(exp):
+    """Return "work" or "research" for one experience entry."""
+    exp_type = (exp.get("type") or "").lower()
+    if exp_type in ("work", "research"):
+        return exp_type
+    # If no type specified, try to infer from designation
+    designation = (exp.get("designation") or "").lower()
+    if any(keyword in designation for keyword in RESEARCH_KEYWORDS):
+        return "research"
+    return "work"
+
+
+def calculate_experience(data):
+    """Add total work and research months/years."""
+    print(f"DEBUG: Calculating experience from data: {data.get('experience', [])}")
+    
+    work = []
+    research = []
+    
+    for exp in data.get("experience", []):
+        print(f"DEBUG: Processing experience: {exp}, type: {exp.get('type')}")
+        
+        if classify_experience(exp) == "research":
+            research.append(exp)
+        else:
+            work.append(exp)
+    
+    print(f"DEBUG: Work experiences: {work}")
+    print(f"DEBUG: Research experiences: {research}")
+    
+    work_months = merge_and_sum(work)
+    research_months = merge_and_sum(research)
+    
+    result = {
+        "work_experience": {"years": work_months//12, "months": work_months%12},
+        "research_experience": {"years": research_months//12, "months": research_months%12}
+    }
+    
+    print(f"DEBUG: Calculated experience totals: {result}")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Bulk recomputation
+#
+# Stored totals go stale because "CURRENT" roles end "today".  The functions
+# below recompute totals for many profiles at once: every date becomes an
+# integer month index (year * 12 + month - 1), and overlapping intervals are
+# merged with numpy per profile.  The results match merge_and_sum(), which
+# counts inclusive calendar months.
+# ---------------------------------------------------------------------------
+
+_MONTH_YEAR = re.compile(r"^(\d{1,2})-(\d{4})$")
+
+
+def month_index(date_str, today_index, is_start=False):
+    """Month index for a resume date, or None if it can't be parsed.
+
+    Mirrors parse_date(): "CURRENT"/"present"/empty ends resolve to today and
+    are dropped as starts; a bare year is January as a start, December as an end.
+    """
+    if not date_str or str(date_str).lower() in ("current", "present", "null"):
+        return None if is_start else today_index
+    text = str(date_str)
+    match = _MONTH_YEAR.match(text)
+    if match:
+        month, year = int(match.group(1)), int(match.group(2))
+        if 1 <= month <= 12 and year >= 1:
+            return year * 12 + month - 1
+        return None
+    try:
+        year = int(text)
+    except ValueError:
+        return None
+    if not 1 <= year <= 9999:
+        return None
+    return year * 12 if is_start else year * 12 + 11
+
+
+def _merged_months(group, start, end, n_groups):
+    """Total months covered per group after merging overlapping intervals."""
+    totals = np.zeros(n_groups, dtype=np.int64)
+    if not len(group):
+        return totals
+
+    order = np.lexsort((start, group))
+    group, start, end = group[order], start[order], end[order]
+
+    # Shift every group into its own disjoint range so one running maximum
+    # over the whole array never carries an end date across profiles.
+    low = min(start.min(), end.min())
+    span = max(start.max(), end.max()) - low + 2
+    offset = group * span - low
+    start, end = start + offset, end + offset
+
+    run_end = np.maximum.accumulate(end)
+    new_run = np.ones(len(group), dtype=bool)
+    new_run[1:] = (group[1:] != group[:-1]) | (start[1:] > run_end[:-1])
+
+    run_starts = np.flatnonzero(new_run)
+    months = np.maximum.reduceat(end, run_starts) - start[run_starts] + 1
+    np.add.at(totals, group[run_starts], months)
+    return totals
+
+
+def bulk_experience_totals(experience_lists, today=None):
+    """Work and research months for many profiles at once.
+
+    ``experience_lists`` is a sequence of per-profile experience arrays (the
+    ``experience`` key of parsed_resume_data).  Returns two int arrays, work
+    months and research months, aligned with the input.
+    """
+    today = today or datetime.today()
+    today_index = today.year * 12 + today.month - 1
+    n_profiles = len(experience_lists)
+
+    # Resumes reuse a small vocabulary of date strings; parse each once.
+    cache = {}
+
+    def index_of(value, is_start):
+        key = (value, is_start)
+        if key not in cache:
+            cache[key] = month_index(value, today_index, is_start)
+        return cache[key]
+
+    columns = {"work": ([], [], []), "research": ([], [], [])}
+    for profile_idx, experiences in enumerate(experience_lists):
+        for exp in experiences or []:
+            if not isinstance(exp, dict):
+                continue
+            start = index_of(exp.get("start"), True)
+            end = index_of(exp.get("end"), False)
+            # Intervals that end before they start are data errors; skip them
+            if start is None or end is None or end < start:
+                continue
+            groups, starts, ends = columns[classify_experience(exp)]
+            groups.append(profile_idx)
+            starts.append(start)
+            ends.append(end)
+
+    totals = []
+    for kind in ("work", "research"):
+        groups, starts, ends = (np.asarray(col, dtype=np.int64) for col in columns[kind])
+        totals.append(_merged_months(groups, starts, ends, n_profiles))
+    return totals[0], totals[1]
@@ -0,0 +1,146 @@
+"""
+Streaming CSV / JSON Lines export of analyses and profiles for reporting.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` over an ``only()``
+projection and serialized one at a time, so memory stays flat however many
+rows there are and the first bytes go out before the query is exhausted.
+Used by the staff export endpoints, the admin actions and the
+``export_data`` management command.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from .models import ResumeAnalysis, UserProfile
+
+DEFAULT_CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+ANALYSIS_COLUMNS = [
+    'id', 'username', 'job_title', 'job_company', 'created_at', 'rescored_at', 'is_stale',
+    'match_score', 'overall_fit_percentage', 'total_score', 'max_possible_score',
+    'overall_recommendation', 'technical_skills_score', 'soft_skills_score',
+    'experience_score', 'education_score', 'skill_matches',
+]
+
+PROFILE_COLUMNS = [
+    'id', 'username', 'first_name', 'last_name', 'email', 'phone', 'education',
+    'work_experience_years', 'work_experience_months',
+    'research_experience_years', 'research_experience_months',
+    'skills', 'certifications', 'hackathons', 'publications', 'interests', 'projects',
+    'created_at', 'updated_at',
+]
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def analysis_queryset():
+    return (
+        ResumeAnalysis.objects
+        .select_related('user_profile__user')
+        .only(
+            'id', 'job_title', 'job_company', 'created_at', 'rescored_at', 'stale_matches',
+            'match_score', 'summary', 'detailed_analysis', 'skill_matches',
+            'user_profile__user__username',
+        )
+        .order_by('id')
+    )
+
+
+def profile_queryset():
+    fields = [column for column in PROFILE_COLUMNS if column != 'username']
+    return (
+        UserProfile.objects
+        .select_related('user')
+        .only(*fields, 'user__username')
+        .order_by('id')
+    )
+
+
+def analysis_row(analysis):
+    summary = analysis.summary or {}
+    detailed = analysis.detailed_analysis or {}
+    return {
+        'id': analysis.id,
+        'username': analysis.user_profile.user.username,
+        'job_title': analysis.job_title,
+        'job_company': analysis.job_company,
+        'created_at': _isoformat(analysis.created_at),
+        'rescored_at': _isoformat(analysis.rescored_at),
+        'is_stale': analysis.is_stale,
+        'match_score': analysis.match_score,
+        'overall_fit_percentage': summary.get('overall_fit_percentage'),
+        'total_score': summary.get('total_score'),
+        'max_possible_score': summary.get('max_possible_score'),
+        'overall_recommendation': detailed.get('overall_recommendation'),
+        'technical_skills_score': detailed.get('technical_skills_score'),
+        'soft_skills_score': detailed.get('soft_skills_score'),
+        'experience_score': detailed.get('experience_score'),
+        'education_score': detailed.get('education_score'),
+        'skill_matches': analysis.skill_matches,
+    }
+
+
+def profile_row(profile):
+    row = {column: getattr(profile, column) for column in PROFILE_COLUMNS if column != 'username'}
+    row = {'id': row.pop('id'), 'username': profile.user.username, **row}
+    row['created_at'] = _isoformat(profile.created_at)
+    row['updated_at'] = _isoformat(profile.updated_at)
+    return row
+
+
+EXPORTS = {
+    'analyses': (analysis_queryset, analysis_row, ANALYSIS_COLUMNS),
+    'profiles': (profile_queryset, profile_row, PROFILE_COLUMNS),
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    # Lists/dicts (skill matches, projects...) go into a single JSON-encoded cell
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def iter_export(kind, fmt, queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export of ``kind`` ('analyses'/'profiles') as CSV or JSONL text chunks."""
+    build_queryset, to_row, columns = EXPORTS[kind]
+    if queryset is None:
+        queryset = build_queryset()
+    rows = (to_row(obj) for obj in queryset.iterator(chunk_size=chunk_size))
+
+    if fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[column]) for column in columns])
+
+
+def streaming_response(kind, fmt, queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """StreamingHttpResponse downloading the export as ``<kind>.<fmt>``."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    response = StreamingHttpResponse(
+        iter_export(kind, fmt, queryset, chunk_size),
+        content_type=FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
@@ -0,0 +1,227 @@
+"""
+Compressed JSON storage for the large per-row blobs.
+
+``CompressedJSONField`` behaves like ``models.JSONField`` in Python (dicts
+and lists in, dicts and lists out) but stores compact JSON, compressed, in
+a binary column.  Each stored value starts with one header byte: the high
+nibble is the serializer (0 = JSON, 1 = msgpack) and the low nibble the
+compressor (0 = none, 1 = zlib, 2 = zstd), so values written with any
+setting stay readable after ``COMPRESSED_JSON_CODEC`` /
+``COMPRESSED_JSON_SERIALIZER`` change.  zstd (``zstandard``) and msgpack
+are optional; without them values are written with zlib/JSON.  Values
+under ``MIN_COMPRESS_BYTES`` are stored uncompressed.
+
+The column can't be filtered on by content (no JSON key lookups).
+
+``DedupedJSONField`` additionally leaves out dict keys whose value is
+already stored in the same-named column of the row (e.g. the ``skills``
+list inside ``parsed_resume_data``) and puts them back when the attribute
+is first read, so the Python value is unchanged.  ``.values()`` returns
+the dict without those keys.
+"""
+import copy
+import json
+import logging
+import zlib
+
+from django import forms
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+MIN_COMPRESS_BYTES = 64
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+SERIALIZER_JSON, SERIALIZER_MSGPACK = 0, 1
+COMPRESSOR_NONE, COMPRESSOR_ZLIB, COMPRESSOR_ZSTD = 0, 1, 2
+
+_warned = set()
+
+
+def _warn_once(name):
+    if name not in _warned:
+        _warned.add(name)
+        logger.warning(f"{name} is not installed; compressed JSON fields fall back to zlib/JSON")
+
+
+def _serializer():
+    if getattr(settings, 'COMPRESSED_JSON_SERIALIZER', 'json') == 'msgpack':
+        if msgpack is not None:
+            return SERIALIZER_MSGPACK
+        _warn_once('msgpack')
+    return SERIALIZER_JSON
+
+
+def _compressor():
+    if getattr(settings, 'COMPRESSED_JSON_CODEC', 'zlib') == 'zstd':
+        if zstandard is not None:
+            return COMPRESSOR_ZSTD
+        _warn_once('zstandard')
+    return COMPRESSOR_ZLIB
+
+
+def encode(value):
+    """Header byte + (compressed) serialized ``value``."""
+    serializer = _serializer()
+    if serializer == SERIALIZER_MSGPACK:
+        payload = msgpack.packb(value, use_bin_type=True)
+    else:
+        payload = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    compressor = _compressor() if len(payload) >= MIN_COMPRESS_BYTES else COMPRESSOR_NONE
+    if compressor == COMPRESSOR_ZSTD:
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    elif compressor == COMPRESSOR_ZLIB:
+        payload = zlib.compress(payload, ZLIB_LEVEL)
+    return bytes([serializer << 4 | compressor]) + payload
+
+
+def decode(data):
+    """Inverse of :func:`encode`; plain JSON text (pre-migration rows) is accepted too."""
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if data[:1] in (b'{', b'[', b'"', b'n'):
+        return json.loads(data)
+    header, payload = data[0], data[1:]
+    serializer, compressor = header >> 4, header & 0x0F
+    if compressor == COMPRESSOR_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Value is zstd-compressed but the zstandard package is not installed")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif compressor == COMPRESSOR_ZLIB:
+        payload = zlib.decompress(payload)
+    if serializer == SERIALIZER_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Value is msgpack-encoded but the msgpack package is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+class CompressedJSONField(models.BinaryField):
+    """JSONField look-alike stored as compressed bytes."""
+
+    description = "Compressed JSON"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('editable') is True:
+            del kwargs['editable']
+        else:
+            kwargs['editable'] = False
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return decode(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decode(value)
+        if isinstance(value, str):
+            return json.loads(value)  # serialized fixtures (value_to_string)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return encode(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return connection.Database.Binary(value) if value is not None else None
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': forms.JSONField, **kwargs})
+
+
+class _ColumnBackedDict(dict):
+    """A DedupedJSONField value as loaded: ``from_columns`` lists the keys left out."""
+
+    from_columns = ()
+
+
+class _DedupedJSONAttribute(DeferredAttribute):
+    """Puts the keys a DedupedJSONField left out back on first access."""
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if instance is not None and isinstance(value, _ColumnBackedDict):
+            # Deferred columns in one query, not one per key
+            deferred = [key for key in value.from_columns if key not in instance.__dict__]
+            if deferred:
+                instance.refresh_from_db(fields=deferred)
+            restored = dict(value)
+            restored.update((key, copy.deepcopy(instance.__dict__[key])) for key in value.from_columns)
+            value = instance.__dict__[self.field.attname] = restored
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor, so reads go through __get__ even once the value is loaded
+        instance.__dict__[self.field.attname] = value
+
+
+class DedupedJSONField(CompressedJSONField):
+    """
+    CompressedJSONField for a dict that repeats other columns of its row.
+
+    Keys in ``column_keys`` whose value equals the same-named field are
+    dropped on save and listed under ``FROM_COLUMNS_KEY``; they are copied
+    back from those fields the first time the attribute is read (loading
+    them if they were deferred).
+    """
+
+    FROM_COLUMNS_KEY = '_from_columns'
+    descriptor_class = _DedupedJSONAttribute
+
+    def __init__(self, *args, column_keys=(), **kwargs):
+        self.column_keys = tuple(column_keys)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['column_keys'] = self.column_keys
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        value = super().from_db_value(value, expression, connection)
+        if isinstance(value, dict) and self.FROM_COLUMNS_KEY in value:
+            # The marker never leaves the field: .values() gets the dict without it
+            from_columns = value.pop(self.FROM_COLUMNS_KEY)
+            value = _ColumnBackedDict(value)
+            value.from_columns = from_columns
+        return value
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if not isinstance(value, dict) or not value:
+            return value
+        stored = dict(value)
+        moved = [key for key in self.column_keys if key in stored and stored[key] == getattr(model_instance, key, None)]
+        for key in moved:
+            del stored[key]
+        if moved:
+            stored[self.FROM_COLUMNS_KEY] = moved
+        return stored
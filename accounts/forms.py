@@ -37,6 +37,45 @@ class JobDescUploadForm(forms.Form):
         required=False,
         help_text='Alternatively, paste the job description text directly'
     )
+    force_fresh = forms.BooleanField(
+        label='Run a fresh analysis',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        required=False,
+        help_text='Re-run the comparison even if a near-identical job description was already analyzed'
+    )
+
+
+class MultiJobDescForm(forms.Form):
+    """Several job descriptions compared against the resume in one go"""
+    SEPARATOR = '---'
+    MAX_JOBS = 10
+
+    job_texts = forms.CharField(
+        label='Paste Job Descriptions',
+        widget=forms.Textarea(attrs={
+            'class': 'form-control',
+            'rows': 12,
+            'placeholder': 'Paste each job description, separated by a line containing only ---'
+        }),
+        help_text='Separate job descriptions with a line containing only ---'
+    )
+
+    def clean_job_texts(self):
+        """Split the pasted text into individual job descriptions"""
+        chunks, current = [], []
+        for line in self.cleaned_data['job_texts'].splitlines():
+            if line.strip() == self.SEPARATOR:
+                chunks.append('\n'.join(current))
+                current = []
+            else:
+                current.append(line)
+        chunks.append('\n'.join(current))
+        job_texts = [chunk.strip() for chunk in chunks if chunk.strip()]
+        if not job_texts:
+            raise forms.ValidationError('Please paste at least one job description.')
+        if len(job_texts) > self.MAX_JOBS:
+            raise forms.ValidationError(f'Please compare at most {self.MAX_JOBS} job descriptions at a time.')
+        return job_texts
 
 
 class UserProfileForm(forms.ModelForm):
@@ -0,0 +1,334 @@
+"""
+Shared store of job descriptions.
+
+A posting analyzed by many users is saved once as a ``JobDescription``,
+keyed by the SHA-256 of its normalized text (Unicode NFKC, whitespace
+collapsed), so copies that differ only in spacing share a row.  Case is
+kept, so the stored text has the casing its analyses were run against.
+The row caches the Gemini-extracted title/company, so repeated postings
+skip the job-info call, plus the locally split sections.
+
+Comparisons are two-phase: the first analysis of a posting extracts its
+requirement list (skill, category, must-have, weight) and stores it on the
+row; every resume is then scored against only that list
+(``compare_with_job``).  Later candidates skip the extraction, send a much
+shorter prompt, and are scored on the same requirements, so their scores
+are comparable.  Postings whose list could not be extracted are compared
+with their full text as before; ``TWO_PHASE_COMPARISON = False`` always
+does that.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import llm_ledger, metrics, near_duplicates, singleflight
+from .llm_client import (
+    acompare_resume_with_jobdesc,
+    acompare_resume_with_requirements,
+    aextract_job_info,
+    aextract_job_requirements,
+    compare_resume_with_jobdesc,
+    compare_resume_with_jobdescs,
+    compare_resume_with_requirements,
+    extract_job_info,
+    extract_job_requirements,
+)
+from .local_extractor import BOLD_LINE_RE, MARKDOWN_HEADING_RE
+from .models import JobDescription
+
+logger = logging.getLogger(__name__)
+
+MAX_INFO_WORKERS = 8
+
+# Sections sent for requirement extraction, with their headings; company blurbs and benefits are left out
+REQUIREMENT_SECTIONS = (
+    ("overview", None),
+    ("responsibilities", "Responsibilities"),
+    ("requirements", "Requirements"),
+    ("nice_to_have", "Nice to have"),
+)
+
+# What the job-info extraction falls back to (see resume_parser.default_job_info)
+DEFAULT_INFO = {"title": "Job Analysis", "company": "Unknown Company"}
+
+BULLET_RE = re.compile(r"^\s*(?:[-*+•●▪◦‣·–]|\d{1,2}[.)])\s+(.*\S)")
+
+# Heading text (lowercase, without punctuation) -> section type
+JD_SECTION_KEYWORDS = {
+    "requirements": "requirements", "qualifications": "requirements", "minimum qualifications": "requirements",
+    "basic qualifications": "requirements", "required qualifications": "requirements",
+    "required skills": "requirements", "skills": "requirements", "must have": "requirements",
+    "what you will need": "requirements", "what youll need": "requirements",
+    "what we are looking for": "requirements", "what were looking for": "requirements",
+    "who you are": "requirements", "about you": "requirements",
+    "preferred qualifications": "nice_to_have", "nice to have": "nice_to_have", "bonus points": "nice_to_have",
+    "preferred skills": "nice_to_have", "good to have": "nice_to_have",
+    "responsibilities": "responsibilities", "key responsibilities": "responsibilities",
+    "what you will do": "responsibilities", "what youll do": "responsibilities", "the role": "responsibilities",
+    "about the role": "responsibilities", "job description": "responsibilities", "role overview": "responsibilities",
+    "about us": "company", "about the company": "company", "who we are": "company", "company overview": "company",
+    "benefits": "benefits", "perks": "benefits", "what we offer": "benefits", "perks and benefits": "benefits",
+}
+
+
+def normalize_text(text):
+    """The form of ``text`` that is hashed: NFKC, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _jd_section_type(line):
+    match = MARKDOWN_HEADING_RE.match(line) or BOLD_LINE_RE.match(line)
+    heading = match.group(1) if match else line.strip()
+    if len(heading) > 50:
+        return None
+    key = re.sub(r"[^a-z ]", "", heading.lower().replace("&", "and"))
+    return JD_SECTION_KEYWORDS.get(" ".join(key.split()))
+
+
+def split_sections(text):
+    """
+    ``{type: cleaned text}`` for the recognized sections of a posting.
+
+    Text before the first recognized heading is kept as "overview"; bullets
+    are normalized to "- ".
+    """
+    sections = {}
+    current = "overview"
+    for line in (text or "").splitlines():
+        section_type = _jd_section_type(line)
+        if section_type:
+            current = section_type
+            continue
+        stripped = line.strip()
+        if not stripped:
+            continue
+        bullet = BULLET_RE.match(line)
+        sections.setdefault(current, []).append(f"- {bullet.group(1)}" if bullet else stripped)
+    return {section_type: "\n".join(lines) for section_type, lines in sections.items()}
+
+
+def get_or_create_job(job_text):
+    """The stored JobDescription for ``job_text`` and whether it was just created."""
+    sections = split_sections(job_text)
+    job, created = JobDescription.objects.get_or_create(
+        text_hash=text_hash(job_text),
+        defaults={
+            "text": job_text,
+            "sections": sections,
+            "minhash": near_duplicates.signature(job_text),
+        },
+    )
+    metrics.incr("job_descriptions.created" if created else "job_descriptions.reused")
+    return job, created
+
+
+def _store_info(job, info):
+    job.title = info.get("title") or job.title
+    job.company = info.get("company") or job.company
+    job.info_extracted = True
+    return ["title", "company", "info_extracted"]
+
+
+def _fallback_info(job):
+    # Not marked as extracted, so the next analysis of this posting tries again
+    job.title = job.title or DEFAULT_INFO["title"]
+    job.company = job.company or DEFAULT_INFO["company"]
+
+
+def resolve_jobs(job_texts, with_requirements=False):
+    """
+    JobDescriptions for ``job_texts``, extracting title/company only for
+    postings not seen before (in parallel when there are several).  With
+    ``with_requirements`` the missing requirement lists are extracted in the
+    same parallel step, so a new posting's two extractions overlap instead
+    of running one after the other before the comparison.
+    """
+    jobs = [get_or_create_job(job_text)[0] for job_text in job_texts]
+    pending = {job.pk: job for job in jobs if not job.info_extracted}
+    needs_requirements = {}
+    if with_requirements and two_phase_enabled():
+        needs_requirements = {job.pk: job for job in jobs if not job.requirements_extracted}
+    if pending or needs_requirements:
+        workers = min(len(pending) + len(needs_requirements), MAX_INFO_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pk: pool.submit(llm_ledger.attributed(extract_job_info), job.text) for pk, job in pending.items()}
+            requirement_futures = {
+                pk: pool.submit(llm_ledger.attributed(_extract_requirements), job) for pk, job in needs_requirements.items()
+            }
+        # Stored from this thread: the pool threads only make LLM calls
+        for pk, job in pending.items():
+            try:
+                info = futures[pk].result()
+                if info == DEFAULT_INFO:
+                    _fallback_info(job)  # extract_job_info returns the defaults on failure
+                    continue
+                job.save(update_fields=_store_info(job, info))
+            except Exception as e:
+                logger.error(f"Job info extraction failed for job description {pk}: {type(e).__name__}: {e}")
+                _fallback_info(job)
+        for pk, job in needs_requirements.items():
+            requirements = requirement_futures[pk].result()  # None when it failed
+            if requirements:
+                _store_requirements(job, requirements)
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        metrics.incr("job_descriptions.info_calls_skipped", skipped)
+    if with_requirements and two_phase_enabled() and len(jobs) > len(needs_requirements):
+        metrics.incr("job_descriptions.requirement_calls_skipped", len(jobs) - len(needs_requirements))
+    # Same object for duplicate texts within one request (both dicts hold the last one)
+    return [pending.get(job.pk) or needs_requirements.get(job.pk, job) for job in jobs]
+
+
+def resolve_job(job_text, with_requirements=False):
+    return resolve_jobs([job_text], with_requirements)[0]
+
+
+async def aresolve_job(job_text):
+    """Async version of :func:`resolve_job`."""
+    job, _ = await sync_to_async(get_or_create_job)(job_text)
+    if job.info_extracted:
+        metrics.incr("job_descriptions.info_calls_skipped")
+        return job
+    info = await aextract_job_info(job_text)
+    if info == DEFAULT_INFO:
+        _fallback_info(job)  # aextract_job_info returns the defaults on failure
+        return job
+    await job.asave(update_fields=_store_info(job, info))
+    return job
+
+
+def requirements_source(job):
+    """The parts of the posting that state requirements; the whole text when no sections were recognized."""
+    sections = job.sections or {}
+    if not any(section_type in sections for section_type, heading in REQUIREMENT_SECTIONS if heading):
+        return job.text
+    return "\n\n".join(
+        f"{heading}:\n{sections[section_type]}" if heading else sections[section_type]
+        for section_type, heading in REQUIREMENT_SECTIONS if sections.get(section_type)
+    )
+
+
+def _requirements_key(job):
+    # Shared by every user: the list belongs to the posting
+    return f"job_requirements:{job.text_hash}"
+
+
+def _store_requirements(job, requirements):
+    """Store ``requirements`` unless another extraction already did; returns the stored list."""
+    stored = JobDescription.objects.filter(pk=job.pk, requirements_extracted=False).update(
+        requirements=requirements, requirements_extracted=True,
+    )
+    if not stored:
+        requirements = JobDescription.objects.values_list("requirements", flat=True).get(pk=job.pk)
+    job.requirements, job.requirements_extracted = requirements, True
+    return requirements
+
+
+def _extract_requirements(job):
+    """Phase one for ``job``; None when it fails (not stored, so the next analysis tries again)."""
+    try:
+        requirements, _ = singleflight.run_once(
+            _requirements_key(job), lambda: extract_job_requirements(requirements_source(job))
+        )
+        metrics.incr("job_descriptions.requirement_calls")
+        return requirements
+    except Exception as e:
+        logger.error(f"Requirement extraction failed for job description {job.pk}: {type(e).__name__}: {e}")
+        return None
+
+
+def job_requirements(job):
+    """The requirement list of ``job``, extracted and stored on first use; [] when extraction fails."""
+    if job.requirements_extracted:
+        metrics.incr("job_descriptions.requirement_calls_skipped")
+        return job.requirements
+    requirements = _extract_requirements(job)
+    return _store_requirements(job, requirements) if requirements else []
+
+
+async def ajob_requirements(job):
+    """Async version of :func:`job_requirements`."""
+    if job.requirements_extracted:
+        metrics.incr("job_descriptions.requirement_calls_skipped")
+        return job.requirements
+    try:
+        requirements, _ = await singleflight.arun_once(
+            _requirements_key(job), lambda: aextract_job_requirements(requirements_source(job))
+        )
+        metrics.incr("job_descriptions.requirement_calls")
+    except Exception as e:
+        logger.error(f"Requirement extraction failed for job description {job.pk}: {type(e).__name__}: {e}")
+        return []
+    return await sync_to_async(_store_requirements)(job, requirements)
+
+
+def two_phase_enabled():
+    return getattr(settings, "TWO_PHASE_COMPARISON", True)
+
+
+def compare_with_job(resume_json, job, extract=True):
+    """
+    Compare a resume with the stored ``job``: scored against its requirement
+    list, or against its full text when there is none.  ``extract=False``
+    uses only a list already stored (``resolve_job(..., with_requirements=True)``
+    has tried the extraction).
+    """
+    if not two_phase_enabled():
+        requirements = []
+    elif extract:
+        requirements = job_requirements(job)
+    else:
+        requirements = job.requirements if job.requirements_extracted else []
+    if requirements:
+        metrics.incr("comparison.two_phase")
+        return compare_resume_with_requirements(resume_json, requirements)
+    metrics.incr("comparison.full_text")
+    return compare_resume_with_jobdesc(resume_json, job.text)
+
+
+async def acompare_with_job(resume_json, job):
+    """Async version of :func:`compare_with_job`."""
+    requirements = await ajob_requirements(job) if two_phase_enabled() else []
+    if requirements:
+        metrics.incr("comparison.two_phase")
+        return await acompare_resume_with_requirements(resume_json, requirements)
+    metrics.incr("comparison.full_text")
+    return await acompare_resume_with_jobdesc(resume_json, job.text)
+
+
+def compare_with_jobs(resume_json, jobs):
+    """
+    :func:`compare_with_job` for several jobs from
+    ``resolve_jobs(..., with_requirements=True)``, with the scoring calls
+    run in parallel.  Jobs left without a requirement list share one
+    multi-JD comparison.  A job whose comparison failed gets None.
+    """
+    results = [None] * len(jobs)
+    scorable = [index for index, job in enumerate(jobs) if job.requirements_extracted] if two_phase_enabled() else []
+
+    def score(index):
+        try:
+            return compare_resume_with_requirements(resume_json, jobs[index].requirements)
+        except Exception:
+            return None  # logged by compare_resume_with_requirements
+
+    if scorable:
+        with ThreadPoolExecutor(max_workers=min(len(scorable), MAX_INFO_WORKERS)) as pool:
+            for index, result in zip(scorable, pool.map(llm_ledger.attributed(score), scorable)):
+                results[index] = result
+        metrics.incr("comparison.two_phase", len(scorable))
+    remaining = [index for index in range(len(jobs)) if index not in scorable]
+    if remaining:
+        metrics.incr("comparison.full_text", len(remaining))
+        for index, result in zip(remaining, compare_resume_with_jobdescs(resume_json, [jobs[index].text for index in remaining])):
+            results[index] = result
+    return results
@@ -0,0 +1,270 @@
+"""
+Thin client for the LLM sidecar (see ``llm_sidecar.py``).
+
+Exposes the same functions as ``resume_parser`` (sync and ``a``-prefixed
+async) so views can import from here.  When ``settings.LLM_SIDECAR_URL`` is
+empty the calls run in-process, which keeps local development working
+without the sidecar.  The heavy
+llama_index/Gemini stack is only imported on that in-process path.
+"""
+import asyncio
+import http.client
+import json
+import logging
+import os
+import socket
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from .llm_ledger import current_user_id
+
+logger = logging.getLogger('ai_operations')
+
+
+class SidecarError(RuntimeError):
+    """Raised when the sidecar reports a failure we have no better type for."""
+
+
+# Exception types the sidecar may report that we re-raise as-is
+_KNOWN_ERRORS = {
+    'ValueError': ValueError,
+    'TimeoutError': TimeoutError,
+    'FileNotFoundError': FileNotFoundError,
+}
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self._socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+def _sidecar_url():
+    return getattr(settings, 'LLM_SIDECAR_URL', '')
+
+
+def _connection():
+    url = urlparse(_sidecar_url())
+    timeout = getattr(settings, 'LLM_SIDECAR_TIMEOUT', 180)
+    if url.scheme == 'unix':
+        return _UnixHTTPConnection(url.path, timeout)
+    return http.client.HTTPConnection(url.hostname or '127.0.0.1', url.port or 8765, timeout=timeout)
+
+
+def _with_user(payload):
+    # The sidecar charges its LLM calls to this user in the call ledger
+    return {**payload, 'ledger_user_id': current_user_id()}
+
+
+def _call(task, payload=None, method='POST'):
+    conn = _connection()
+    try:
+        body = json.dumps(_with_user(payload)) if payload is not None else None
+        conn.request(method, f'/{task}', body=body, headers={'Content-Type': 'application/json'})
+        data = json.loads(conn.getresponse().read() or b'{}')
+    except (OSError, http.client.HTTPException) as e:
+        raise SidecarError(f"LLM sidecar unavailable: {e}")
+    finally:
+        conn.close()
+
+    return _unwrap(data)
+
+
+async def _acall(task, payload):
+    url = urlparse(_sidecar_url())
+    timeout = getattr(settings, 'LLM_SIDECAR_TIMEOUT', 180)
+    body = json.dumps(_with_user(payload)).encode('utf-8')
+
+    async def exchange():
+        if url.scheme == 'unix':
+            reader, writer = await asyncio.open_unix_connection(url.path)
+        else:
+            reader, writer = await asyncio.open_connection(url.hostname or '127.0.0.1', url.port or 8765)
+        try:
+            writer.write((
+                f"POST /{task} HTTP/1.1\r\n"
+                f"Host: localhost\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n"
+            ).encode('latin-1') + body)
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    try:
+        # One deadline covers connecting, sending and reading the reply
+        raw = await asyncio.wait_for(exchange(), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        raise SidecarError(f"LLM sidecar unavailable: {e}")
+
+    _, _, response_body = raw.partition(b'\r\n\r\n')
+    return _unwrap(json.loads(response_body or b'{}'))
+
+
+def _unwrap(data):
+    if data.get('ok'):
+        return data.get('result')
+    error_type = _KNOWN_ERRORS.get(data.get('type'), SidecarError)
+    raise error_type(data.get('error', 'Unknown sidecar error'))
+
+
+def parse_resume_with_llama(resume_file):
+    if not _sidecar_url():
+        from .resume_parser import parse_resume_with_llama as local
+        return local(resume_file)
+    return _call('parse', {'file_path': os.path.abspath(resume_file)})
+
+
+def extract_resume_fields(resume_text):
+    if not _sidecar_url():
+        from .resume_parser import extract_resume_fields as local
+        return local(resume_text)
+    return _call('extract_resume', {'resume_text': resume_text})
+
+
+def extract_resume_fields_batch(documents):
+    """Returns (results, failures) keyed by doc id; doc ids become strings over the sidecar."""
+    if not _sidecar_url():
+        from .resume_parser import extract_resume_fields_batch as local
+        return local(documents)
+    results, failures = _call('extract_resume_batch', {'documents': {str(k): v for k, v in documents.items()}})
+    return results, failures
+
+
+def extract_resume_by_section(resume_text, previous_sections=None, previous_data=None):
+    """Returns (parsed_json, resume_sections)."""
+    if not _sidecar_url():
+        from .resume_parser import extract_resume_by_section as local
+        return local(resume_text, previous_sections, previous_data)
+    parsed_json, resume_sections = _call('extract_resume_sections', {
+        'resume_text': resume_text, 'previous_sections': previous_sections, 'previous_data': previous_data,
+    })
+    return parsed_json, resume_sections
+
+
+def extract_job_info(job_desc_text):
+    if not _sidecar_url():
+        from .resume_parser import extract_job_info as local
+        return local(job_desc_text)
+    try:
+        return _call('job_info', {'job_desc_text': job_desc_text})
+    except Exception as e:
+        logger.warning(f"⚠️ Sidecar job info extraction failed, using placeholder title: {e}")
+        return {"title": "Job Analysis", "company": "Unknown Company"}
+
+
+def compare_resume_with_jobdesc(resume_json, job_desc_text):
+    if not _sidecar_url():
+        from .resume_parser import compare_resume_with_jobdesc as local
+        return local(resume_json, job_desc_text)
+    return _call('compare', {'resume_json': resume_json, 'job_desc_text': job_desc_text})
+
+
+def compare_resume_with_jobdescs(resume_json, job_desc_texts):
+    if not _sidecar_url():
+        from .resume_parser import compare_resume_with_jobdescs as local
+        return local(resume_json, job_desc_texts)
+    return _call('compare_multi', {'resume_json': resume_json, 'job_desc_texts': list(job_desc_texts)})
+
+
+def extract_job_requirements(job_desc_text):
+    if not _sidecar_url():
+        from .resume_parser import extract_job_requirements as local
+        return local(job_desc_text)
+    return _call('job_requirements', {'job_desc_text': job_desc_text})
+
+
+def compare_resume_with_requirements(resume_json, requirements):
+    if not _sidecar_url():
+        from .resume_parser import compare_resume_with_requirements as local
+        return local(resume_json, requirements)
+    return _call('compare_requirements', {'resume_json': resume_json, 'requirements': requirements})
+
+
+def rescore_skill_matches(resume_json, skill_matches, indexes):
+    """Returns (skill_matches, missing_indexes)."""
+    if not _sidecar_url():
+        from .resume_parser import rescore_skill_matches as local
+        return local(resume_json, skill_matches, indexes)
+    updated, missing = _call('rescore', {'resume_json': resume_json, 'skill_matches': skill_matches, 'indexes': list(indexes)})
+    return updated, missing
+
+
+def sidecar_metrics():
+    """Metrics snapshot from the sidecar process, or None when running in-process."""
+    if not _sidecar_url():
+        return None
+    return _call('metrics', method='GET')
+
+
+# Async variants, used by the ASGI views in ``async_views.py``
+
+async def aparse_resume_with_llama(resume_file):
+    if not _sidecar_url():
+        from .resume_parser import aparse_resume_with_llama as local
+        return await local(resume_file)
+    return await _acall('parse', {'file_path': os.path.abspath(resume_file)})
+
+
+async def aextract_resume_fields(resume_text):
+    if not _sidecar_url():
+        from .resume_parser import aextract_resume_fields as local
+        return await local(resume_text)
+    return await _acall('extract_resume', {'resume_text': resume_text})
+
+
+async def aextract_resume_by_section(resume_text, previous_sections=None, previous_data=None):
+    if not _sidecar_url():
+        from .resume_parser import aextract_resume_by_section as local
+        return await local(resume_text, previous_sections, previous_data)
+    parsed_json, resume_sections = await _acall('extract_resume_sections', {
+        'resume_text': resume_text, 'previous_sections': previous_sections, 'previous_data': previous_data,
+    })
+    return parsed_json, resume_sections
+
+
+async def aextract_job_info(job_desc_text):
+    if not _sidecar_url():
+        from .resume_parser import aextract_job_info as local
+        return await local(job_desc_text)
+    try:
+        return await _acall('job_info', {'job_desc_text': job_desc_text})
+    except Exception as e:
+        logger.warning(f"⚠️ Sidecar job info extraction failed, using placeholder title: {e}")
+        return {"title": "Job Analysis", "company": "Unknown Company"}
+
+
+async def acompare_resume_with_jobdesc(resume_json, job_desc_text):
+    if not _sidecar_url():
+        from .resume_parser import acompare_resume_with_jobdesc as local
+        return await local(resume_json, job_desc_text)
+    return await _acall('compare', {'resume_json': resume_json, 'job_desc_text': job_desc_text})
+
+
+async def acompare_resume_with_jobdescs(resume_json, job_desc_texts):
+    if not _sidecar_url():
+        from .resume_parser import acompare_resume_with_jobdescs as local
+        return await local(resume_json, job_desc_texts)
+    return await _acall('compare_multi', {'resume_json': resume_json, 'job_desc_texts': list(job_desc_texts)})
+
+
+async def aextract_job_requirements(job_desc_text):
+    if not _sidecar_url():
+        from .resume_parser import aextract_job_requirements as local
+        return await local(job_desc_text)
+    return await _acall('job_requirements', {'job_desc_text': job_desc_text})
+
+
+async def acompare_resume_with_requirements(resume_json, requirements):
+    if not _sidecar_url():
+        from .resume_parser import acompare_resume_with_requirements as local
+        return await local(resume_json, requirements)
+    return await _acall('compare_requirements', {'resume_json': resume_json, 'requirements': requirements})
@@ -0,0 +1,318 @@
+"""
+Ledger of every LlamaParse and Gemini call.
+
+Each call (each attempt, so a primary model that missed its deadline and
+its fallback are two entries) is recorded with its task, model, input /
+cached / output tokens, latency, prefix-cache hit, user and outcome.
+``record`` only appends to an in-memory queue; a background thread writes
+the queue every ``LLM_LEDGER_FLUSH_INTERVAL`` seconds (or once
+``LLM_LEDGER_BATCH_SIZE`` entries are waiting) as one ``bulk_create`` of
+``LLMCall`` rows plus one ``F()`` update per (day, user, task, model) of the
+``LLMUsageDaily`` aggregates.  Reports and the admin read the aggregates;
+the raw table is append-only.
+
+Calls are charged to the user set with ``charged_to`` -- the
+``budgeted`` view decorator does this for the request -- and the user id
+travels to the LLM sidecar with each task.  Work handed to a thread pool
+must be wrapped in ``attributed`` to keep the user.
+
+``budgeted`` also refuses a user's POSTs (429) once their tokens for the
+day (UTC) reach ``LLM_DAILY_TOKEN_BUDGET``; 0 means no limit.  The check
+reads the aggregates plus this process's unwritten entries, so a user can
+overshoot by the calls of the request that crosses the limit and by what
+other processes have not flushed yet.
+"""
+import asyncio
+import atexit
+import contextvars
+import datetime
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Sum
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from . import metrics
+from .models import LLMCall, LLMUsageDaily
+
+logger = logging.getLogger(__name__)
+
+LLAMAPARSE = 'llamaparse'
+
+OK = LLMCall.OK
+TIMEOUT = LLMCall.TIMEOUT
+ERROR = LLMCall.ERROR
+
+_user_id = contextvars.ContextVar('llm_ledger_user', default=None)
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_pending = deque()
+_pending_tokens = defaultdict(int)  # (user_id, day) -> tokens queued, not yet written
+_writer = None
+
+
+def _settings():
+    return (
+        getattr(settings, 'LLM_LEDGER_FLUSH_INTERVAL', 2.0),
+        getattr(settings, 'LLM_LEDGER_BATCH_SIZE', 200),
+        getattr(settings, 'LLM_LEDGER_MAX_PENDING', 10000),
+        getattr(settings, 'LLM_DAILY_TOKEN_BUDGET', 0),
+    )
+
+
+def _today():
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+# ---------------------------------------------------------------------------
+# Attribution
+# ---------------------------------------------------------------------------
+
+def current_user_id():
+    return _user_id.get()
+
+
+@contextmanager
+def charged_to(user_id):
+    """Charge the LLM calls made in this block to ``user_id``."""
+    token = _user_id.set(user_id)
+    try:
+        yield
+    finally:
+        _user_id.reset(token)
+
+
+def attributed(func):
+    """``func`` charging its calls to the current user from whichever thread runs it."""
+    user_id = _user_id.get()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with charged_to(user_id):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def record(task, model, latency, outcome=OK, input_tokens=0, output_tokens=0, cached_tokens=0, cache_hit=None):
+    """Queue one call for the ledger; never blocks on the database."""
+    user_id = _user_id.get()
+    entry = LLMCall(
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+        user_id=user_id,
+        task=task[:LLMCall.TASK_LENGTH],
+        model=(model or '')[:LLMCall.MODEL_LENGTH],
+        input_tokens=max(0, int(input_tokens)),
+        cached_tokens=max(0, int(cached_tokens)),
+        output_tokens=max(0, int(output_tokens)),
+        latency_ms=max(0, int(latency * 1000)),
+        cache_hit=cache_hit,
+        outcome=outcome,
+    )
+    _, batch_size, max_pending, _ = _settings()
+    with _lock:
+        if len(_pending) >= max_pending:
+            metrics.incr('llm_ledger.dropped')
+            return
+        _pending.append(entry)
+        _pending_tokens[(user_id, entry.created_at.date())] += entry.input_tokens + entry.output_tokens
+        queued = len(_pending)
+    _ensure_writer()
+    if queued >= batch_size:
+        _wake.set()
+
+
+def _ensure_writer():
+    global _writer
+    with _lock:
+        if _writer is not None and _writer.is_alive():
+            return
+        _writer = threading.Thread(target=_write_loop, name='llm-ledger', daemon=True)
+        _writer.start()
+
+
+def _write_loop():
+    while True:
+        _wake.wait(_settings()[0])
+        _wake.clear()
+        flush()
+
+
+def _take(limit):
+    with _lock:
+        return [_pending.popleft() for _ in range(min(limit, len(_pending)))]
+
+
+def _settle(batch):
+    """Stop counting ``batch`` as unwritten once it is in the aggregates (or lost)."""
+    with _lock:
+        for entry in batch:
+            key = (entry.user_id, entry.created_at.date())
+            _pending_tokens[key] -= entry.input_tokens + entry.output_tokens
+            if _pending_tokens[key] <= 0:
+                del _pending_tokens[key]
+
+
+def _daily_totals(batch):
+    totals = defaultdict(lambda: defaultdict(int))
+    for entry in batch:
+        row = totals[(entry.created_at.date(), entry.user_id, entry.task, entry.model)]
+        row['calls'] += 1
+        row['errors'] += entry.outcome != OK
+        row['cache_hits'] += bool(entry.cache_hit)
+        row['input_tokens'] += entry.input_tokens
+        row['cached_tokens'] += entry.cached_tokens
+        row['output_tokens'] += entry.output_tokens
+        row['latency_ms'] += entry.latency_ms
+    return totals
+
+
+def _add_to_daily(day, user_id, task, model, counts):
+    # By primary key: rows without a user aren't covered by the unique constraint
+    rows = LLMUsageDaily.objects.filter(day=day, user_id=user_id, task=task, model=model)
+    increments = {name: F(name) + value for name, value in counts.items()}
+    pk = rows.values_list('pk', flat=True).first()
+    if pk is None:
+        try:
+            with transaction.atomic():
+                LLMUsageDaily.objects.create(day=day, user_id=user_id, task=task, model=model, **counts)
+            return
+        except IntegrityError:  # another process created the row first
+            pk = rows.values_list('pk', flat=True).first()
+    LLMUsageDaily.objects.filter(pk=pk).update(**increments)
+
+
+def flush():
+    """Write every queued entry; returns how many were written."""
+    written = 0
+    close_old_connections()
+    try:
+        while True:
+            batch = _take(_settings()[1])
+            if not batch:
+                return written
+            started = time.monotonic()
+            try:
+                with transaction.atomic():
+                    LLMCall.objects.bulk_create(batch)
+                    for (day, user_id, task, model), counts in _daily_totals(batch).items():
+                        _add_to_daily(day, user_id, task, model, counts)
+            except Exception as e:
+                metrics.incr('llm_ledger.errors')
+                metrics.incr('llm_ledger.dropped', len(batch))
+                logger.error(f"❌ LLM ledger write failed, {len(batch)} entries lost: {type(e).__name__}: {e}")
+                continue
+            finally:
+                _settle(batch)
+            written += len(batch)
+            metrics.incr('llm_ledger.written', len(batch))
+            metrics.observe('llm_ledger.flush', time.monotonic() - started)
+    finally:
+        close_old_connections()
+
+
+atexit.register(flush)
+
+
+# ---------------------------------------------------------------------------
+# Daily budget
+# ---------------------------------------------------------------------------
+
+def _unwritten_tokens(user_id, day):
+    with _lock:
+        return _pending_tokens.get((user_id, day), 0)
+
+
+def _usage_query(user_id, day):
+    return LLMUsageDaily.objects.filter(user_id=user_id, day=day).aggregate(
+        tokens=Sum(F('input_tokens') + F('output_tokens'))
+    )
+
+
+def tokens_used_today(user_id):
+    """Input plus output tokens charged to ``user_id`` since midnight UTC."""
+    day = _today()
+    return (_usage_query(user_id, day)['tokens'] or 0) + _unwritten_tokens(user_id, day)
+
+
+async def atokens_used_today(user_id):
+    day = _today()
+    usage = await LLMUsageDaily.objects.filter(user_id=user_id, day=day).aaggregate(
+        tokens=Sum(F('input_tokens') + F('output_tokens'))
+    )
+    return (usage['tokens'] or 0) + _unwritten_tokens(user_id, day)
+
+
+def _seconds_to_midnight():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), now.tzinfo)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def over_budget(request, used, budget):
+    metrics.incr('llm_ledger.over_budget')
+    logger.warning(f"🚫 LLM budget used up for user {request.user.pk} ({used}/{budget} tokens) on {request.path}")
+    seconds = _seconds_to_midnight()
+    message = "You have used today's analysis allowance. It resets at midnight UTC."
+    accepts_json = 'application/json' in request.headers.get('Accept', '')
+    if accepts_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = JsonResponse({'status': 'over_budget', 'message': message, 'retry_after': seconds}, status=429)
+    else:
+        response = render(request, 'account/try_later.html', {'message': message, 'retry_after': seconds}, status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def budgeted(view):
+    """Charge a view's LLM calls to the user and refuse their POSTs once the daily budget is used."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            # request.user loads lazily with a sync query, which the event loop refuses
+            user = await request.auser()
+            budget = _settings()[3]
+            if request.method == 'POST' and budget > 0:
+                used = await atokens_used_today(user.pk)
+                if used >= budget:
+                    return await sync_to_async(over_budget)(request, used, budget)
+            with charged_to(user.pk):
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        budget = _settings()[3]
+        if request.method == 'POST' and budget > 0:
+            used = tokens_used_today(request.user.pk)
+            if used >= budget:
+                return over_budget(request, used, budget)
+        with charged_to(request.user.pk):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def stats(data=None):
+    """Ledger write counters from a metrics snapshot, plus what is still queued here."""
+    counters = (data or metrics.snapshot())['counters']
+    with _lock:
+        pending = len(_pending)
+    return {
+        'pending': pending,
+        'written': counters.get('llm_ledger.written', 0),
+        'dropped': counters.get('llm_ledger.dropped', 0),
+        'errors': counters.get('llm_ledger.errors', 0),
+        'over_budget': counters.get('llm_ledger.over_budget', 0),
+        'daily_token_budget': _settings()[3],
+    }
@@ -0,0 +1,328 @@
+"""
+Per-task Gemini routing.
+
+Each LLM task (resume extraction, job info, comparison) gets its own model,
+output-token cap, temperature and deadline from ``DEFAULT_ROUTES``, with
+keys overridden per task by ``settings.LLM_ROUTES``.  When the primary
+model misses its deadline the call is retried once on the route's faster
+fallback model.  Both attempts together are cut off at
+``max_call_seconds()`` (``LLM_SIDECAR_TIMEOUT`` less a margin), so the
+sidecar client never gives up on a call that is still running.  Latency,
+calls, fallbacks, errors and prompt/cached token counts are recorded per
+task in ``accounts.metrics``, and every attempt is added to the call ledger
+(``accounts.llm_ledger``).  Calls that make up one request -- a multi-JD
+comparison and the single comparisons it falls back to -- can share one
+such budget with ``shared_deadline``.
+
+A missed deadline only stops the wait: the Gemini client is synchronous and
+a running HTTP request can't be cancelled from another thread, so the
+abandoned call keeps its ``_executor`` thread until the request returns
+(counted as ``llm.<task>.abandoned``).  ``LLM_CALL_THREADS`` must cover the
+calls in progress plus those still draining after a timeout; once every
+thread is busy, new calls wait in the executor queue and that wait counts
+against their deadline.  Async calls are real coroutines and are
+cancelled at the deadline.
+
+Prompts rendered from ``accounts.prompts`` put their static prefix first so
+Gemini's implicit prefix caching can reuse it; those with a schema in ``accounts.schemas`` are sent in Gemini's JSON mode with
+that ``response_schema`` (set ``'structured_output': False`` on a route to
+turn this off).
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from llama_index.llms.gemini import Gemini
+
+from . import llm_ledger, metrics, schemas
+
+logger = logging.getLogger('ai_operations')
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+RESUME_EXTRACTION = 'resume_extraction'
+RESUME_EXTRACTION_BATCH = 'resume_extraction_batch'
+RESUME_SECTION = 'resume_section'
+JOB_INFO = 'job_info'
+COMPARISON = 'comparison'
+COMPARISON_MULTI = 'comparison_multi'
+RESCORE = 'rescore'
+JOB_REQUIREMENTS = 'job_requirements'
+REQUIREMENT_SCORING = 'requirement_scoring'
+
+DEFAULT_ROUTES = {
+    RESUME_EXTRACTION: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 4096,
+        'temperature': 0.0,
+        'deadline': 90,
+        'fallback_model': 'models/gemini-2.5-flash-lite',
+        'fallback_deadline': 60,
+    },
+    RESUME_EXTRACTION_BATCH: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 32768,
+        'temperature': 0.0,
+        'deadline': 180,
+        'fallback_model': None,
+    },
+    RESUME_SECTION: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 2048,
+        'temperature': 0.0,
+        'deadline': 45,
+        'fallback_model': 'models/gemini-2.5-flash-lite',
+        'fallback_deadline': 30,
+    },
+    JOB_INFO: {
+        'model': 'models/gemini-2.5-flash-lite',
+        'max_output_tokens': 128,
+        'temperature': 0.0,
+        'deadline': 15,
+        'fallback_model': 'models/gemini-2.0-flash-lite',
+        'fallback_deadline': 10,
+    },
+    COMPARISON: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 8192,
+        'temperature': 0.2,
+        'deadline': 100,
+        'fallback_model': 'models/gemini-2.5-flash-lite',
+        'fallback_deadline': 50,
+    },
+    # Shares its budget with the single comparisons it falls back to (see compare_resume_with_jobdescs)
+    COMPARISON_MULTI: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 32768,
+        'temperature': 0.2,
+        'deadline': 110,
+        'fallback_model': None,
+    },
+    RESCORE: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 2048,
+        'temperature': 0.2,
+        'deadline': 45,
+        'fallback_model': 'models/gemini-2.5-flash-lite',
+        'fallback_deadline': 30,
+    },
+    # Extracted once per job description and reused for every candidate
+    JOB_REQUIREMENTS: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 4096,
+        'temperature': 0.0,
+        'deadline': 60,
+        'fallback_model': 'models/gemini-2.5-flash-lite',
+        'fallback_deadline': 45,
+    },
+    # Temperature 0 so candidates scored against the same list are comparable
+    REQUIREMENT_SCORING: {
+        'model': 'models/gemini-2.5-flash',
+        'max_output_tokens': 4096,
+        'temperature': 0.0,
+        'deadline': 60,
+        'fallback_model': 'models/gemini-2.5-flash-lite',
+        'fallback_deadline': 45,
+    },
+}
+
+# Seconds kept between the end of a call's budget and LLM_SIDECAR_TIMEOUT, for parsing and the response
+SIDECAR_MARGIN = 10
+
+# Threads that run blocking calls so the caller can stop waiting at the deadline.
+# A timed-out call keeps its thread until the HTTP request returns (see the module docstring).
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('LLM_CALL_THREADS', '32')), thread_name_prefix='llm-call')
+
+
+def get_route(task):
+    """Route for ``task``: the defaults overlaid with ``settings.LLM_ROUTES``."""
+    route = dict(DEFAULT_ROUTES[task])
+    route.update(getattr(settings, 'LLM_ROUTES', {}).get(task, {}))
+    return route
+
+
+@lru_cache(maxsize=None)
+def _client(model, temperature, max_output_tokens):
+    return Gemini(api_key=GEMINI_API_KEY, model_name=model, temperature=temperature, max_tokens=max_output_tokens)
+
+
+def max_call_seconds():
+    """Longest a call may take, fallback included: under the sidecar client's timeout."""
+    return max(1, getattr(settings, 'LLM_SIDECAR_TIMEOUT', 180) - SIDECAR_MARGIN)
+
+
+_finish_by = contextvars.ContextVar('llm_finish_by', default=None)
+
+
+@contextmanager
+def shared_deadline():
+    """Make the LLM calls in this block finish within one ``max_call_seconds()`` between them."""
+    token = _finish_by.set(_finish_by.get() or time.monotonic() + max_call_seconds())
+    try:
+        yield
+    finally:
+        _finish_by.reset(token)
+
+
+def within_deadline(func):
+    """``func`` keeping the current shared deadline from whichever thread runs it."""
+    finish_by = _finish_by.get()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _finish_by.set(finish_by)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _finish_by.reset(token)
+    return wrapper
+
+
+def _finish_by_for(started):
+    finish_by = started + max_call_seconds()
+    shared = _finish_by.get()
+    return min(finish_by, shared) if shared else finish_by
+
+
+def _attempts(route, finish_by):
+    """(model, seconds, is_fallback) per attempt, each cut to the time left before ``finish_by``."""
+    attempts = [(route['model'], route['deadline'], False)]
+    if route.get('fallback_model'):
+        attempts.append((route['fallback_model'], route.get('fallback_deadline', route['deadline']), True))
+    for model, deadline, is_fallback in attempts:
+        remaining = finish_by - time.monotonic()
+        if remaining <= 0:
+            return
+        yield model, min(deadline, remaining), is_fallback
+
+
+def structured_output_config(route, prompt):
+    """Gemini generation_config for schema-constrained JSON, or None."""
+    if not route.get('structured_output', True) or schemas.schema_for(prompt) is None:
+        return None
+    return {
+        'response_mime_type': 'application/json',
+        'response_schema': schemas.gemini_schema(prompt.template.name),
+    }
+
+
+def _completion_kwargs(route, prompt):
+    generation_config = structured_output_config(route, prompt)
+    return {'generation_config': generation_config} if generation_config else {}
+
+
+def _generate(llm, model, route, prompt):
+    return llm.complete(str(prompt), **_completion_kwargs(route, prompt))
+
+
+def estimate_tokens(text):
+    # Gemini averages ~4 characters per token for English prose
+    return max(1, len(text) // 4)
+
+
+def usage_from_response(response):
+    """Token usage from a llama_index Gemini completion, when the provider reports it."""
+    raw = getattr(response, 'raw', None) or {}
+    meta = raw.get('usage_metadata') if isinstance(raw, dict) else getattr(raw, 'usage_metadata', None)
+    if not meta:
+        return None
+    get = meta.get if isinstance(meta, dict) else (lambda name, default=None: getattr(meta, name, default))
+    return {
+        'prompt_tokens': get('prompt_token_count', 0) or 0,
+        'cached_tokens': get('cached_content_token_count', 0) or 0,
+        'output_tokens': get('candidates_token_count', 0) or 0,
+    }
+
+
+def _record_usage(task, model, prompt, response, latency):
+    usage = usage_from_response(response)
+    reported = usage is not None
+    if usage:
+        metrics.incr(f'llm.{task}.prompt_tokens', usage['prompt_tokens'])
+        metrics.incr(f'llm.{task}.cached_tokens', usage['cached_tokens'])
+        metrics.incr(f'llm.{task}.output_tokens', usage['output_tokens'])
+    else:
+        # Not reported by the provider: estimate, so the ledger still charges the call
+        usage = {
+            'prompt_tokens': estimate_tokens(str(prompt)),
+            'cached_tokens': 0,
+            'output_tokens': estimate_tokens(getattr(response, 'text', '') or ''),
+        }
+    llm_ledger.record(
+        task, model, latency,
+        input_tokens=usage['prompt_tokens'],
+        cached_tokens=usage['cached_tokens'],
+        output_tokens=usage['output_tokens'],
+        # Implicit prefix cache hits are only known when the provider reports usage
+        cache_hit=usage['cached_tokens'] > 0 if reported else None,
+    )
+
+
+def complete(task, prompt):
+    """Blocking completion for ``task`` with deadline and fallback."""
+    route = get_route(task)
+    metrics.incr(f'llm.{task}.calls')
+    started = time.monotonic()
+    try:
+        for model, deadline, is_fallback in _attempts(route, _finish_by_for(started)):
+            if is_fallback:
+                metrics.incr(f'llm.{task}.fallbacks')
+                logger.warning(f"⚠️ {task}: primary model missed its {route['deadline']}s budget, falling back to {model}")
+            llm = _client(model, route['temperature'], route['max_output_tokens'])
+            attempt_started = time.monotonic()
+            future = _executor.submit(_generate, llm, model, route, prompt)
+            try:
+                response = future.result(timeout=deadline)
+            except FutureTimeout:
+                if not future.cancel():  # already running: it finishes in the background
+                    metrics.incr(f'llm.{task}.abandoned')
+                llm_ledger.record(task, model, time.monotonic() - attempt_started, llm_ledger.TIMEOUT)
+                continue
+            except Exception:
+                llm_ledger.record(task, model, time.monotonic() - attempt_started, llm_ledger.ERROR)
+                raise
+            _record_usage(task, model, prompt, response, time.monotonic() - attempt_started)
+            return response
+        raise TimeoutError(f"{task} LLM call exceeded its latency budget")
+    except Exception:
+        metrics.incr(f'llm.{task}.errors')
+        raise
+    finally:
+        metrics.observe(f'llm.{task}.latency', time.monotonic() - started)
+
+
+async def acomplete(task, prompt):
+    """Async completion for ``task`` with deadline and fallback."""
+    route = get_route(task)
+    metrics.incr(f'llm.{task}.calls')
+    started = time.monotonic()
+    try:
+        for model, deadline, is_fallback in _attempts(route, _finish_by_for(started)):
+            if is_fallback:
+                metrics.incr(f'llm.{task}.fallbacks')
+                logger.warning(f"⚠️ {task}: primary model missed its {route['deadline']}s budget, falling back to {model}")
+            llm = _client(model, route['temperature'], route['max_output_tokens'])
+            call = llm.acomplete(str(prompt), **_completion_kwargs(route, prompt))
+            attempt_started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(call, deadline)
+            except asyncio.TimeoutError:
+                llm_ledger.record(task, model, time.monotonic() - attempt_started, llm_ledger.TIMEOUT)
+                continue
+            except Exception:
+                llm_ledger.record(task, model, time.monotonic() - attempt_started, llm_ledger.ERROR)
+                raise
+            _record_usage(task, model, prompt, response, time.monotonic() - attempt_started)
+            return response
+        raise TimeoutError(f"{task} LLM call exceeded its latency budget")
+    except Exception:
+        metrics.incr(f'llm.{task}.errors')
+        raise
+    finally:
+        metrics.observe(f'llm.{task}.latency', time.monotonic() - started)
@@ -0,0 +1,159 @@
+"""
+LLM sidecar: a small asyncio service that owns the LlamaParse and Gemini
+clients so that web workers don't have to.
+
+Web workers talk to it through ``accounts.llm_client`` with a tiny
+JSON-over-HTTP protocol, either on localhost TCP or on a Unix socket:
+
+    POST /parse           {"file_path": "..."}
+    POST /extract_resume  {"resume_text": "..."}
+    POST /extract_resume_batch  {"documents": {"<doc id>": "...", ...}}
+    POST /extract_resume_sections  {"resume_text": "...", "previous_sections": {...}, "previous_data": {...}}
+    POST /job_info        {"job_desc_text": "..."}
+    POST /compare         {"resume_json": {...}, "job_desc_text": "..."}
+    POST /compare_multi   {"resume_json": {...}, "job_desc_texts": ["...", ...]}
+    POST /rescore         {"resume_json": {...}, "skill_matches": [...], "indexes": [...]}
+    POST /job_requirements      {"job_desc_text": "..."}
+    POST /compare_requirements  {"resume_json": {...}, "requirements": [...]}
+    GET  /health
+    GET  /metrics
+
+POST bodies may also carry ``"ledger_user_id"``, the user the task's LLM
+calls are charged to in the call ledger (``accounts.llm_ledger``).
+
+Every reply is ``{"ok": true, "result": ...}`` or
+``{"ok": false, "error": "...", "type": "ExceptionName"}``.
+
+Start it with ``python manage.py run_llm_sidecar``.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+from . import llm_ledger, metrics, resume_parser
+
+logger = logging.getLogger('ai_operations')
+
+TASKS = {
+    '/parse': (resume_parser.aparse_resume_with_llama, ('file_path',)),
+    '/extract_resume': (resume_parser.aextract_resume_fields, ('resume_text',)),
+    '/extract_resume_batch': (resume_parser.aextract_resume_fields_batch, ('documents',)),
+    '/extract_resume_sections': (resume_parser.aextract_resume_by_section, ('resume_text', 'previous_sections', 'previous_data')),
+    '/job_info': (resume_parser.aextract_job_info, ('job_desc_text',)),
+    '/compare': (resume_parser.acompare_resume_with_jobdesc, ('resume_json', 'job_desc_text')),
+    '/compare_multi': (resume_parser.acompare_resume_with_jobdescs, ('resume_json', 'job_desc_texts')),
+    '/rescore': (resume_parser.arescore_skill_matches, ('resume_json', 'skill_matches', 'indexes')),
+    '/job_requirements': (resume_parser.aextract_job_requirements, ('job_desc_text',)),
+    '/compare_requirements': (resume_parser.acompare_resume_with_requirements, ('resume_json', 'requirements')),
+}
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class SidecarServer:
+    """Serves LLM tasks over HTTP/1.0-style one-shot connections."""
+
+    def __init__(self, max_concurrency=256):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.served = 0
+        self.started_at = time.time()
+
+    async def handle(self, reader, writer):
+        try:
+            status, payload = await self._process(reader)
+        except Exception as e:
+            logger.error(f"❌ SIDECAR request failed: {type(e).__name__}: {e}")
+            status, payload = 400, {'ok': False, 'error': str(e), 'type': type(e).__name__}
+
+        body = json.dumps(payload).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode('latin-1')
+        try:
+            writer.write(head + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _process(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        if not request_line:
+            raise ValueError("Empty request")
+        method, path = request_line.split(' ')[:2]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY_BYTES:
+            return 413, {'ok': False, 'error': 'Request body too large', 'type': 'ValueError'}
+        body = await reader.readexactly(length) if length else b''
+
+        if method == 'GET' and path == '/health':
+            return 200, {'ok': True, 'result': self.stats()}
+        if method == 'GET' and path == '/metrics':
+            return 200, {'ok': True, 'result': metrics.snapshot()}
+
+        if method != 'POST' or path not in TASKS:
+            return 404, {'ok': False, 'error': f'Unknown task {method} {path}', 'type': 'LookupError'}
+
+        func, arg_names = TASKS[path]
+        data = json.loads(body or b'{}')
+        args = [data.get(name) for name in arg_names]
+
+        async with self.semaphore:
+            self.in_flight += 1
+            started = time.monotonic()
+            try:
+                with llm_ledger.charged_to(data.get('ledger_user_id')):
+                    result = await func(*args)
+                return 200, {'ok': True, 'result': result}
+            except Exception as e:
+                return 500, {'ok': False, 'error': str(e), 'type': type(e).__name__}
+            finally:
+                self.in_flight -= 1
+                self.served += 1
+                logger.info(f"✅ SIDECAR {path} finished in {time.monotonic() - started:.2f}s (in flight: {self.in_flight})")
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'in_flight': self.in_flight,
+            'served': self.served,
+            'max_concurrency': self.max_concurrency,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+        }
+
+
+async def serve(host='127.0.0.1', port=8765, socket_path=None, max_concurrency=256, reuse_port=False):
+    """Run one sidecar event loop until cancelled."""
+    server = SidecarServer(max_concurrency=max_concurrency)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        srv = await asyncio.start_unix_server(server.handle, path=socket_path)
+        logger.info(f"🚀 LLM SIDECAR listening on unix:{socket_path} (pid {os.getpid()})")
+    else:
+        srv = await asyncio.start_server(server.handle, host, port, reuse_port=reuse_port)
+        logger.info(f"🚀 LLM SIDECAR listening on {host}:{port} (pid {os.getpid()})")
+    async with srv:
+        await srv.serve_forever()
+
+
+def run_worker(host, port, socket_path, max_concurrency, reuse_port):
+    """Process entry point: each worker runs its own event loop."""
+    asyncio.run(serve(host, port, socket_path, max_concurrency, reuse_port))
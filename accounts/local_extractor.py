@@ -0,0 +1,295 @@
+"""
+Deterministic extraction of the resume fields that don't need an LLM.
+
+Runs on the LlamaParse markdown before Gemini is called: emails, phone
+numbers, the candidate name from the header block, date normalization to
+MM-YYYY, the date ranges of the experience sections and section
+boundaries.  The results are merged into the Gemini output, which lets the
+extraction prompt leave those fields out, and the contact fields still
+give a partial profile when the Gemini call fails.
+"""
+import datetime
+import re
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<![\w/])(\+?\d[\d\s().-]{7,}\d)(?![\w/])")
+MARKDOWN_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+BOLD_LINE_RE = re.compile(r"^\s*(?:\*\*|__)(.+?)(?:\*\*|__)\s*:?\s*$")
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+ONGOING = {"present", "current", "now", "ongoing", "till date", "to date", "today"}
+
+_MONTH_NAME = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = (
+    rf"(?:{_MONTH_NAME}\s*,?\s*\d{{4}}"      # Jan 2020, January, 2020
+    r"|\d{1,2}[/.-]\d{4}"                   # 01/2020, 1-2020
+    r"|\d{4}[/.-]\d{1,2}(?![\d])"            # 2020-01
+    r"|\d{4})"                              # 2020
+)
+DATE_RANGE_RE = re.compile(
+    rf"({_DATE})\s*(?:-|–|—|to|until|till)\s*({_DATE}|present|current|now|ongoing|till date|to date)",
+    re.IGNORECASE,
+)
+
+# Heading text (lowercase, without punctuation) -> section type
+SECTION_KEYWORDS = {
+    "contact": "contact", "contact information": "contact", "personal details": "contact",
+    "personal information": "contact",
+    "summary": "other", "profile": "other", "objective": "other", "about me": "other",
+    "professional summary": "other", "career objective": "other",
+    "education": "education", "academic background": "education", "academics": "education",
+    "educational qualifications": "education", "academic qualifications": "education",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment": "experience", "employment history": "experience", "work history": "experience",
+    "research experience": "experience", "internships": "experience", "internship": "experience",
+    "skills": "skills", "technical skills": "skills", "key skills": "skills", "core competencies": "skills",
+    "technologies": "skills", "tools": "skills", "languages": "skills",
+    "projects": "projects", "academic projects": "projects", "personal projects": "projects",
+    "key projects": "projects",
+    "publications": "publications", "research papers": "publications", "papers": "publications",
+    "certifications": "certifications", "certificates": "certifications", "licenses and certifications": "certifications",
+    "courses": "certifications",
+    "achievements": "other", "awards": "other", "honors and awards": "other", "hackathons": "other",
+    "interests": "other", "hobbies": "other", "volunteering": "other", "extracurricular activities": "other",
+    "positions of responsibility": "other", "activities": "other",
+}
+
+
+def find_emails(text):
+    return list(dict.fromkeys(match.group(0).rstrip('.') for match in EMAIL_RE.finditer(text)))
+
+
+def find_phones(text):
+    """Phone-number-looking strings with 10-15 digits, in order of appearance."""
+    phones = []
+    for match in PHONE_RE.finditer(text):
+        candidate = match.group(1).strip()
+        digits = re.sub(r"\D", "", candidate)
+        # Skip year ranges such as "2019 - 2021 2022"
+        if 10 <= len(digits) <= 15 and not DATE_RANGE_RE.fullmatch(candidate):
+            phones.append(candidate)
+    return list(dict.fromkeys(phones))
+
+
+def normalize_date(value):
+    """
+    Normalize a resume date to "MM-YYYY", "YYYY" or "CURRENT".
+
+    Unrecognized values are returned unchanged so nothing is lost.
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    lowered = text.lower().rstrip('.')
+    if not lowered or lowered == "null":
+        return None
+    if lowered in ONGOING:
+        return "CURRENT"
+
+    match = re.fullmatch(r"(\d{1,2})[/.-](\d{4})", lowered)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return f"{int(match.group(1)):02d}-{match.group(2)}"
+    match = re.fullmatch(r"(\d{4})[/.-](\d{1,2})", lowered)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return f"{int(match.group(2)):02d}-{match.group(1)}"
+    match = re.fullmatch(r"([a-z]+)\.?\s*,?\s*'?(\d{4}|\d{2})", lowered)
+    if match:
+        month = MONTHS.get(match.group(1)[:4]) or MONTHS.get(match.group(1)[:3])
+        year = match.group(2)
+        if len(year) == 2:
+            year = expand_year(year)
+        if month:
+            return f"{month:02d}-{year}"
+    if re.fullmatch(r"\d{4}", lowered):
+        return lowered
+    return text
+
+
+def expand_year(year, today=None):
+    """Four-digit year for a two-digit one: 20xx up to ten years ahead (expected graduation), else 19xx ('98 -> 1998)."""
+    pivot = ((today or datetime.date.today()).year + 10) % 100
+    return f"{'20' if int(year) <= pivot else '19'}{int(year):02d}"
+
+
+def is_normalized_date(value):
+    return isinstance(value, str) and re.fullmatch(r"\d{2}-\d{4}|\d{4}|CURRENT", value) is not None
+
+
+def find_date_ranges(text):
+    """All "start - end" date ranges in the text, normalized."""
+    return [
+        {"start": normalize_date(match.group(1)), "end": normalize_date(match.group(2)), "text": match.group(0)}
+        for match in DATE_RANGE_RE.finditer(text)
+    ]
+
+
+def find_experience_date_ranges(text):
+    """Date ranges in the experience sections (the whole text when none was recognized)."""
+    lines = text.splitlines()
+    sections = [section for section in find_sections(text) if section["type"] == "experience"]
+    if not sections:
+        return find_date_ranges(text)
+    return [date_range for section in sections for date_range in find_date_ranges("\n".join(lines[section["start"]:section["end"]]))]
+
+
+def _heading_text(line):
+    """The heading text if ``line`` looks like a section heading, else None."""
+    match = MARKDOWN_HEADING_RE.match(line) or BOLD_LINE_RE.match(line)
+    if match:
+        return match.group(1).strip(" *_:")
+    stripped = line.strip().rstrip(':').strip()
+    if not stripped or len(stripped) > 40:
+        return None
+    if _section_type(stripped) is not None:
+        return stripped
+    letters = [c for c in stripped if c.isalpha()]
+    if len(letters) >= 4 and stripped.upper() == stripped and not re.search(r"\d|@", stripped):
+        return stripped
+    return None
+
+
+def _section_type(heading):
+    key = re.sub(r"[^a-z& ]", "", heading.lower()).replace("&", "and").strip()
+    key = re.sub(r"\s+", " ", key)
+    return SECTION_KEYWORDS.get(key)
+
+
+def find_sections(text):
+    """
+    Section boundaries as a list of ``{"title", "type", "start", "end"}`` dicts.
+
+    ``start``/``end`` are line indexes (end exclusive); ``type`` is the
+    section type for known headings, else None.  Lines before the first
+    heading form a "header" section.
+    """
+    lines = text.splitlines()
+    sections = []
+    current = {"title": "header", "type": "contact", "start": 0}
+    for index, line in enumerate(lines):
+        heading = _heading_text(line)
+        # Unknown headings only start a section once we are past the header block
+        if heading is None or (_section_type(heading) is None and not sections and current["title"] == "header" and index < 3):
+            continue
+        current["end"] = index
+        sections.append(current)
+        current = {"title": heading, "type": _section_type(heading), "start": index + 1}
+    current["end"] = len(lines)
+    sections.append(current)
+    return [section for section in sections if section["end"] > section["start"] or section["title"] != "header"]
+
+
+def guess_name(text):
+    """Candidate name from the header block: (first_name, last_name) or (None, None)."""
+    lines = text.splitlines()
+    header_end = next((s["end"] for s in find_sections(text) if s["title"] == "header"), len(lines))
+    for raw in lines[:max(header_end, 1)][:8] or lines[:1]:
+        line = MARKDOWN_HEADING_RE.sub(r"\1", raw)
+        line = re.sub(r"[*_|#>`]", " ", line).strip()
+        if not line or re.search(r"\d|@|http|www\.|linkedin|github", line, re.IGNORECASE):
+            continue
+        words = line.split()
+        if not 2 <= len(words) <= 4:
+            continue
+        if not all(re.fullmatch(r"[A-Za-z][A-Za-z.'-]*", word) for word in words):
+            continue
+        if not (all(word[0].isupper() for word in words) or line.isupper()):
+            continue
+        if _section_type(line) is not None:
+            continue
+        words = [word.capitalize() if line.isupper() else word for word in words]
+        return words[0], " ".join(words[1:])
+    return None, None
+
+
+CONTACT_FIELDS = ("first_name", "last_name", "email", "phone")
+
+
+def extract_local_fields(text):
+    """Contact fields (missing values are None) and experience date ranges found without the LLM."""
+    emails = find_emails(text)
+    phones = find_phones(text)
+    first_name, last_name = guess_name(text)
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": emails[0] if emails else None,
+        "phone": phones[0][:20] if phones else None,
+        "date_ranges": find_experience_date_ranges(text),
+    }
+
+
+def normalize_resume_dates(data):
+    """Normalize experience and education dates in an extraction result, in place."""
+    for exp in data.get("experience") or []:
+        if isinstance(exp, dict):
+            for key in ("start", "end"):
+                exp[key] = normalize_date(exp.get(key))
+    for edu in data.get("education") or []:
+        if isinstance(edu, dict):
+            for key in ("start_year", "end_year"):
+                edu[key] = normalize_date(edu.get(key))
+    return data
+
+
+def merge_date_ranges(data, date_ranges):
+    """
+    Fill experience dates the model left out, or copied in a form
+    ``normalize_date`` can't read, from the date ranges found in the text.
+
+    An entry is matched to the range with the same normalized start date,
+    else to the first range whose text contains the entry's start as written.
+    """
+    by_start = {}
+    for date_range in date_ranges:
+        by_start.setdefault(date_range["start"], date_range)
+    for exp in data.get("experience") or []:
+        if not isinstance(exp, dict):
+            continue
+        start, end = normalize_date(exp.get("start")), normalize_date(exp.get("end"))
+        if is_normalized_date(start) and is_normalized_date(end):
+            continue
+        written = str(exp.get("start") or "").strip().lower()
+        match = by_start.get(start) or next(
+            (date_range for date_range in date_ranges if written and written in date_range["text"].lower()), None
+        )
+        if match is None:
+            continue
+        if not is_normalized_date(start):
+            exp["start"] = match["start"]
+        if not is_normalized_date(end):
+            exp["end"] = match["end"]
+    return data
+
+
+def merge_local_fields(data, local):
+    """
+    Merge locally extracted fields into an LLM extraction result.
+
+    Email and phone found by regex win over the model's; the name is only
+    taken from the header heuristic when the model didn't provide one, and
+    experience dates only where the model's are missing or unreadable.
+    """
+    for key in ("email", "phone"):
+        if local.get(key):
+            data[key] = local[key]
+        else:
+            data.setdefault(key, None)
+    for key in ("first_name", "last_name"):
+        if not data.get(key):
+            data[key] = local.get(key)
+    merge_date_ranges(data, local.get("date_ranges") or [])
+    return normalize_resume_dates(data)
+
+
+def partial_profile(local):
+    """
+    A minimal extraction result built from the local contact fields only
+    (LLM unavailable).  The other fields are left out, not emptied, so
+    applying it keeps what the profile already has.
+    """
+    data = {key: local[key] for key in CONTACT_FIELDS if local.get(key)}
+    data["extraction_status"] = "partial"
+    return data
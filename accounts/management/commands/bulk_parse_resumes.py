@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+RESUME_EXTENSIONS = ('.pdf', '.doc', '.docx')
+
+
+class Command(BaseCommand):
+    help = (
+        "Parse many resume files with LlamaParse concurrently and write one JSON line per file. "
+        "With --extract the parsed texts are also sent through batched Gemini extraction as they arrive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Resume files, or directories to scan for .pdf/.doc/.docx files.')
+        parser.add_argument('--max-in-flight', type=int, default=settings.LLAMAPARSE_MAX_IN_FLIGHT,
+                            help='LlamaParse jobs running at once.')
+        parser.add_argument('--timeout', type=int, default=settings.LLAMAPARSE_FILE_TIMEOUT,
+                            help='Seconds allowed per file.')
+        parser.add_argument('--extract', action='store_true',
+                            help='Also extract structured fields (batched Gemini calls).')
+        parser.add_argument('--extract-chunk', type=int, default=20,
+                            help='Parsed resumes collected before each batched extraction.')
+        parser.add_argument('--output', help='JSONL output file (default: stdout).')
+
+    def handle(self, *args, **options):
+        # Imported here so the command list doesn't load the LLM stack
+        from accounts.resume_parser import extract_resume_fields_batch, parse_resumes
+
+        files = self.collect_files(options['paths'])
+        if not files:
+            raise CommandError("No resume files found")
+        self.stderr.write(f"Parsing {len(files)} files, {options['max_in_flight']} at a time")
+
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        started = time.monotonic()
+        parsed = failed = extracted = 0
+        pending = {}
+
+        def flush():
+            nonlocal extracted, failed
+            results, failures = extract_resume_fields_batch(pending)
+            for path, text in pending.items():
+                if path in results:
+                    extracted += 1
+                    self.write(out, path, text, data=results[path])
+                else:
+                    failed += 1
+                    self.write(out, path, text, error=f"extraction failed: {failures.get(path)}")
+            pending.clear()
+
+        try:
+            for path, text, error in parse_resumes(files, options['max_in_flight'], options['timeout']):
+                if error is not None:
+                    failed += 1
+                    self.write(out, path, None, error=error)
+                    continue
+                parsed += 1
+                if not options['extract']:
+                    self.write(out, path, text)
+                    continue
+                pending[path] = text
+                if len(pending) >= options['extract_chunk']:
+                    flush()
+            if pending:
+                flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        elapsed = time.monotonic() - started
+        summary = f"Parsed {parsed}/{len(files)} files"
+        if options['extract']:
+            summary += f", extracted {extracted}"
+        self.stderr.write(f"{summary}, {failed} failed in {elapsed:.1f}s")
+
+    def collect_files(self, paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in sorted(names)
+                                 if name.lower().endswith(RESUME_EXTENSIONS))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                self.stderr.write(f"Skipping missing path: {path}")
+        return files
+
+    def write(self, out, path, text, data=None, error=None):
+        record = {'file': path, 'ok': error is None, 'characters': len(text) if text else 0}
+        if data is not None:
+            record['data'] = data
+        elif text is not None:
+            record['text'] = text
+        if error is not None:
+            record['error'] = error
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
@@ -0,0 +1,126 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+
+from accounts import job_descriptions
+from accounts.models import AnalyticsRollup, ResumeAnalysis, UserProfile
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test write contention on the default database: concurrent threads save analyses "
+        "(each also updates the analytics rollups in the same transaction) while others read the "
+        "analysis history. Reports throughput, latency, lock errors and lost rollup updates, then deletes its rows. "
+        "Compare e.g. DB_SQLITE_TUNING=0 against the default settings, each on a fresh DB_NAME."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run.')
+
+    def handle(self, *args, **options):
+        self._describe_database()
+        profiles = [
+            UserProfile.objects.create(user=User.objects.create(username=f"loadtest-{uuid.uuid4().hex[:12]}"))
+            for _ in range(max(1, options['writers']))
+        ]
+        job, _ = job_descriptions.get_or_create_job(f"Load test posting {uuid.uuid4().hex}")
+
+        results = {'write': [], 'read': [], 'errors': []}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def run(work, kind):
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        work()
+                    except OperationalError as e:
+                        with lock:
+                            results['errors'].append(str(e))
+                        continue
+                    with lock:
+                        results[kind].append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+
+        def writer(profile):
+            summary = {'overall_fit_percentage': 50, 'areas_of_improvement': ['Kubernetes']}
+            return lambda: ResumeAnalysis.objects.create(
+                user_profile=profile, job=job, job_title='Load test', job_company='Load test',
+                skill_matches=[{'skill': 'Go', 'category': 'technical', 'score': 0, 'max_score': 3}],
+                summary=summary, detailed_analysis={'overall_recommendation': 'Good Match'}, match_score=50,
+            )
+
+        def reader(profile):
+            def read():
+                for analysis in ResumeAnalysis.objects.filter(user_profile=profile).order_by('-created_at')[:10]:
+                    analysis.summary.get('overall_fit_percentage')
+            return read
+
+        threads = [threading.Thread(target=run, args=(writer(profile), 'write')) for profile in profiles[:options['writers']]]
+        threads += [
+            threading.Thread(target=run, args=(reader(profiles[i % len(profiles)]), 'read'))
+            for i in range(options['readers'])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        self._report('writes', results['write'], elapsed)
+        self._report('reads', results['read'], elapsed)
+        self.stdout.write(f"errors: {len(results['errors'])}")
+        for message in sorted(set(results['errors']))[:5]:
+            self.stdout.write(f"  {message}")
+        # The rollup update runs in a post_save handler that logs and swallows its errors
+        counted = AnalyticsRollup.objects.filter(user_profile__in=profiles).aggregate(n=Sum('analysis_count'))['n'] or 0
+        self.stdout.write(f"rollup updates lost to lock errors: {len(results['write']) - counted}")
+
+        for profile in profiles:
+            profile.user.delete()
+        if not job.analyses.exists():
+            job.delete()
+
+    def _describe_database(self):
+        settings_dict = connection.settings_dict
+        line = f"{connection.vendor} {settings_dict['NAME']} CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}"
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+                cursor.execute("PRAGMA synchronous")
+                synchronous = cursor.fetchone()[0]
+            options = settings_dict.get('OPTIONS', {})
+            line += (
+                f" journal_mode={journal_mode} synchronous={synchronous} "
+                f"timeout={options.get('timeout', 5)} transaction_mode={options.get('transaction_mode', 'DEFERRED')}"
+            )
+        self.stdout.write(line)
+
+    def _report(self, label, timings, elapsed):
+        if not timings:
+            self.stdout.write(f"{label}: none completed")
+            return
+        self.stdout.write(
+            f"{label}: {len(timings)} ({len(timings) / elapsed:.0f}/s), "
+            f"p50 {statistics.median(timings) * 1000:.1f} ms, p95 {_percentile(timings, 0.95) * 1000:.1f} ms, "
+            f"max {max(timings) * 1000:.1f} ms"
+        )
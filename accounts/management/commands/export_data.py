@@ -0,0 +1,35 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every ResumeAnalysis or UserProfile row to CSV or JSON Lines. "
+        "Rows are read in chunks, so memory use does not grow with the table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS), help='What to export.')
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE,
+                            help='Rows fetched from the database per round trip.')
+        parser.add_argument('--output', help='Output file (default: stdout).')
+
+    def handle(self, *args, **options):
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        started = time.monotonic()
+        lines = 0
+        try:
+            for chunk in exports.iter_export(options['kind'], options['format'], chunk_size=options['chunk_size']):
+                out.write(chunk)
+                lines += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['format'] == 'csv':
+            lines -= 1  # header
+        self.stderr.write(f"Exported {lines} {options['kind']} in {time.monotonic() - started:.1f}s")
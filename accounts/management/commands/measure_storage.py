@@ -0,0 +1,77 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from accounts.fields import decode, encode
+from accounts.models import ResumeAnalysis, UserProfile
+
+MEASURED_COLUMNS = [
+    (UserProfile, 'parsed_resume_data'),
+    (UserProfile, 'resume_sections'),
+    (ResumeAnalysis, 'skill_matches'),
+    (ResumeAnalysis, 'summary'),
+    (ResumeAnalysis, 'detailed_analysis'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Report how many bytes the large JSON columns take as stored, as compact JSON and "
+        "as compressed by accounts.fields, and time the dashboard's analysis-history query. "
+        "Reads the columns with raw SQL, so it works both before and after the compression migrations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5,
+                            help='Users (with the most analyses) whose history query is timed.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per user.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'column':<36}{'rows':>8}{'stored':>12}{'json':>12}{'compressed':>12}{'ratio':>8}")
+        for model, column in MEASURED_COLUMNS:
+            rows, stored, raw, compressed = self._measure(model._meta.db_table, column)
+            ratio = f"{raw / compressed:.1f}x" if compressed else "-"
+            self.stdout.write(f"{model.__name__ + '.' + column:<36}{rows:>8}{stored:>12}{raw:>12}{compressed:>12}{ratio:>8}")
+        self._time_history(options['users'], options['repeat'])
+
+    def _measure(self, table, column):
+        rows = stored = raw = compressed = 0
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {quote(column)} FROM {quote(table)} WHERE {quote(column)} IS NOT NULL")
+            for (value,) in cursor:
+                rows += 1
+                if isinstance(value, (dict, list)):  # jsonb, already decoded by the driver
+                    data = value
+                    stored += len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+                else:
+                    data = decode(value)
+                    stored += len(value.encode('utf-8') if isinstance(value, str) else bytes(value))
+                raw += len(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                compressed += len(encode(data))
+        return rows, stored, raw, compressed
+
+    def _time_history(self, users, repeat):
+        profile_ids = (
+            ResumeAnalysis.objects.values('user_profile_id').annotate(n=Count('id'))
+            .order_by('-n').values_list('user_profile_id', flat=True)[:users]
+        )
+        timings = []
+        for profile_id in profile_ids:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                history = ResumeAnalysis.objects.filter(user_profile_id=profile_id).order_by('-created_at')[:10]
+                for analysis in history:
+                    analysis.summary.get('overall_fit_percentage')
+                timings.append(time.perf_counter() - started)
+        if not timings:
+            self.stdout.write("No analyses to time the history query on")
+            return
+        self.stdout.write(
+            f"History query (10 latest analyses with summaries): median {statistics.median(timings) * 1000:.2f} ms, "
+            f"max {max(timings) * 1000:.2f} ms over {len(timings)} runs"
+        )
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-user analytics rollups and the global skill-gap table from all saved analyses. "
+        "They are normally kept current as analyses are created and deleted; run this once after "
+        "deploying them, or after bulk changes that bypass the ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Analyses fetched from the database per round trip.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        scanned = rollups.rebuild(options['chunk_size'])
+        self.stdout.write(f"Rebuilt rollups from {scanned} analyses in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.experience import bulk_experience_totals
+from accounts.models import RESUME_COLUMN_KEYS, UserProfile
+
+FIELDS = [
+    'work_experience_years', 'work_experience_months',
+    'research_experience_years', 'research_experience_months',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute stored work/research experience totals for every profile. "
+        "Totals drift because ongoing (CURRENT) roles end 'today'; run this daily "
+        "from cron, or pass --every to keep it running on a schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Profiles loaded, computed and written per batch.')
+        parser.add_argument('--every', type=int, default=0, metavar='SECONDS',
+                            help='Repeat the recompute every SECONDS instead of running once.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report how many profiles would change without writing.')
+
+    def handle(self, *args, **options):
+        while True:
+            self.recompute(options['batch_size'], options['dry_run'])
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def recompute(self, batch_size, dry_run):
+        started = time.monotonic()
+        scanned = changed = 0
+
+        # The column-backed keys too: reading parsed_resume_data would otherwise load them per
+        # profile, and pre_save compares against them to leave the repeated keys out
+        queryset = UserProfile.objects.only('id', 'parsed_resume_data', *RESUME_COLUMN_KEYS, *FIELDS).order_by('pk')
+        batch = []
+        for profile in queryset.iterator(chunk_size=batch_size):
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                changed += self.recompute_batch(batch, dry_run)
+                scanned += len(batch)
+                batch = []
+        if batch:
+            changed += self.recompute_batch(batch, dry_run)
+            scanned += len(batch)
+
+        elapsed = time.monotonic() - started
+        verb = 'would change' if dry_run else 'updated'
+        self.stdout.write(f"Recomputed experience for {scanned} profiles, {verb} {changed} in {elapsed:.2f}s")
+
+    def recompute_batch(self, profiles, dry_run):
+        experiences = [(p.parsed_resume_data or {}).get('experience', []) for p in profiles]
+        work_months, research_months = bulk_experience_totals(experiences)
+
+        dirty = []
+        for profile, work, research in zip(profiles, work_months.tolist(), research_months.tolist()):
+            totals = (work // 12, work % 12, research // 12, research % 12)
+            if totals == tuple(getattr(profile, field) for field in FIELDS):
+                continue
+            for field, value in zip(FIELDS, totals):
+                setattr(profile, field, value)
+            # Keep the JSON copy (used in comparison prompts) in step with the columns
+            if profile.parsed_resume_data:
+                profile.parsed_resume_data['work_experience'] = {'years': totals[0], 'months': totals[1]}
+                profile.parsed_resume_data['research_experience'] = {'years': totals[2], 'months': totals[3]}
+            dirty.append(profile)
+
+        if dirty and not dry_run:
+            # bulk_update skips auto_now (updated_at keys the cached profile fragment) and
+            # pre_save, which leaves out the keys repeated in columns; apply both here, as migration 0010 does
+            now = timezone.now()
+            resume_field = UserProfile._meta.get_field('parsed_resume_data')
+            for profile in dirty:
+                profile.updated_at = now
+                profile.parsed_resume_data = resume_field.pre_save(profile, False)
+            with transaction.atomic():
+                UserProfile.objects.bulk_update(dirty, FIELDS + ['parsed_resume_data', 'updated_at'], batch_size=1000)
+        return len(dirty)
@@ -0,0 +1,52 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+
+from accounts.llm_sidecar import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run the LLM sidecar that owns the LlamaParse/Gemini clients for the web workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--socket', dest='socket_path', default=None,
+                            help='Listen on a Unix socket instead of TCP (single process only).')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of sidecar processes sharing the TCP port (SO_REUSEPORT).')
+        parser.add_argument('--max-concurrency', type=int, default=256,
+                            help='Maximum in-flight LLM calls per process.')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        if options['socket_path'] and workers > 1:
+            self.stderr.write("Unix socket mode runs a single process; ignoring --workers.")
+            workers = 1
+
+        args = (
+            options['host'],
+            options['port'],
+            options['socket_path'],
+            options['max_concurrency'],
+            workers > 1,
+        )
+        target = options['socket_path'] and f"unix:{options['socket_path']}" or f"{options['host']}:{options['port']}"
+        self.stdout.write(f"Starting {workers} LLM sidecar process(es) on {target}")
+
+        if workers == 1:
+            try:
+                run_worker(*args)
+            except KeyboardInterrupt:
+                pass
+            return
+
+        processes = [multiprocessing.Process(target=run_worker, args=args, daemon=True) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
@@ -0,0 +1,89 @@
+"""
+Tiny in-process metrics registry.
+
+Counters and latency timings are kept per process (web worker or LLM
+sidecar) and exposed as JSON by the staff-only ``/metrics/`` endpoint.
+"""
+import threading
+from collections import defaultdict, deque
+
+RECENT_SAMPLES = 500
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = {}
+
+
+def incr(name, amount=1):
+    """Increment counter ``name``."""
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name, seconds):
+    """Record one duration (in seconds) for timing ``name``."""
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'recent': deque(maxlen=RECENT_SAMPLES)}
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+        timing['recent'].append(seconds)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def snapshot():
+    """Return a JSON-serializable copy of all counters and timings."""
+    with _lock:
+        counters = dict(_counters)
+        timings = {}
+        for name, timing in _timings.items():
+            recent = sorted(timing['recent'])
+            timings[name] = {
+                'count': timing['count'],
+                'avg': round(timing['total'] / timing['count'], 3) if timing['count'] else 0.0,
+                'max': round(timing['max'], 3),
+                'p50': round(_percentile(recent, 0.50), 3),
+                'p95': round(_percentile(recent, 0.95), 3),
+            }
+    return {'counters': counters, 'timings': timings}
+
+
+def llm_task_stats(data=None):
+    """Per-task LLM call counts, fallback rates, cached-token ratios and latency."""
+    data = data or snapshot()
+    counters, timings = data['counters'], data['timings']
+    tasks = {name.split('.')[1] for name in counters if name.startswith('llm.') and name.endswith('.calls')}
+    stats = {}
+    for task in sorted(tasks):
+        calls = counters.get(f'llm.{task}.calls', 0)
+        fallbacks = counters.get(f'llm.{task}.fallbacks', 0)
+        prompt_tokens = counters.get(f'llm.{task}.prompt_tokens', 0)
+        cached_tokens = counters.get(f'llm.{task}.cached_tokens', 0)
+        stats[task] = {
+            'calls': calls,
+            'fallbacks': fallbacks,
+            'fallback_rate': round(fallbacks / calls, 3) if calls else 0.0,
+            'errors': counters.get(f'llm.{task}.errors', 0),
+            'abandoned': counters.get(f'llm.{task}.abandoned', 0),
+            'schema_failures': counters.get(f'llm.{task}.schema_failures', 0),
+            'schema_retries': counters.get(f'llm.{task}.schema_retries', 0),
+            'prompt_tokens': prompt_tokens,
+            'cached_tokens': cached_tokens,
+            'cached_token_ratio': round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+            'latency': timings.get(f'llm.{task}.latency', {}),
+        }
+    return stats
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_resumeanalysis_detailed_analysis_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='resume_sections',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_resumeanalysis_freshness'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillGap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(max_length=200, unique=True)),
+                ('label', models.CharField(max_length=200)),
+                ('missing_count', models.IntegerField(db_index=True, default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('analysis_count', models.IntegerField(default=0)),
+                ('fit_total', models.FloatField(default=0.0)),
+                ('recommendations', models.JSONField(blank=True, default=dict)),
+                ('monthly_fit', models.JSONField(blank=True, default=dict)),
+                ('missing_skills', models.JSONField(blank=True, default=dict)),
+                ('improvement_areas', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user_profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='accounts.userprofile')),
+            ],
+        ),
+    ]
@@ -0,0 +1,139 @@
+import hashlib
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DEFAULT_TITLES = {None, '', 'Job Analysis'}
+
+# Frozen copies of the accounts.job_descriptions helpers as of this migration,
+# so later changes to that module (or its imports) can't change what it does.
+
+MARKDOWN_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+BOLD_LINE_RE = re.compile(r"^\s*(?:\*\*|__)(.+?)(?:\*\*|__)\s*:?\s*$")
+BULLET_RE = re.compile(r"^\s*(?:[-*+•●▪◦‣·–]|\d{1,2}[.)])\s+(.*\S)")
+
+JD_SECTION_KEYWORDS = {
+    "requirements": "requirements", "qualifications": "requirements", "minimum qualifications": "requirements",
+    "basic qualifications": "requirements", "required qualifications": "requirements",
+    "required skills": "requirements", "skills": "requirements", "must have": "requirements",
+    "what you will need": "requirements", "what youll need": "requirements",
+    "what we are looking for": "requirements", "what were looking for": "requirements",
+    "who you are": "requirements", "about you": "requirements",
+    "preferred qualifications": "nice_to_have", "nice to have": "nice_to_have", "bonus points": "nice_to_have",
+    "preferred skills": "nice_to_have", "good to have": "nice_to_have",
+    "responsibilities": "responsibilities", "key responsibilities": "responsibilities",
+    "what you will do": "responsibilities", "what youll do": "responsibilities", "the role": "responsibilities",
+    "about the role": "responsibilities", "job description": "responsibilities", "role overview": "responsibilities",
+    "about us": "company", "about the company": "company", "who we are": "company", "company overview": "company",
+    "benefits": "benefits", "perks": "benefits", "what we offer": "benefits", "perks and benefits": "benefits",
+}
+
+
+def text_hash(text):
+    # NFKC, whitespace collapsed; case is kept so case-only variants keep their own row and text
+    normalized = " ".join(unicodedata.normalize("NFKC", text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _jd_section_type(line):
+    match = MARKDOWN_HEADING_RE.match(line) or BOLD_LINE_RE.match(line)
+    heading = match.group(1) if match else line.strip()
+    if len(heading) > 50:
+        return None
+    key = re.sub(r"[^a-z ]", "", heading.lower().replace("&", "and"))
+    return JD_SECTION_KEYWORDS.get(" ".join(key.split()))
+
+
+def split_sections(text):
+    sections = {}
+    current = "overview"
+    for line in (text or "").splitlines():
+        section_type = _jd_section_type(line)
+        if section_type:
+            current = section_type
+            continue
+        stripped = line.strip()
+        if not stripped:
+            continue
+        bullet = BULLET_RE.match(line)
+        sections.setdefault(current, []).append(f"- {bullet.group(1)}" if bullet else stripped)
+    return {section_type: "\n".join(lines) for section_type, lines in sections.items()}
+
+
+def requirement_lines(sections):
+    requirements = []
+    for section_type, must_have in (("requirements", True), ("nice_to_have", False)):
+        for line in sections.get(section_type, "").splitlines():
+            if line.startswith("- "):
+                requirements.append({"text": line[2:], "must_have": must_have})
+    return requirements
+
+
+def deduplicate_job_descriptions(apps, schema_editor):
+    """Move each distinct job_description text into one JobDescription row and link the analyses to it."""
+    ResumeAnalysis = apps.get_model('accounts', 'ResumeAnalysis')
+    JobDescription = apps.get_model('accounts', 'JobDescription')
+    job_ids = {}
+    batch = []
+    analyses = (
+        ResumeAnalysis.objects.exclude(job_description__isnull=True).exclude(job_description='')
+        .only('id', 'job_description', 'job_title', 'job_company').order_by('id')
+    )
+    for analysis in analyses.iterator(chunk_size=500):
+        digest = text_hash(analysis.job_description)
+        if digest not in job_ids:
+            sections = split_sections(analysis.job_description)
+            job_ids[digest] = JobDescription.objects.create(
+                text_hash=digest,
+                text=analysis.job_description,
+                title=analysis.job_title,
+                company=analysis.job_company,
+                info_extracted=analysis.job_title not in DEFAULT_TITLES,
+                sections=sections,
+                requirements=requirement_lines(sections),
+            ).pk
+        analysis.job_id = job_ids[digest]
+        batch.append(analysis)
+        if len(batch) >= 500:
+            ResumeAnalysis.objects.bulk_update(batch, ['job'])
+            batch = []
+    ResumeAnalysis.objects.bulk_update(batch, ['job'])
+
+
+def restore_job_descriptions(apps, schema_editor):
+    ResumeAnalysis = apps.get_model('accounts', 'ResumeAnalysis')
+    for analysis in ResumeAnalysis.objects.filter(job__isnull=False).select_related('job').iterator(chunk_size=500):
+        analysis.job_description = analysis.job.text
+        analysis.save(update_fields=['job_description'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDescription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField()),
+                ('title', models.CharField(blank=True, max_length=200, null=True)),
+                ('company', models.CharField(blank=True, max_length=200, null=True)),
+                ('info_extracted', models.BooleanField(default=False)),
+                ('requirements', models.JSONField(blank=True, default=list)),
+                ('sections', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='analyses', to='accounts.jobdescription'),
+        ),
+        migrations.RunPython(deduplicate_job_descriptions, restore_job_descriptions),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Separate from 0007 so the data copy and the column drop run in different transactions
+
+    dependencies = [
+        ('accounts', '0007_job_descriptions'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='resumeanalysis',
+            name='job_description',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+from accounts.near_duplicates import signature
+
+
+def compute_signatures(apps, schema_editor):
+    JobDescription = apps.get_model('accounts', 'JobDescription')
+    batch = []
+    for job in JobDescription.objects.only('id', 'text').order_by('id').iterator(chunk_size=500):
+        job.minhash = signature(job.text)
+        batch.append(job)
+        if len(batch) >= 500:
+            JobDescription.objects.bulk_update(batch, ['minhash'])
+            batch = []
+    JobDescription.objects.bulk_update(batch, ['minhash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_remove_resumeanalysis_job_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='minhash',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='resume_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(compute_signatures, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+from django.db import migrations
+
+import accounts.fields
+
+RESUME_COLUMN_KEYS = (
+    'first_name', 'last_name', 'email', 'phone', 'education',
+    'skills', 'certifications', 'hackathons', 'publications', 'interests', 'projects',
+)
+
+# (model, field, default): JSONFields moved to compressed storage
+COMPRESSED_FIELDS = [
+    ('userprofile', 'resume_sections', dict),
+    ('resumeanalysis', 'skill_matches', list),
+    ('resumeanalysis', 'summary', dict),
+    ('resumeanalysis', 'detailed_analysis', dict),
+]
+
+BATCH_SIZE = 500
+
+
+def _copy(model, fields):
+    batch = []
+    for obj in model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for name in fields:
+            setattr(obj, f'{name}_z', getattr(obj, name))
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, [f'{name}_z' for name in fields])
+            batch = []
+    model.objects.bulk_update(batch, [f'{name}_z' for name in fields])
+
+
+def compress_json(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    ResumeAnalysis = apps.get_model('accounts', 'ResumeAnalysis')
+
+    _copy(UserProfile, ['resume_sections'])
+    _copy(ResumeAnalysis, ['skill_matches', 'summary', 'detailed_analysis'])
+
+    # bulk_update skips pre_save, which is what drops the keys repeated in columns
+    resume_field = UserProfile._meta.get_field('parsed_resume_data_z')
+    for profile in UserProfile.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        profile.parsed_resume_data_z = profile.parsed_resume_data
+        UserProfile.objects.filter(pk=profile.pk).update(parsed_resume_data_z=resume_field.pre_save(profile, False))
+
+
+def decompress_json(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    ResumeAnalysis = apps.get_model('accounts', 'ResumeAnalysis')
+    for model, fields in ((UserProfile, ['parsed_resume_data', 'resume_sections']),
+                          (ResumeAnalysis, ['skill_matches', 'summary', 'detailed_analysis'])):
+        batch = []
+        for obj in model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            for name in fields:
+                setattr(obj, name, getattr(obj, f'{name}_z'))
+            batch.append(obj)
+        model.objects.bulk_update(batch, fields, batch_size=BATCH_SIZE)
+
+
+def restore_summary_lists(apps, schema_editor):
+    ResumeAnalysis = apps.get_model('accounts', 'ResumeAnalysis')
+    batch = []
+    for analysis in ResumeAnalysis.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        summary = analysis.summary or {}
+        analysis.relevant_points = summary.get('relevant_strengths', [])
+        analysis.improvement_needed = summary.get('areas_of_improvement', [])
+        batch.append(analysis)
+    ResumeAnalysis.objects.bulk_update(batch, ['relevant_points', 'improvement_needed'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+    """
+    Drop the legacy relevant_points/improvement_needed copies of the summary
+    lists and copy the large JSON blobs into compressed *_z columns.
+    0011 replaces the original columns with them.
+    """
+
+    dependencies = [
+        ('accounts', '0009_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_summary_lists),
+        migrations.RemoveField(model_name='resumeanalysis', name='relevant_points'),
+        migrations.RemoveField(model_name='resumeanalysis', name='improvement_needed'),
+        migrations.AddField(
+            model_name='userprofile',
+            name='parsed_resume_data_z',
+            field=accounts.fields.DedupedJSONField(blank=True, column_keys=RESUME_COLUMN_KEYS, default=dict),
+        ),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name=f'{name}_z',
+                field=accounts.fields.CompressedJSONField(blank=True, default=default),
+            )
+            for model_name, name, default in COMPRESSED_FIELDS
+        ],
+        migrations.RunPython(compress_json, decompress_json),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# Separate from 0010 so the data copy and the column changes run in different transactions
+FIELDS = [
+    ('userprofile', 'parsed_resume_data'),
+    ('userprofile', 'resume_sections'),
+    ('resumeanalysis', 'skill_matches'),
+    ('resumeanalysis', 'summary'),
+    ('resumeanalysis', 'detailed_analysis'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_compressed_json_fields'),
+    ]
+
+    operations = [
+        operation
+        for model_name, name in FIELDS
+        for operation in (
+            migrations.RemoveField(model_name=model_name, name=name),
+            migrations.RenameField(model_name=model_name, old_name=f'{name}_z', new_name=name),
+        )
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_replace_json_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('task', models.CharField(max_length=32)),
+                ('model', models.CharField(max_length=64)),
+                ('input_tokens', models.PositiveIntegerField(default=0)),
+                ('cached_tokens', models.PositiveIntegerField(default=0)),
+                ('output_tokens', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.PositiveIntegerField(default=0)),
+                ('cache_hit', models.BooleanField(null=True)),
+                ('outcome', models.CharField(choices=[('ok', 'OK'), ('timeout', 'Timed out'), ('error', 'Error')], default='ok', max_length=8)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='accounts_ll_created_1373fb_idx'), models.Index(fields=['user', 'created_at'], name='accounts_ll_user_id_e7a025_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LLMUsageDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('task', models.CharField(max_length=32)),
+                ('model', models.CharField(max_length=64)),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+                ('cache_hits', models.PositiveIntegerField(default=0)),
+                ('input_tokens', models.BigIntegerField(default=0)),
+                ('cached_tokens', models.BigIntegerField(default=0)),
+                ('output_tokens', models.BigIntegerField(default=0)),
+                ('latency_ms', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='llm_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'LLM usage (daily)',
+                'indexes': [models.Index(fields=['user', 'day'], name='accounts_ll_user_id_ff6b12_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'user', 'task', 'model'), name='llm_usage_daily_unique')],
+            },
+        ),
+    ]
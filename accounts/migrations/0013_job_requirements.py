@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def clear_local_requirements(apps, schema_editor):
+    """Drop the bullet lines 0007 copied into ``requirements``; they were never read and get re-extracted."""
+    JobDescription = apps.get_model('accounts', 'JobDescription')
+    JobDescription.objects.update(requirements=[])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_llm_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='requirements_extracted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(clear_local_requirements, migrations.RunPython.noop),
+    ]
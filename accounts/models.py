@@ -3,6 +3,15 @@ from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 import json
 
+from .fields import CompressedJSONField, DedupedJSONField
+
+
+# parsed_resume_data keys that are also UserProfile columns
+RESUME_COLUMN_KEYS = (
+    'first_name', 'last_name', 'email', 'phone', 'education',
+    'skills', 'certifications', 'hackathons', 'publications', 'interests', 'projects',
+)
+
 
 class UserProfile(models.Model):
     """Extended user profile with resume data"""
@@ -40,7 +49,10 @@ class UserProfile(models.Model):
         blank=True,
         null=True
     )
-    parsed_resume_data = models.JSONField(default=dict, blank=True)
+    # Keys that repeat the columns above are stored once, in the columns (see accounts/fields.py)
+    parsed_resume_data = DedupedJSONField(default=dict, blank=True, column_keys=RESUME_COLUMN_KEYS)
+    # Resume text split into typed sections (see accounts/segmenter.py)
+    resume_sections = CompressedJSONField(default=dict, blank=True)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -62,25 +74,52 @@ class UserProfile(models.Model):
         return total_months / 12
 
 
+class JobDescription(models.Model):
+    """A job posting stored once and shared by every analysis of the same text"""
+    # SHA-256 of the normalized text (see accounts/job_descriptions.py)
+    text_hash = models.CharField(max_length=64, unique=True)
+    text = models.TextField()
+    
+    # Extracted metadata, cached so repeated postings skip the job-info LLM call
+    title = models.CharField(max_length=200, blank=True, null=True)
+    company = models.CharField(max_length=200, blank=True, null=True)
+    info_extracted = models.BooleanField(default=False)
+    # Gemini-extracted [{skill, requirement, category, must_have, weight}] every resume is
+    # scored against (see job_descriptions.compare_with_job); fixed once extracted
+    requirements = models.JSONField(default=list, blank=True)
+    requirements_extracted = models.BooleanField(default=False)
+    sections = models.JSONField(default=dict, blank=True)
+    # MinHash signature for near-duplicate lookup (see accounts/near_duplicates.py)
+    minhash = models.JSONField(default=list, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.title or 'Job description'} ({self.text_hash[:8]})"
+
+
 class ResumeAnalysis(models.Model):
     """Resume analysis results"""
     user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='analyses')
     
-    # Analysis Results (structured data)
-    skill_matches = models.JSONField(default=list, blank=True)
-    summary = models.JSONField(default=dict, blank=True)
-    detailed_analysis = models.JSONField(default=dict, blank=True)
+    # Analysis Results (structured data, stored compressed)
+    skill_matches = CompressedJSONField(default=list, blank=True)
+    summary = CompressedJSONField(default=dict, blank=True)
+    detailed_analysis = CompressedJSONField(default=dict, blank=True)
     match_score = models.FloatField(default=0.0)
     
-    # Legacy fields (for backward compatibility)
-    relevant_points = models.JSONField(default=list, blank=True)
-    improvement_needed = models.JSONField(default=list, blank=True)
-    
-    # Job Description
-    job_description = models.TextField(blank=True, null=True)
+    # Job Description (shared row; title/company copied here for listing)
+    job = models.ForeignKey(JobDescription, on_delete=models.PROTECT, related_name='analyses', blank=True, null=True)
     job_title = models.CharField(max_length=200, blank=True, null=True)
     job_company = models.CharField(max_length=200, blank=True, null=True)
     
+    # Hash of the parsed resume data this analysis was scored against
+    resume_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    
+    # Freshness: skill_matches indexes invalidated by profile edits since the last scoring
+    stale_matches = models.JSONField(default=list, blank=True)
+    rescored_at = models.DateTimeField(blank=True, null=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -98,3 +137,131 @@ class ResumeAnalysis(models.Model):
     def get_skill_matches_count(self):
         """Get total number of skill matches"""
         return len(self.skill_matches)
+    
+    def comparison_result(self):
+        """The stored result in the shape compare_resume_with_jobdesc returns"""
+        return {
+            'skill_matches': self.skill_matches,
+            'summary': self.summary,
+            'detailed_analysis': self.detailed_analysis,
+        }
+    
+    @property
+    def relevant_points(self):
+        """Legacy name for summary['relevant_strengths']"""
+        return self.summary.get('relevant_strengths', [])
+    
+    @property
+    def improvement_needed(self):
+        """Legacy name for summary['areas_of_improvement']"""
+        return self.summary.get('areas_of_improvement', [])
+    
+    @property
+    def job_description(self):
+        """Full job description text"""
+        return self.job.text if self.job_id else None
+    
+    @property
+    def is_stale(self):
+        """Whether profile edits may have changed some of the skill scores"""
+        return bool(self.stale_matches)
+
+
+class AnalyticsRollup(models.Model):
+    """Per-user aggregates over ResumeAnalysis rows, kept current by accounts/rollups.py"""
+    user_profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, related_name='analytics')
+    
+    analysis_count = models.IntegerField(default=0)
+    fit_total = models.FloatField(default=0.0)
+    # {recommendation: count}
+    recommendations = models.JSONField(default=dict, blank=True)
+    # {"YYYY-MM": [count, fit_total]}
+    monthly_fit = models.JSONField(default=dict, blank=True)
+    # {normalized text: [label, count]}
+    missing_skills = models.JSONField(default=dict, blank=True)
+    improvement_areas = models.JSONField(default=dict, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Analytics for {self.user_profile}"
+    
+    @property
+    def average_fit(self):
+        return round(self.fit_total / self.analysis_count, 1) if self.analysis_count else 0
+
+
+class SkillGap(models.Model):
+    """Global count of analyses in which a required skill scored 0"""
+    skill = models.CharField(max_length=200, unique=True)  # normalized key
+    label = models.CharField(max_length=200)
+    missing_count = models.IntegerField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.label} ({self.missing_count})"
+
+
+class LLMCall(models.Model):
+    """One LlamaParse or Gemini call; append-only, written in batches by accounts/llm_ledger.py"""
+    OK = 'ok'
+    TIMEOUT = 'timeout'
+    ERROR = 'error'
+    OUTCOME_CHOICES = [(OK, 'OK'), (TIMEOUT, 'Timed out'), (ERROR, 'Error')]
+    TASK_LENGTH = 32
+    MODEL_LENGTH = 64
+    
+    created_at = models.DateTimeField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    task = models.CharField(max_length=TASK_LENGTH)
+    model = models.CharField(max_length=MODEL_LENGTH)
+    input_tokens = models.PositiveIntegerField(default=0)
+    cached_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(default=0)
+    # Context-cache hit; None when the call did not go through a cache
+    cache_hit = models.BooleanField(null=True)
+    outcome = models.CharField(max_length=8, choices=OUTCOME_CHOICES, default=OK)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} on {self.model} ({self.outcome})"
+
+
+class LLMUsageDaily(models.Model):
+    """LLMCall totals per UTC day, user, task and model, kept current by accounts/llm_ledger.py"""
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='llm_usage')
+    task = models.CharField(max_length=LLMCall.TASK_LENGTH)
+    model = models.CharField(max_length=LLMCall.MODEL_LENGTH)
+    
+    calls = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)  # timed out or failed
+    cache_hits = models.PositiveIntegerField(default=0)
+    input_tokens = models.BigIntegerField(default=0)
+    cached_tokens = models.BigIntegerField(default=0)
+    output_tokens = models.BigIntegerField(default=0)
+    latency_ms = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'LLM usage (daily)'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'user', 'task', 'model'], name='llm_usage_daily_unique'),
+        ]
+        indexes = [models.Index(fields=['user', 'day'])]
+    
+    def __str__(self):
+        return f"{self.day} {self.task} on {self.model}"
+    
+    @property
+    def total_tokens(self):
+        return self.input_tokens + self.output_tokens
+    
+    @property
+    def average_latency_ms(self):
+        return round(self.latency_ms / self.calls) if self.calls else 0
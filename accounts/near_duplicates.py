@@ -0,0 +1,169 @@
+"""
+Near-duplicate detection for job descriptions (MinHash + LSH).
+
+The same posting copied from different job boards differs in whitespace,
+bullet characters, footers and tracking links, so the exact text hash of
+``JobDescription`` misses it.  Each posting gets a MinHash signature over
+word shingles of its cleaned text (stored on ``JobDescription.minhash``);
+an in-process LSH index over the signature bands finds candidate postings
+in well under a millisecond, and the signature agreement estimates their
+Jaccard similarity.
+
+``find_prior_analysis`` uses it to offer a user's earlier analysis of a
+near-identical posting, scored against the same resume version, instead of
+a fresh comparison call.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .models import JobDescription, ResumeAnalysis
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: candidates from ~0.5 similarity up
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are stored, so the permutations must never change
+_rng = np.random.RandomState(1)
+PERM_A = _rng.randint(1, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.randint(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+WORD_RE = re.compile(r"[a-z0-9+#]+")
+# Job-board chrome that differs between copies of the same posting
+BOILERPLATE_RE = re.compile(
+    r"apply now|share this job|posted \d+|save job|report job|easy apply|job id|req(uisition)? id"
+    r"|equal opportunity employer|cookie|privacy policy|terms of use|all rights reserved|©",
+    re.IGNORECASE,
+)
+
+
+def shingles(text):
+    """Word ``SHINGLE_SIZE``-grams of ``text`` without URLs, punctuation and board boilerplate."""
+    lines = [line for line in (text or "").splitlines() if not BOILERPLATE_RE.search(line)]
+    words = WORD_RE.findall(URL_RE.sub(" ", "\n".join(lines)).lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """MinHash signature of ``text`` as a list of ``NUM_PERM`` ints (empty for empty text)."""
+    grams = shingles(text)
+    if not grams:
+        return []
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") for gram in grams),
+        dtype=np.uint64, count=len(grams),
+    )
+    # uint64 wrap-around in a*h is part of the hash family (as in datasketch)
+    permuted = ((np.outer(hashes, PERM_A) + PERM_B) % MERSENNE_PRIME) & MAX_HASH
+    return permuted.min(axis=0).tolist()
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def _band_keys(sig):
+    return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class LSHIndex:
+    """
+    In-process LSH index over the stored signatures.
+
+    Loaded lazily and topped up with rows added since the last lookup (by
+    any worker) with one indexed ``id > last_id`` query.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = defaultdict(set)
+        self.signatures = {}
+        self.last_id = 0
+
+    def add(self, job_id, sig):
+        if not sig or len(sig) != NUM_PERM:
+            return
+        with self.lock:
+            self.signatures[job_id] = sig
+            for key in _band_keys(sig):
+                self.buckets[key].add(job_id)
+            self.last_id = max(self.last_id, job_id)
+
+    def sync(self):
+        rows = JobDescription.objects.filter(id__gt=self.last_id).exclude(minhash=[]).values_list('id', 'minhash')
+        for job_id, sig in rows.order_by('id').iterator(chunk_size=2000):
+            self.add(job_id, sig)
+
+    def query(self, sig, threshold):
+        """``[(job_id, similarity)]`` at or above ``threshold``, most similar first."""
+        with self.lock:
+            candidates = set()
+            for key in _band_keys(sig):
+                candidates |= self.buckets.get(key, set())
+            scored = [(job_id, similarity(sig, self.signatures[job_id])) for job_id in candidates]
+        return sorted(((job_id, score) for job_id, score in scored if score >= threshold), key=lambda item: -item[1])
+
+
+_index = LSHIndex()
+
+
+def resume_version(parsed_resume):
+    """Hash identifying the resume data an analysis was scored against."""
+    return hashlib.sha256(json.dumps(parsed_resume or {}, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def find_similar_jobs(job_text, threshold=None):
+    """Stored postings near-identical to ``job_text`` as ``[(job_id, similarity)]``."""
+    threshold = settings.JD_NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    sig = signature(job_text)
+    if not sig:
+        return []
+    _index.sync()
+    started = time.perf_counter()
+    matches = _index.query(sig, threshold)
+    metrics.observe('near_duplicates.lookup', time.perf_counter() - started)
+    return matches
+
+
+def find_prior_analysis(user_profile, job_text, parsed_resume, threshold=None):
+    """
+    The user's most recent up-to-date analysis of a near-identical posting
+    scored against the same resume version, as ``(analysis, similarity)``,
+    or ``(None, 0.0)``.  Disabled when ``JD_NEAR_DUPLICATE_THRESHOLD`` is 0.
+    """
+    threshold = settings.JD_NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    if threshold <= 0:
+        return None, 0.0
+    matches = dict(find_similar_jobs(job_text, threshold))
+    if not matches:
+        return None, 0.0
+    analyses = (
+        ResumeAnalysis.objects
+        .filter(user_profile=user_profile, job_id__in=list(matches), resume_hash=resume_version(parsed_resume), stale_matches=[])
+        .order_by('-created_at')
+    )
+    best = max(analyses, key=lambda analysis: matches[analysis.job_id], default=None)
+    if best is None:
+        return None, 0.0
+    metrics.incr('near_duplicates.analyses_reused')
+    logger.debug(f"Reusing analysis {best.id} (job {best.job_id}, similarity {matches[best.job_id]:.2f})")
+    return best, matches[best.job_id]
@@ -0,0 +1,663 @@
+"""
+Versioned prompt registry.
+
+Every prompt is split into a static ``prefix`` (instructions, rubric and
+output schema) and a ``suffix`` template holding the per-call data.  The
+prefix is byte-identical across calls, so Gemini's implicit prefix
+caching can reuse it; the variable data always comes last.
+
+Bump the version whenever a prompt changes; ``settings.PROMPT_VERSIONS``
+can pin a task to an older version.
+"""
+from django.conf import settings
+
+
+class RenderedPrompt(str):
+    """A prompt string that remembers its cacheable prefix and variable suffix."""
+
+    def __new__(cls, template, suffix):
+        obj = super().__new__(cls, template.prefix + suffix)
+        obj.template = template
+        obj.prefix = template.prefix
+        obj.suffix = suffix
+        return obj
+
+
+class PromptTemplate:
+    def __init__(self, name, version, prefix, suffix):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def render(self, **values):
+        return RenderedPrompt(self, self.suffix.format(**values))
+
+
+REGISTRY = {}
+
+
+def register(template):
+    REGISTRY.setdefault(template.name, {})[template.version] = template
+    return template
+
+
+def get_prompt(name, version=None):
+    """Template ``name`` at ``version``, the pinned version, or the latest one."""
+    versions = REGISTRY[name]
+    version = version or getattr(settings, 'PROMPT_VERSIONS', {}).get(name) or max(versions)
+    return versions[int(version)]
+
+
+def render(name, **values):
+    return get_prompt(name).render(**values)
+
+
+# Contact fields are kept separate so that later versions can leave them to
+# the local extractor (``accounts.local_extractor``).
+RESUME_CONTACT_FIELDS = """"first_name": string|null,
+"last_name": string|null,
+"email": string|null,
+"phone": string|null,
+"""
+
+RESUME_BODY_FIELDS = """"education": [
+    {
+        "institute": string|null,
+        "degree": string|null,
+        "cgpa": float|null,
+        "start_year": string|null,
+        "end_year": string|null
+    }
+],
+"experience": [
+    {
+        "type": "work"|"research",
+        "designation": string|null,
+        "start": string|null,
+        "end": string|null|"CURRENT"
+    }
+],
+"skills": [string],
+"certifications": [
+    {
+        "name": string|null,
+        "issuer": string|null
+    }
+],
+"hackathons": [string],
+"publications": [
+    {
+        "name": string|null,
+        "publisher": string|null
+    }
+],
+"interests": [string],
+"projects": [
+    {
+        "name": string|null,
+        "description": string|null
+    }
+]
+"""
+
+RESUME_SCHEMA = "{\n" + RESUME_CONTACT_FIELDS + RESUME_BODY_FIELDS + "}\n"
+
+# Contact details, names and date formats are handled locally from v3 on.
+RESUME_BODY_SCHEMA = "{\n" + RESUME_BODY_FIELDS + "}\n"
+
+RESUME_RULES = """Classify experiences as follows:
+- "work" = full-time, part-time, internships
+- "research" = research projects, lab work, thesis
+STRICTLY FOLLOW:
+- If research is after graduation and designation contain keywords like "Research" or "Research Assistant", include as BOTH work + research.
+- If research is during graduation, include ONLY as research.
+
+Dates:
+- Use MM-YYYY if available, else YYYY.
+- Use "CURRENT" if ongoing.
+"""
+
+RESUME_RULES_V3 = """Classify experiences as follows:
+- "work" = full-time, part-time, internships
+- "research" = research projects, lab work, thesis
+STRICTLY FOLLOW:
+- If research is after graduation and designation contain keywords like "Research" or "Research Assistant", include as BOTH work + research.
+- If research is during graduation, include ONLY as research.
+
+Copy dates exactly as written in the resume.
+"""
+
+
+# Version 1 of each prompt is the original inline f-string from resume_parser.py,
+# kept so it can still be pinned.  The variable text sits in the middle of the
+# instructions, so only the part before it is a cacheable prefix.
+
+register(PromptTemplate('resume_extraction', 1, prefix="""
+You are an expert resume parser. Extract EXACT values only in JSON:
+
+{
+"first_name": string|null,
+"last_name": string|null,
+"email": string|null,
+"phone": string|null,
+"education": [
+    {
+        "institute": string|null,
+        "degree": string|null,
+        "cgpa": float|null,
+        "start_year": string|null,
+        "end_year": string|null
+    }
+],
+"experience": [
+    {
+        "type": "work"|"research",
+        "designation": string|null,
+        "start": string|null,
+        "end": string|null|"CURRENT"
+    }
+],
+"skills": [string],
+"certifications": [
+    {
+        "name": string|null,
+        "issuer": string|null
+    }
+],
+"hackathons": [string],
+"publications": [
+    {
+        "name": string|null,
+        "publisher": string|null
+    }
+],
+"interests": [string],
+"projects": [
+    {
+        "name": string|null,
+        "description": string|null
+    }
+]
+}
+
+Text:
+""", suffix="""```{resume_text}```
+
+
+Classify experiences as follows:
+- "work" = full-time, part-time, internships
+- "research" = research projects, lab work, thesis
+STRICTLY FOLLOW:
+- If research is after graduation and designation  contain keywords like "Research" or "Research Assistant", include as BOTH work + research.
+- If research is during graduation, include ONLY as research.
+
+Dates:
+- Use MM-YYYY if available, else YYYY.
+- Use "CURRENT" if ongoing.
+Output STRICT valid JSON only.
+"""))
+
+register(PromptTemplate('job_info', 1, prefix="""
+Extract the job title and company name from this job description. Return ONLY a JSON object with these fields:
+
+{
+    "title": "exact job title",
+    "company": "company name"
+}
+
+Job Description:
+""", suffix="""```{job_desc_text}```
+
+Instructions:
+1. Extract the most specific job title mentioned (e.g., "Senior Software Engineer", "Data Scientist")
+2. Extract the company/organization name
+3. If not found, use "Unknown" for missing fields
+4. Return ONLY valid JSON, no other text
+"""))
+
+register(PromptTemplate('comparison', 1, prefix="""
+You are an expert recruiter and technical evaluator.
+Evaluate the candidate's resume against the job description using a strict rubric system.
+
+Resume JSON:
+""", suffix="""{resume_json}
+
+Job Description:
+{job_desc_text}
+
+Return ONLY a JSON object with this exact structure:
+{{
+    "skill_matches": [
+        {{
+            "skill": "skill name",
+            "requirement": "what the job requires",
+            "resume_evidence": "evidence from resume",
+            "score": 0-2,
+            "category": "technical|soft|experience|education"
+        }}
+    ],
+    "summary": {{
+        "total_score": 0,
+        "max_possible_score": 0,
+        "overall_fit_percentage": 0,
+        "relevant_strengths": ["strength1", "strength2"],
+        "areas_of_improvement": ["area1", "area2"],
+        "suggested_learning_path": ["suggestion1", "suggestion2"]
+    }},
+    "detailed_analysis": {{
+        "technical_skills_score": 0,
+        "soft_skills_score": 0,
+        "experience_score": 0,
+        "education_score": 0,
+        "overall_recommendation": "Strong Match|Good Match|Moderate Match|Weak Match"
+    }}
+}}
+
+Scoring Rubric:
+- 0 = Not Mentioned
+- 1 = Mentioned but weak evidence (just listed, no projects/impact)
+- 2 = Strong evidence (projects, experience, measurable outcomes)
+
+Return ONLY valid JSON, no other text.
+"""))
+
+register(PromptTemplate('resume_extraction', 2, prefix=(
+    "You are an expert resume parser. Extract EXACT values only, as JSON with this structure:\n\n"
+    + RESUME_SCHEMA + "\n" + RESUME_RULES
+    + "Output STRICT valid JSON only.\n\nResume text:\n"
+), suffix="""```{resume_text}```
+"""))
+
+register(PromptTemplate('resume_extraction', 3, prefix=(
+    "You are an expert resume parser. Extract EXACT values only, as JSON with this structure:\n\n"
+    + RESUME_BODY_SCHEMA + "\n" + RESUME_RULES_V3
+    + "Output STRICT valid JSON only.\n\nResume text:\n"
+), suffix="""```{resume_text}```
+"""))
+
+
+register(PromptTemplate('job_info', 2, prefix="""Extract the job title and company name from the job description below. Return ONLY a JSON object with these fields:
+
+{
+    "title": "exact job title",
+    "company": "company name"
+}
+
+Instructions:
+1. Extract the most specific job title mentioned (e.g., "Senior Software Engineer", "Data Scientist")
+2. Extract the company/organization name
+3. If not found, use "Unknown" for missing fields
+4. Return ONLY valid JSON, no other text
+
+Job Description:
+""", suffix="""```{job_desc_text}```
+"""))
+
+
+register(PromptTemplate('comparison', 2, prefix="""You are an expert recruiter and technical evaluator.
+Evaluate the candidate's resume against the job description using a strict rubric system.
+
+Return ONLY a JSON object with this exact structure:
+{
+    "skill_matches": [
+        {
+            "skill": "skill name",
+            "requirement": "what the job requires",
+            "resume_evidence": "evidence from resume",
+            "score": 0-2,
+            "category": "technical|soft|experience|education"
+        }
+    ],
+    "summary": {
+        "total_score": 0,
+        "max_possible_score": 0,
+        "overall_fit_percentage": 0,
+        "relevant_strengths": ["strength1", "strength2"],
+        "areas_of_improvement": ["area1", "area2"],
+        "suggested_learning_path": ["suggestion1", "suggestion2"]
+    },
+    "detailed_analysis": {
+        "technical_skills_score": 0,
+        "soft_skills_score": 0,
+        "experience_score": 0,
+        "education_score": 0,
+        "overall_recommendation": "Strong Match|Good Match|Moderate Match|Weak Match"
+    }
+}
+
+Scoring Rubric:
+- 0 = Not Mentioned
+- 1 = Mentioned but weak evidence (just listed, no projects/impact)
+- 2 = Strong evidence (projects, experience, measurable outcomes)
+
+Return ONLY valid JSON, no other text.
+
+""", suffix="""Resume JSON:
+{resume_json}
+
+Job Description:
+{job_desc_text}
+"""))
+
+
+register(PromptTemplate('comparison_multi', 1, prefix="""You are an expert recruiter and technical evaluator.
+Evaluate ONE candidate resume against SEVERAL job descriptions using a strict rubric system.
+Each job description is delimited by <job id="..."> and </job>. Evaluate every job independently.
+
+Return ONLY a JSON object with this exact structure, with one entry in "results" per job, in the same order:
+{
+    "results": [
+        {
+            "job_id": "the id attribute of the job",
+            "skill_matches": [
+                {
+                    "skill": "skill name",
+                    "requirement": "what the job requires",
+                    "resume_evidence": "evidence from resume",
+                    "score": 0-2,
+                    "category": "technical|soft|experience|education"
+                }
+            ],
+            "summary": {
+                "total_score": 0,
+                "max_possible_score": 0,
+                "overall_fit_percentage": 0,
+                "relevant_strengths": ["strength1", "strength2"],
+                "areas_of_improvement": ["area1", "area2"],
+                "suggested_learning_path": ["suggestion1", "suggestion2"]
+            },
+            "detailed_analysis": {
+                "technical_skills_score": 0,
+                "soft_skills_score": 0,
+                "experience_score": 0,
+                "education_score": 0,
+                "overall_recommendation": "Strong Match|Good Match|Moderate Match|Weak Match"
+            }
+        }
+    ]
+}
+
+Scoring Rubric:
+- 0 = Not Mentioned
+- 1 = Mentioned but weak evidence (just listed, no projects/impact)
+- 2 = Strong evidence (projects, experience, measurable outcomes)
+
+Return ONLY valid JSON, no other text.
+
+""", suffix="""Resume JSON:
+{resume_json}
+
+Job Descriptions:
+{jobs}
+"""))
+
+
+# From v3 (comparison) / v2 (comparison_multi) on, totals, category scores and the
+# recommendation are computed locally from skill_matches (see accounts/scoring.py).
+
+COMPARISON_RUBRIC = """Scoring Rubric:
+- 0 = Not Mentioned
+- 1 = Mentioned but weak evidence (just listed, no projects/impact)
+- 2 = Strong evidence (projects, experience, measurable outcomes)
+
+Return ONLY valid JSON, no other text.
+
+"""
+
+register(PromptTemplate('comparison', 3, prefix="""You are an expert recruiter and technical evaluator.
+Evaluate the candidate's resume against the job description using a strict rubric system.
+List every requirement of the job description as one skill match.
+
+Return ONLY a JSON object with this exact structure:
+{
+    "skill_matches": [
+        {
+            "skill": "skill name",
+            "requirement": "what the job requires",
+            "resume_evidence": "evidence from resume",
+            "score": 0-2,
+            "category": "technical|soft|experience|education"
+        }
+    ],
+    "summary": {
+        "relevant_strengths": ["strength1", "strength2"],
+        "areas_of_improvement": ["area1", "area2"],
+        "suggested_learning_path": ["suggestion1", "suggestion2"]
+    }
+}
+
+""" + COMPARISON_RUBRIC, suffix="""Resume JSON:
+{resume_json}
+
+Job Description:
+{job_desc_text}
+"""))
+
+register(PromptTemplate('comparison_multi', 2, prefix="""You are an expert recruiter and technical evaluator.
+Evaluate ONE candidate resume against SEVERAL job descriptions using a strict rubric system.
+Each job description is delimited by <job id="..."> and </job>. Evaluate every job independently,
+listing every requirement of each job as one skill match.
+
+Return ONLY a JSON object with this exact structure, with one entry in "results" per job, in the same order:
+{
+    "results": [
+        {
+            "job_id": "the id attribute of the job",
+            "skill_matches": [
+                {
+                    "skill": "skill name",
+                    "requirement": "what the job requires",
+                    "resume_evidence": "evidence from resume",
+                    "score": 0-2,
+                    "category": "technical|soft|experience|education"
+                }
+            ],
+            "summary": {
+                "relevant_strengths": ["strength1", "strength2"],
+                "areas_of_improvement": ["area1", "area2"],
+                "suggested_learning_path": ["suggestion1", "suggestion2"]
+            }
+        }
+    ]
+}
+
+""" + COMPARISON_RUBRIC, suffix="""Resume JSON:
+{resume_json}
+
+Job Descriptions:
+{jobs}
+"""))
+
+# Two-phase comparison: the requirement list of a job description is extracted once
+# (job_requirements) and stored; each resume is then scored against only that list
+# (requirement_scoring), so the job description prose is not re-read per candidate.
+
+register(PromptTemplate('job_requirements', 1, prefix="""You are an expert recruiter and technical evaluator.
+List the requirements a candidate is evaluated on for the job description below.
+
+Return ONLY a JSON object with this exact structure:
+{
+    "requirements": [
+        {
+            "skill": "short skill name",
+            "requirement": "what the job requires, in one sentence",
+            "category": "technical|soft|experience|education",
+            "must_have": true,
+            "weight": 1-3
+        }
+    ]
+}
+
+Rules:
+- One entry per distinct requirement; merge duplicates. At most 25 entries.
+- "must_have" is false for preferred, bonus or nice-to-have requirements.
+- "weight": 3 = central to the role, 2 = important, 1 = minor.
+
+Return ONLY valid JSON, no other text.
+
+""", suffix="""Job Description:
+{job_desc_text}
+"""))
+
+register(PromptTemplate('requirement_scoring', 1, prefix="""You are an expert recruiter and technical evaluator.
+Score the candidate's resume against each listed job requirement using a strict rubric system.
+The requirements are fixed: score every one of them, and do not add, drop or reword any.
+
+Return ONLY a JSON object with this exact structure, with one entry per requirement:
+{
+    "skill_matches": [
+        {
+            "index": 0,
+            "resume_evidence": "evidence from resume",
+            "score": 0-2
+        }
+    ],
+    "summary": {
+        "relevant_strengths": ["strength1", "strength2"],
+        "areas_of_improvement": ["area1", "area2"],
+        "suggested_learning_path": ["suggestion1", "suggestion2"]
+    }
+}
+
+""" + COMPARISON_RUBRIC, suffix="""Resume JSON:
+{resume_json}
+
+Requirements:
+{requirements}
+"""))
+
+register(PromptTemplate('resume_extraction_batch', 1, prefix=(
+    "You are an expert resume parser. You will receive SEVERAL resumes, each delimited by "
+    "<resume id=\"...\"> and </resume>. Extract EXACT values only from each resume independently, "
+    "as JSON with this structure per resume:\n\n"
+    + RESUME_SCHEMA + "\n" + RESUME_RULES
+    + "Return ONLY a JSON object of the form "
+    + "{\"results\": [{\"doc_id\": \"the id attribute of the resume\", \"data\": {...}}]} "
+    + "with one entry per resume. Output STRICT valid JSON only.\n\nResumes:\n"
+), suffix="""{resumes}
+"""))
+
+register(PromptTemplate('resume_extraction_batch', 2, prefix=(
+    "You are an expert resume parser. You will receive SEVERAL resumes, each delimited by "
+    "<resume id=\"...\"> and </resume>. Extract EXACT values only from each resume independently, "
+    "as JSON with this structure per resume:\n\n"
+    + RESUME_BODY_SCHEMA + "\n" + RESUME_RULES_V3
+    + "Return ONLY a JSON object of the form "
+    + "{\"results\": [{\"doc_id\": \"the id attribute of the resume\", \"data\": {...}}]} "
+    + "with one entry per resume. Output STRICT valid JSON only.\n\nResumes:\n"
+), suffix="""{resumes}
+"""))
+
+
+register(PromptTemplate('rescore', 1, prefix="""You are an expert recruiter and technical evaluator.
+The candidate's resume was edited. Re-score ONLY the listed job requirements against the updated resume.
+
+Return ONLY a JSON object with this exact structure, with one entry per listed requirement:
+{
+    "skill_matches": [
+        {
+            "index": 0,
+            "resume_evidence": "evidence from resume",
+            "score": 0-2
+        }
+    ]
+}
+
+Scoring Rubric:
+- 0 = Not Mentioned
+- 1 = Mentioned but weak evidence (just listed, no projects/impact)
+- 2 = Strong evidence (projects, experience, measurable outcomes)
+
+Return ONLY valid JSON, no other text.
+
+""", suffix="""Resume JSON:
+{resume_json}
+
+Requirements to re-score:
+{matches}
+"""))
+
+# Per-section extraction prompts (see ``accounts.segmenter``): one small
+# template per section type, each asking only for that section's fields.
+
+SECTION_SCHEMAS = {
+    "education": """{
+"education": [
+    {
+        "institute": string|null,
+        "degree": string|null,
+        "cgpa": float|null,
+        "start_year": string|null,
+        "end_year": string|null
+    }
+]
+}
+""",
+    "experience": """{
+"experience": [
+    {
+        "type": "work"|"research",
+        "designation": string|null,
+        "start": string|null,
+        "end": string|null
+    }
+]
+}
+""",
+    "skills": """{
+"skills": [string]
+}
+""",
+    "projects": """{
+"projects": [
+    {
+        "name": string|null,
+        "description": string|null
+    }
+]
+}
+""",
+    "publications": """{
+"publications": [
+    {
+        "name": string|null,
+        "publisher": string|null
+    }
+]
+}
+""",
+    "certifications": """{
+"certifications": [
+    {
+        "name": string|null,
+        "issuer": string|null
+    }
+]
+}
+""",
+    "other": """{
+"hackathons": [string],
+"interests": [string]
+}
+""",
+}
+
+for _section_type, _schema in SECTION_SCHEMAS.items():
+    register(PromptTemplate(f'resume_section_{_section_type}', 1, prefix=(
+        f"You are an expert resume parser. Below is the {_section_type} section of a resume. "
+        "Extract EXACT values only, as JSON with this structure:\n\n"
+        + _schema + "\n"
+        + (RESUME_RULES_V3 if _section_type == "experience" else "Copy dates exactly as written in the resume.\n")
+        + "Use empty lists when nothing applies. Output STRICT valid JSON only.\n\n"
+    ), suffix=(
+        # Experience classification depends on graduation dates, so the
+        # education section is passed along as context.
+        """Education section (context only):
+```{context}```
+
+Section text:
+```{section_text}```
+""" if _section_type == "experience" else """Section text:
+```{section_text}```
+""")))
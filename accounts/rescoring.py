@@ -0,0 +1,98 @@
+"""
+Change detection between two versions of a parsed resume.
+
+When a profile is edited, ``diff_resume`` finds what was added/removed per
+field and ``affected_matches`` picks the ``skill_matches`` entries of a saved
+analysis that the change can move.  Only those entries are re-scored (see
+``resume_parser.rescore_skill_matches``); the summary is then recomputed
+locally with ``accounts.scoring``.
+"""
+import json
+import re
+
+# Resume fields that feed the comparison, and the match categories they can affect
+FIELD_CATEGORIES = {
+    "skills": {"technical", "soft"},
+    "projects": {"technical", "soft", "experience"},
+    "certifications": {"technical", "education"},
+    "publications": {"technical", "experience"},
+    "hackathons": {"technical", "soft"},
+    "interests": {"soft"},
+    "education": {"education"},
+    "experience": {"experience"},
+    "work_experience": {"experience"},
+    "research_experience": {"experience"},
+}
+
+# Categories where any change in the field marks every match of that category
+WHOLE_CATEGORY_FIELDS = {"education", "experience", "work_experience", "research_experience"}
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = {"and", "or", "of", "the", "in", "with", "for", "to", "a", "an", "on", "skills", "experience"}
+
+
+def _items(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _key(item):
+    return json.dumps(item, sort_keys=True, ensure_ascii=False).lower()
+
+
+def diff_resume(old, new):
+    """``{field: {"added": [...], "removed": [...]}}`` for the scoring-relevant fields that changed."""
+    old, new = old or {}, new or {}
+    diff = {}
+    for field in FIELD_CATEGORIES:
+        old_items = {_key(item): item for item in _items(old.get(field))}
+        new_items = {_key(item): item for item in _items(new.get(field))}
+        added = [item for key, item in new_items.items() if key not in old_items]
+        removed = [item for key, item in old_items.items() if key not in new_items]
+        if added or removed:
+            diff[field] = {"added": added, "removed": removed}
+    return diff
+
+
+def _tokens(text):
+    return {token.strip('.') for token in TOKEN_RE.findall(text.lower())} - STOPWORDS
+
+
+def _text(item):
+    if isinstance(item, dict):
+        return " ".join(str(value) for value in item.values() if value)
+    return str(item)
+
+
+def affected_matches(skill_matches, diff):
+    """Indexes of the ``skill_matches`` entries that ``diff`` can change."""
+    if not diff:
+        return []
+    categories = set()
+    whole_categories = set()
+    changed_tokens = set()
+    removed_texts = []
+    for field, change in diff.items():
+        categories |= FIELD_CATEGORIES[field]
+        if field in WHOLE_CATEGORY_FIELDS:
+            whole_categories |= FIELD_CATEGORIES[field]
+        for item in change["added"] + change["removed"]:
+            changed_tokens |= _tokens(_text(item))
+        removed_texts.extend(_text(item).lower() for item in change["removed"])
+
+    affected = []
+    for index, match in enumerate(skill_matches):
+        if not isinstance(match, dict):
+            continue
+        category = str(match.get("category") or "technical").lower()
+        if category in whole_categories:
+            affected.append(index)
+            continue
+        if category not in categories:
+            continue
+        skill_tokens = _tokens(str(match.get("skill") or ""))
+        evidence = str(match.get("resume_evidence") or "").lower()
+        if (skill_tokens and skill_tokens <= changed_tokens) or any(len(text) >= 3 and text in evidence for text in removed_texts):
+            affected.append(index)
+    return affected
@@ -1,13 +1,17 @@
+import asyncio
 import json
 import os
 import logging
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from llama_parse import LlamaParse
 # Gemini LLM (v2.5)
 from llama_index.llms.gemini import Gemini
 from llama_index.core import Settings
 from dotenv import load_dotenv
+from . import llm_ledger, llm_routing, local_extractor, metrics, prompts, schemas, scoring, segmenter
 load_dotenv()
 
 # BULLETPROOF LOGGING for AI operations
@@ -17,160 +21,298 @@ ai_logger.setLevel(logging.INFO)
 LLAMA_API_KEY=os.getenv("LLAMA_API_KEY")
 GEMINI_API_KEY=os.getenv("GEMINI_API_KEY")
 
+GEMINI_MODEL = "models/gemini-2.5-flash"
 
-# LlamaParse setup
-parser = LlamaParse(api_key=LLAMA_API_KEY, result_type="markdown")
+# Calls per structured request: a reply that fails its schema is asked for once more
+SCHEMA_ATTEMPTS = 2
+
+
+LLAMAPARSE_RESULT_TYPE = "markdown"
+
+# LlamaParse setup; check_interval is how often a pending parse job is polled
+parser = LlamaParse(
+    api_key=LLAMA_API_KEY,
+    result_type=LLAMAPARSE_RESULT_TYPE,
+    check_interval=float(os.getenv("LLAMAPARSE_CHECK_INTERVAL", "1")),
+)
 
 # LLM setup
-Settings.llm = Gemini(api_key=GEMINI_API_KEY, model_name="models/gemini-2.5-flash")
+Settings.llm = Gemini(api_key=GEMINI_API_KEY, model_name=GEMINI_MODEL)
+
+
+def build_extraction_prompt(resume_text):
+    """Prompt asking Gemini for the structured resume fields."""
+    return prompts.render('resume_extraction', resume_text=resume_text)
+
+
+def build_job_info_prompt(job_desc_text):
+    """Prompt asking Gemini for the job title and company."""
+    return prompts.render('job_info', job_desc_text=job_desc_text)
+
+
+def build_comparison_prompt(resume_json, job_desc_text):
+    """Prompt asking Gemini to score the resume against the job description."""
+    return prompts.render(
+        'comparison',
+        resume_json=json.dumps(resume_json, ensure_ascii=False),
+        job_desc_text=job_desc_text,
+    )
+
+
+def build_batch_extraction_prompt(documents):
+    """Prompt extracting several resumes at once; ``documents`` maps doc id -> text."""
+    resumes = "\n".join(f'<resume id="{doc_id}">\n{text}\n</resume>' for doc_id, text in documents.items())
+    return prompts.render('resume_extraction_batch', resumes=resumes)
+
+
+def plan_extraction_batches(documents):
+    """
+    Group doc ids into batches for extract_resume_fields_batch().
+
+    Batches are filled in order until the estimated input (shared prompt
+    prefix plus resume texts) would exceed EXTRACTION_BATCH_TOKEN_BUDGET, or
+    the expected output would exceed the batch route's output-token cap.
+    A resume too large to share a batch gets a batch of its own.
+    """
+    from django.conf import settings
+    token_budget = getattr(settings, 'EXTRACTION_BATCH_TOKEN_BUDGET', 24000)
+    output_per_doc = getattr(settings, 'EXTRACTION_BATCH_OUTPUT_TOKENS_PER_DOC', 1200)
+    max_docs = max(1, llm_routing.get_route(llm_routing.RESUME_EXTRACTION_BATCH)['max_output_tokens'] // output_per_doc)
+    prefix_tokens = len(prompts.get_prompt('resume_extraction_batch').prefix) // 4
+
+    batches, current, used = [], [], prefix_tokens
+    for doc_id, text in documents.items():
+        tokens = len(text) // 4 + 10  # + the <resume> delimiters
+        if current and (used + tokens > token_budget or len(current) >= max_docs):
+            batches.append(current)
+            current, used = [], prefix_tokens
+        current.append(doc_id)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+RESUME_LIST_FIELDS = ("education", "experience", "skills", "certifications", "hackathons", "publications", "interests", "projects")
+RESUME_FIELDS = ("first_name", "last_name", "email", "phone") + RESUME_LIST_FIELDS
+
+
+def validate_resume_fields(data):
+    """Basic shape check of one extraction result; raises ValueError when unusable."""
+    if not isinstance(data, dict):
+        raise ValueError("Extraction result is not a JSON object")
+    if not any(key in data for key in RESUME_FIELDS):
+        raise ValueError("Extraction result has none of the expected fields")
+    for key in RESUME_LIST_FIELDS:
+        if data.get(key) is not None and not isinstance(data[key], list):
+            raise ValueError(f"Extraction field '{key}' is not a list")
+    return data
+
+
+def split_batch_extraction(result, doc_ids):
+    """Map a batched extraction response to {doc_id: data}; invalid entries are left out."""
+    wanted = {str(doc_id): doc_id for doc_id in doc_ids}
+    extracted = {}
+    for entry in result.get("results", []):
+        if not isinstance(entry, dict) or str(entry.get("doc_id")) not in wanted:
+            continue
+        try:
+            extracted[wanted[str(entry["doc_id"])]] = validate_resume_fields(entry.get("data"))
+        except ValueError as e:
+            ai_logger.warning(f"⚠️ Batched extraction entry {entry.get('doc_id')} invalid: {e}")
+    return extracted
+
+
+def build_multi_comparison_prompt(resume_json, job_desc_texts):
+    """Prompt scoring one resume against several job descriptions (ids are list positions)."""
+    jobs = "\n".join(f'<job id="{index}">\n{text}\n</job>' for index, text in enumerate(job_desc_texts))
+    return prompts.render(
+        'comparison_multi',
+        resume_json=json.dumps(resume_json, ensure_ascii=False),
+        jobs=jobs,
+    )
+
+
+def fits_multi_comparison_budget(resume_json, job_desc_texts):
+    """Whether one combined multi-JD request stays within the configured size budget."""
+    from django.conf import settings
+    if len(job_desc_texts) > getattr(settings, 'MULTI_JD_MAX_JOBS', 10):
+        return False
+    combined = len(json.dumps(resume_json, ensure_ascii=False)) + sum(len(text) for text in job_desc_texts)
+    # ~4 characters per token
+    return combined // 4 <= getattr(settings, 'MULTI_JD_TOKEN_BUDGET', 30000)
+
+
+def split_multi_comparison(result, count):
+    """Map a multi-JD response back to per-job results; missing/invalid entries are None."""
+    results = [None] * count
+    for entry in result.get("results", []):
+        try:
+            index = int(entry.get("job_id"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < count and isinstance(entry.get("skill_matches"), list):
+            results[index] = scoring.finalize_comparison(entry)
+    return results
+
+
+def parse_json_response(raw_text, label="response"):
+    """Strip code fences/preamble from an LLM reply and decode the JSON object."""
+    text = raw_text.strip()
+    # clean triple backticks if present
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:].strip()
+    first, last = text.find("{"), text.rfind("}")
+    if first == -1 or last == -1:
+        raise ValueError(f"No JSON object found in {label}")
+    return json.loads(text[first:last+1])
+
+
+def parse_structured_response(task, prompt, response, label="response"):
+    """Decode a JSON reply and check it against the prompt's response schema."""
+    return schemas.validate(task, prompt, parse_json_response(response.text, label))
+
+
+def complete_structured(task, prompt, label="response"):
+    """
+    Run ``prompt`` for ``task`` and return the decoded, schema-checked reply.
+
+    A reply that isn't JSON or doesn't match the schema is asked for again,
+    up to ``SCHEMA_ATTEMPTS`` calls within one deadline (counted as
+    ``llm.<task>.schema_retries``); the last ValueError is raised.
+    """
+    with llm_routing.shared_deadline():
+        for attempt in range(1, SCHEMA_ATTEMPTS + 1):
+            response = llm_routing.complete(task, prompt)
+            try:
+                return parse_structured_response(task, prompt, response, label)
+            except ValueError as e:
+                if attempt == SCHEMA_ATTEMPTS:
+                    raise
+                metrics.incr(f'llm.{task}.schema_retries')
+                ai_logger.warning(f"⚠️ Invalid {label} ({e}), asking again")
+
+
+async def acomplete_structured(task, prompt, label="response"):
+    """Async version of :func:`complete_structured`."""
+    with llm_routing.shared_deadline():
+        for attempt in range(1, SCHEMA_ATTEMPTS + 1):
+            response = await llm_routing.acomplete(task, prompt)
+            try:
+                return parse_structured_response(task, prompt, response, label)
+            except ValueError as e:
+                if attempt == SCHEMA_ATTEMPTS:
+                    raise
+                metrics.incr(f'llm.{task}.schema_retries')
+                ai_logger.warning(f"⚠️ Invalid {label} ({e}), asking again")
+
+
+def default_job_info():
+    """Fallback job info used when extraction fails."""
+    return {"title": "Job Analysis", "company": "Unknown Company"}
+
+
+def _check_resume_text(resume_text):
+    if not GEMINI_API_KEY:
+        ai_logger.error("❌ GEMINI_API_KEY not found!")
+        raise ValueError("Gemini API key not configured")
+
+    if not resume_text or len(resume_text.strip()) < 10:
+        ai_logger.error("❌ Resume text too short or empty!")
+        raise ValueError("Resume text is too short or empty")
+
+
+def _check_resume_file(resume_file):
+    if not LLAMA_API_KEY:
+        ai_logger.error("❌ LLAMA_API_KEY not found!")
+        raise ValueError("LlamaParse API key not configured")
+
+    if not os.path.exists(resume_file):
+        ai_logger.error(f"❌ File not found: {resume_file}")
+        raise FileNotFoundError(f"Resume file not found: {resume_file}")
+
+
+def record_llamaparse(started, outcome=llm_ledger.OK, text=''):
+    """Add a LlamaParse job to the call ledger; its output is charged as estimated tokens."""
+    llm_ledger.record(
+        llm_ledger.LLAMAPARSE, f"llamaparse-{LLAMAPARSE_RESULT_TYPE}", time.monotonic() - started, outcome,
+        output_tokens=llm_routing.estimate_tokens(text) if text else 0,
+    )
+
 
 def parse_resume_with_llama(resume_file):
     """Return the full text extracted from resume using LlamaParse."""
     ai_logger.info(f" LLAMAPARSE STARTED - File: {resume_file}")
-    
+
     try:
-        if not LLAMA_API_KEY:
-            ai_logger.error("❌ LLAMA_API_KEY not found!")
-            raise ValueError("LlamaParse API key not configured")
-        
-        if not os.path.exists(resume_file):
-            ai_logger.error(f"❌ File not found: {resume_file}")
-            raise FileNotFoundError(f"Resume file not found: {resume_file}")
-        
+        _check_resume_file(resume_file)
+
         ai_logger.info(f" Processing file: {resume_file} (Size: {os.path.getsize(resume_file)} bytes)")
-        
-        documents = parser.load_data(resume_file)
+
+        started = time.monotonic()
+        try:
+            documents = parser.load_data(resume_file)
+        except Exception:
+            record_llamaparse(started, llm_ledger.ERROR)
+            raise
         text_content = "\n".join([doc.text for doc in documents])
-        
+        record_llamaparse(started, text=text_content)
+
         ai_logger.info(f"✅ LLAMAPARSE COMPLETED - Extracted {len(text_content)} characters")
         ai_logger.debug(f" Text preview: {text_content[:200]}...")
-        
+
         return text_content
-        
+
     except Exception as e:
         ai_logger.error(f"❌ LLAMAPARSE FAILED - File: {resume_file}, Error: {str(e)}")
         raise
 
+def partial_extraction(local, error):
+    """
+    Partial profile from the locally extracted fields when Gemini failed.
+
+    Re-raises ``error`` when nothing useful was found locally either.
+    """
+    if not any(local.get(key) for key in local_extractor.CONTACT_FIELDS):
+        raise error
+    metrics.incr('extraction.partial')
+    ai_logger.warning(f"⚠️ GEMINI EXTRACTION FAILED ({type(error).__name__}), returning partial profile from local fields")
+    return local_extractor.partial_profile(local)
+
+
 def extract_resume_fields(resume_text):
-    """Send text to Gemini and get structured JSON."""
+    """
+    Send text to Gemini and get structured JSON.
+
+    Contact fields and dates are extracted locally and merged into the
+    result; if Gemini fails, a partial profile with just those fields is
+    returned (``extraction_status`` = "partial").
+    """
     ai_logger.info(f" GEMINI EXTRACTION STARTED - Text length: {len(resume_text)}")
-    
+
     try:
-        if not GEMINI_API_KEY:
-            ai_logger.error("❌ GEMINI_API_KEY not found!")
-            raise ValueError("Gemini API key not configured")
-        
-        if not resume_text or len(resume_text.strip()) < 10:
-            ai_logger.error("❌ Resume text too short or empty!")
-            raise ValueError("Resume text is too short or empty")
-        
+        _check_resume_text(resume_text)
+
         ai_logger.debug(f" Resume text preview: {resume_text[:300]}...")
-        prompt = f"""
-You are an expert resume parser. Extract EXACT values only in JSON:
-
-{{
-"first_name": string|null,
-"last_name": string|null,
-"email": string|null,
-"phone": string|null,
-"education": [
-    {{
-        "institute": string|null,
-        "degree": string|null,
-        "cgpa": float|null,
-        "start_year": string|null,
-        "end_year": string|null
-    }}
-],
-"experience": [
-    {{
-        "type": "work"|"research",
-        "designation": string|null,
-        "start": string|null,
-        "end": string|null|"CURRENT"
-       
-    }}
-],
-"skills": [string],
-"certifications": [
-    {{
-        "name": string|null,
-        "issuer": string|null
-    }}
-],
-"hackathons": [string],
-"publications": [
-    {{
-        "name": string|null,
-        "publisher": string|null
-    }}
-],
-"interests": [string],
-"projects": [
-    {{
-        "name": string|null,
-        "description": string|null
-    }}
-]
-}}
-
-Text:
-```{resume_text}```
-
-
-Classify experiences as follows:
-- "work" = full-time, part-time, internships
-- "research" = research projects, lab work, thesis
-STRICTLY FOLLOW:
-- If research is after graduation and designation  contain keywords like "Research" or "Research Assistant", include as BOTH work + research.
-- If research is during graduation, include ONLY as research.
-
-Dates:
-- Use MM-YYYY if available, else YYYY.
-- Use "CURRENT" if ongoing.
-Output STRICT valid JSON only.
-"""
+        local = local_extractor.extract_local_fields(resume_text)
+        prompt = build_extraction_prompt(resume_text)
         ai_logger.debug(f" Calling Gemini API with prompt length: {len(prompt)}")
-        llm = Gemini(api_key=GEMINI_API_KEY, model_name="models/gemini-2.5-flash")
-        
-        # BULLETPROOF TIMEOUT HANDLING for Railway
-        import signal
-        import time
-        
-        def timeout_handler(signum, frame):
-            raise TimeoutError("Gemini API call timed out")
-        
-        # Set 60 second timeout for maximum safety
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(160)
-        
+
         try:
-            response = llm.complete(prompt)
-            signal.alarm(0)  # Cancel the alarm
-            ai_logger.debug(f" Gemini response received: {response.text[:200]}...")
-        except TimeoutError:
-            signal.alarm(0)  # Cancel the alarm
-            ai_logger.error("❌ GEMINI API TIMEOUT - Request took longer than 160 seconds")
-            raise TimeoutError("Gemini API call timed out after 60 seconds")
-        
-        text = response.text.strip()
-        # clean triple backticks if present
-        if text.startswith("```"):
-            text = text.strip("`")
-            if text.lower().startswith("json"):
-                text = text[4:].strip()
-        first, last = text.find("{"), text.rfind("}")
-        if first == -1 or last == -1:
-            ai_logger.error("❌ No JSON object found in Gemini response")
-            raise ValueError("No JSON object found in response")
-        text = text[first:last+1]
-        ai_logger.debug(f" Extracted JSON text: {text[:200]}...")
-        
-        result = json.loads(text)
+            result = complete_structured(llm_routing.RESUME_EXTRACTION, prompt)
+        except TimeoutError as e:
+            ai_logger.error("❌ GEMINI API TIMEOUT - Resume extraction exceeded its latency budget")
+            return partial_extraction(local, e)
+        except Exception as e:
+            return partial_extraction(local, e)
+
+        result = local_extractor.merge_local_fields(result, local)
         ai_logger.info(f"✅ GEMINI EXTRACTION COMPLETED - Keys: {list(result.keys())}")
         ai_logger.debug(f" Extracted data summary: First name: {result.get('first_name', 'N/A')}, Skills: {len(result.get('skills', []))}")
         return result
-        
+
     except Exception as e:
         ai_logger.error(f"❌ GEMINI EXTRACTION FAILED - Error: {str(e)}")
         ai_logger.error(f"❌ Error type: {type(e).__name__}")
@@ -178,240 +320,645 @@ Output STRICT valid JSON only.
         ai_logger.error(f"❌ Traceback: {traceback.format_exc()}")
         raise e
 
-def parse_date(date_str, today=None, is_start=False):
-    today = today or datetime.today()
-    if not date_str or str(date_str).lower() in ("current", "present", "null"):
-        return today if not is_start else None
-    try:
-        dt = datetime.strptime(date_str, "%m-%Y")
-        return dt.replace(day=1 if is_start else 28)
-    except:
-        try:
-            return datetime(int(date_str), 1, 1) if is_start else datetime(int(date_str), 12, 31)
-        except:
-            return None
-
-def merge_and_sum(experiences):
-    intervals = []
-    today = datetime.today()
-    for exp in experiences:
-        start = parse_date(exp.get("start"), today, is_start=True)
-        end = parse_date(exp.get("end"), today, is_start=False)
-        if start and end:
-            intervals.append((start, end))
-    if not intervals:
-        return 0
-    intervals.sort(key=lambda x: x[0])
-    merged = []
-    cur_start, cur_end = intervals[0]
-    for s, e in intervals[1:]:
-        if s <= cur_end:
-            cur_end = max(cur_end, e)
-        else:
-            merged.append((cur_start, cur_end))
-            cur_start, cur_end = s, e
-    merged.append((cur_start, cur_end))
-    total_months = sum((relativedelta(e, s).years*12 + relativedelta(e, s).months + 1) for s, e in merged)
-    return total_months
-
-def calculate_experience(data):
-    """Add total work and research months/years."""
-    print(f"DEBUG: Calculating experience from data: {data.get('experience', [])}")
-    
-    work = []
-    research = []
-    
-    for exp in data.get("experience", []):
-        exp_type = exp.get("type", "").lower()
-        print(f"DEBUG: Processing experience: {exp}, type: {exp_type}")
-        
-        if exp_type == "work":
-            work.append(exp)
-        elif exp_type == "research":
-            research.append(exp)
-        else:
-            # If no type specified, try to infer from designation
-            designation = exp.get("designation", "").lower()
-            if any(keyword in designation for keyword in ["research", "assistant", "fellow", "intern"]):
-                research.append(exp)
-            else:
-                work.append(exp)
-    
-    print(f"DEBUG: Work experiences: {work}")
-    print(f"DEBUG: Research experiences: {research}")
-    
-    work_months = merge_and_sum(work)
-    research_months = merge_and_sum(research)
-    
-    result = {
-        "work_experience": {"years": work_months//12, "months": work_months%12},
-        "research_experience": {"years": research_months//12, "months": research_months%12}
-    }
-    
-    print(f"DEBUG: Calculated experience totals: {result}")
-    return result
 def extract_job_info(job_desc_text):
     """Extract job title and company from job description using Gemini."""
     try:
-        prompt = f"""
-Extract the job title and company name from this job description. Return ONLY a JSON object with these fields:
-
-{{
-    "title": "exact job title",
-    "company": "company name"
-}}
-
-Job Description:
-```{job_desc_text}```
-
-Instructions:
-1. Extract the most specific job title mentioned (e.g., "Senior Software Engineer", "Data Scientist")
-2. Extract the company/organization name
-3. If not found, use "Unknown" for missing fields
-4. Return ONLY valid JSON, no other text
-"""
+        prompt = build_job_info_prompt(job_desc_text)
         print(f"DEBUG: Extracting job info from job description (length: {len(job_desc_text)})")
-        llm = Gemini(api_key=GEMINI_API_KEY, model_name="models/gemini-2.5-flash")
-        response = llm.complete(prompt)
-        print(f"DEBUG: Job info response: {response.text}")
-        
-        text = response.text.strip()
-        # Clean up response
-        if text.startswith("```"):
-            text = text.strip("`")
-            if text.lower().startswith("json"):
-                text = text[4:].strip()
-        
-        first, last = text.find("{"), text.rfind("}")
-        if first == -1 or last == -1:
-            raise ValueError("No JSON object found in job info response")
-        
-        text = text[first:last+1]
-        result = json.loads(text)
+        result = complete_structured(llm_routing.JOB_INFO, prompt, "job info response")
         print(f"DEBUG: Extracted job info: {result}")
         return result
-        
+
     except Exception as e:
         print(f"ERROR in extract_job_info: {str(e)}")
         print(f"ERROR type: {type(e).__name__}")
         import traceback
         print(f"ERROR traceback: {traceback.format_exc()}")
         # Return fallback values
-        return {"title": "Job Analysis", "company": "Unknown Company"}
+        return default_job_info()
 
 def compare_resume_with_jobdesc(resume_json, job_desc_text):
     """
     Compare the candidate's parsed resume JSON with the job description
-    and return structured evaluation data.
+    and return structured evaluation data; raises when the call fails, so
+    a failed comparison is never saved as a zero score.
     """
     try:
-        prompt = f"""
-You are an expert recruiter and technical evaluator.  
-Evaluate the candidate's resume against the job description using a strict rubric system.  
-
-Resume JSON:
-{resume_json}
-
-Job Description:
-{job_desc_text}
-
-Return ONLY a JSON object with this exact structure:
-{{
-    "skill_matches": [
-        {{
-            "skill": "skill name",
-            "requirement": "what the job requires",
-            "resume_evidence": "evidence from resume",
-            "score": 0-2,
-            "category": "technical|soft|experience|education"
-        }}
-    ],
-    "summary": {{
-        "total_score": 0,
-        "max_possible_score": 0,
-        "overall_fit_percentage": 0,
-        "relevant_strengths": ["strength1", "strength2"],
-        "areas_of_improvement": ["area1", "area2"],
-        "suggested_learning_path": ["suggestion1", "suggestion2"]
-    }},
-    "detailed_analysis": {{
-        "technical_skills_score": 0,
-        "soft_skills_score": 0,
-        "experience_score": 0,
-        "education_score": 0,
-        "overall_recommendation": "Strong Match|Good Match|Moderate Match|Weak Match"
-    }}
-}}
-
-Scoring Rubric:
-- 0 = Not Mentioned  
-- 1 = Mentioned but weak evidence (just listed, no projects/impact)  
-- 2 = Strong evidence (projects, experience, measurable outcomes)  
-
-Return ONLY valid JSON, no other text.
-"""
+        prompt = build_comparison_prompt(resume_json, job_desc_text)
         ai_logger.info(f" RESUME COMPARISON STARTED - Resume keys: {list(resume_json.keys())}, Job desc length: {len(job_desc_text)}")
-        print(f"DEBUG: Starting resume comparison analysis")
-        llm = Gemini(api_key=GEMINI_API_KEY, model_name="models/gemini-2.5-flash")
-        
-        # BULLETPROOF TIMEOUT HANDLING for Railway
-        import signal
-        
-        def timeout_handler(signum, frame):
-            raise TimeoutError("Resume comparison API call timed out")
-        
-        # Set 60 second timeout for maximum safety
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(160)
-        
-        try:
-            response = llm.complete(prompt)
-            signal.alarm(0)  # Cancel the alarm
-            ai_logger.info(f"✅ RESUME COMPARISON COMPLETED - Response length: {len(response.text)}")
-            print(f"DEBUG: Comparison response received: {response.text[:200]}...")
-        except TimeoutError:
-            signal.alarm(0)  # Cancel the alarm
-            ai_logger.error("❌ RESUME COMPARISON TIMEOUT - Request took longer than 60 seconds")
-            raise TimeoutError("Resume comparison API call timed out after 160 seconds")
-        
-        text = response.text.strip()
-        # Clean up response
-        if text.startswith("```"):
-            text = text.strip("`")
-            if text.lower().startswith("json"):
-                text = text[4:].strip()
-        
-        first, last = text.find("{"), text.rfind("}")
-        if first == -1 or last == -1:
-            raise ValueError("No JSON object found in comparison response")
-        
-        text = text[first:last+1]
-        result = json.loads(text)
-        print(f"DEBUG: Successfully parsed comparison result with {len(result.get('skill_matches', []))} skill matches")
+        result = scoring.finalize_comparison(complete_structured(llm_routing.COMPARISON, prompt, "comparison response"))
+        ai_logger.info(f"✅ RESUME COMPARISON COMPLETED - {len(result.get('skill_matches', []))} skill matches")
         return result
-        
+    except TimeoutError:
+        ai_logger.error("❌ RESUME COMPARISON TIMEOUT - Request exceeded its latency budget")
+        raise
     except Exception as e:
-        print(f"ERROR in compare_resume_with_jobdesc: {str(e)}")
-        print(f"ERROR type: {type(e).__name__}")
-        import traceback
-        print(f"ERROR traceback: {traceback.format_exc()}")
-        # Return fallback structured data
-        return {
-            "skill_matches": [],
-            "summary": {
-                "total_score": 0,
-                "max_possible_score": 0,
-                "overall_fit_percentage": 0,
-                "relevant_strengths": [],
-                "areas_of_improvement": ["Error occurred during analysis"],
-                "suggested_learning_path": []
-            },
-            "detailed_analysis": {
-                "technical_skills_score": 0,
-                "soft_skills_score": 0,
-                "experience_score": 0,
-                "education_score": 0,
-                "overall_recommendation": "Analysis Error"
-            }
+        ai_logger.error(f"❌ RESUME COMPARISON FAILED - {type(e).__name__}: {str(e)}")
+        raise
+
+
+def compare_resume_with_jobdescs(resume_json, job_desc_texts):
+    """
+    Compare one resume against several job descriptions.
+
+    The resume is sent once with all job descriptions in a single request.
+    When the combined size exceeds the budget (or the combined call fails),
+    the affected jobs are compared with parallel single calls instead.  The
+    combined call and those single calls share one deadline, so the whole
+    comparison ends before the sidecar client times out.  Returns one
+    result per job description, in order; None where the comparison failed.
+    """
+    with llm_routing.shared_deadline():
+        return _compare_resume_with_jobdescs(resume_json, list(job_desc_texts))
+
+
+def _compare_or_none(resume_json, job_desc_text):
+    try:
+        return compare_resume_with_jobdesc(resume_json, job_desc_text)
+    except Exception:
+        return None  # logged by compare_resume_with_jobdesc
+
+
+def _compare_resume_with_jobdescs(resume_json, job_desc_texts):
+    results = [None] * len(job_desc_texts)
+
+    if len(job_desc_texts) > 1 and fits_multi_comparison_budget(resume_json, job_desc_texts):
+        try:
+            prompt = build_multi_comparison_prompt(resume_json, job_desc_texts)
+            ai_logger.info(f" MULTI-JD COMPARISON STARTED - {len(job_desc_texts)} jobs, prompt length: {len(prompt)}")
+            result = complete_structured(llm_routing.COMPARISON_MULTI, prompt, "multi comparison response")
+            results = split_multi_comparison(result, len(job_desc_texts))
+            ai_logger.info(f"✅ MULTI-JD COMPARISON COMPLETED - {sum(r is not None for r in results)}/{len(results)} jobs scored")
+        except Exception as e:
+            ai_logger.error(f"❌ MULTI-JD COMPARISON FAILED - {type(e).__name__}: {str(e)}")
+
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        ai_logger.info(f" Comparing {len(missing)} job(s) with single calls")
+        with ThreadPoolExecutor(max_workers=min(len(missing), 8)) as pool:
+            compare = llm_routing.within_deadline(lambda index: _compare_or_none(resume_json, job_desc_texts[index]))
+            singles = pool.map(llm_ledger.attributed(compare), missing)
+            for index, result in zip(missing, singles):
+                results[index] = result
+    return results
+
+
+def build_rescore_prompt(resume_json, skill_matches, indexes):
+    """Prompt re-scoring only the ``skill_matches`` entries at ``indexes``."""
+    matches = [
+        {
+            "index": index,
+            "skill": skill_matches[index].get("skill"),
+            "requirement": skill_matches[index].get("requirement"),
+            "category": skill_matches[index].get("category"),
         }
+        for index in indexes
+    ]
+    return prompts.render(
+        'rescore',
+        resume_json=json.dumps(resume_json, ensure_ascii=False),
+        matches=json.dumps(matches, ensure_ascii=False, indent=1),
+    )
+
+
+def apply_rescore(skill_matches, indexes, result):
+    """Return ``(updated skill_matches, indexes the response did not cover)``."""
+    updated = [dict(match) for match in skill_matches]
+    wanted, seen = set(indexes), set()
+    for entry in result.get("skill_matches", []):
+        try:
+            index = int(entry.get("index"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if index in wanted:
+            updated[index]["score"] = entry.get("score", updated[index].get("score"))
+            updated[index]["resume_evidence"] = entry.get("resume_evidence", updated[index].get("resume_evidence"))
+            seen.add(index)
+    return updated, sorted(wanted - seen)
+
+
+def rescore_skill_matches(resume_json, skill_matches, indexes):
+    """
+    Re-score some ``skill_matches`` entries against an edited resume.
+
+    One small call covering only ``indexes`` instead of a full comparison.
+    Returns ``(skill_matches, missing_indexes)``; raises when the call fails.
+    """
+    indexes = [index for index in indexes if 0 <= index < len(skill_matches)]
+    if not indexes:
+        return [dict(match) for match in skill_matches], []
+    ai_logger.info(f" RESCORE STARTED - {len(indexes)} of {len(skill_matches)} skill matches")
+    prompt = build_rescore_prompt(resume_json, skill_matches, indexes)
+    result = complete_structured(llm_routing.RESCORE, prompt, "rescore response")
+    updated, missing = apply_rescore(skill_matches, indexes, result)
+    metrics.incr('rescore.matches', len(indexes) - len(missing))
+    ai_logger.info(f"✅ RESCORE COMPLETED - {len(indexes) - len(missing)} re-scored, {len(missing)} missing")
+    return updated, missing
+
+
+# ---------------------------------------------------------------------------
+# Two-phase comparison
+#
+# Phase one extracts a job description's requirement list once (stored on the
+# JobDescription, see job_descriptions.job_requirements); phase two scores a
+# resume against only that list and returns the usual comparison result.
+# ---------------------------------------------------------------------------
+
+MAX_REQUIREMENTS = 25
+
+
+def build_job_requirements_prompt(job_desc_text):
+    """Prompt asking Gemini for the requirement list of a job description."""
+    return prompts.render('job_requirements', job_desc_text=job_desc_text)
+
+
+def normalize_requirements(result):
+    """Requirement entries with known categories, a must_have flag and a 1-3 weight; blank and repeated skills dropped."""
+    requirements, seen = [], set()
+    for entry in result.get("requirements") or []:
+        if not isinstance(entry, dict):
+            continue
+        skill = " ".join(str(entry.get("skill") or "").split())
+        if not skill or skill.lower() in seen:
+            continue
+        seen.add(skill.lower())
+        requirements.append({
+            "skill": skill,
+            "requirement": " ".join(str(entry.get("requirement") or skill).split()),
+            "category": scoring.match_category(entry),
+            "must_have": entry.get("must_have") is not False,
+            "weight": scoring.match_weight(entry),
+        })
+    if not requirements:
+        raise ValueError("No requirements found in the job description")
+    return requirements[:MAX_REQUIREMENTS]
+
+
+def build_requirement_scoring_prompt(resume_json, requirements):
+    """Prompt scoring the resume against a requirement list, one compact JSON line per requirement."""
+    lines = (
+        json.dumps({"index": index, "skill": requirement["skill"], "requirement": requirement["requirement"],
+                    "category": requirement["category"]}, ensure_ascii=False)
+        for index, requirement in enumerate(requirements)
+    )
+    return prompts.render(
+        'requirement_scoring',
+        resume_json=json.dumps(resume_json, ensure_ascii=False),
+        requirements="\n".join(lines),
+    )
+
+
+def apply_requirement_scores(requirements, result):
+    """
+    Comparison result for ``requirements`` scored as in ``result``.
+
+    Every requirement becomes one skill match in the usual format, plus its
+    ``must_have`` and ``weight``; requirements the reply skipped score 0.
+    """
+    scored = {}
+    for entry in result.get("skill_matches", []):
+        try:
+            scored.setdefault(int(entry.get("index")), entry)
+        except (AttributeError, TypeError, ValueError):
+            continue
+    skill_matches = []
+    for index, requirement in enumerate(requirements):
+        entry = scored.get(index, {})
+        skill_matches.append({
+            "skill": requirement["skill"],
+            "requirement": requirement["requirement"],
+            "resume_evidence": entry.get("resume_evidence") or "",
+            "score": entry.get("score", 0),
+            "category": requirement["category"],
+            "must_have": requirement["must_have"],
+            "weight": requirement["weight"],
+        })
+    skipped = sum(index not in scored for index in range(len(requirements)))
+    if skipped:
+        metrics.incr('requirement_scoring.skipped', skipped)
+    return scoring.finalize_comparison({"skill_matches": skill_matches, "summary": result.get("summary")})
 
+
+def extract_job_requirements(job_desc_text):
+    """Requirement list of a job description; raises when the call fails or finds none."""
+    prompt = build_job_requirements_prompt(job_desc_text)
+    ai_logger.info(f" JOB REQUIREMENTS STARTED - Job desc length: {len(job_desc_text)}")
+    result = complete_structured(llm_routing.JOB_REQUIREMENTS, prompt, "job requirements response")
+    requirements = normalize_requirements(result)
+    ai_logger.info(f"✅ JOB REQUIREMENTS COMPLETED - {len(requirements)} requirements")
+    return requirements
+
+
+def compare_resume_with_requirements(resume_json, requirements):
+    """
+    Score the resume against a stored requirement list.
+
+    Returns the same structure as compare_resume_with_jobdesc; raises when
+    the call fails.
+    """
+    try:
+        prompt = build_requirement_scoring_prompt(resume_json, requirements)
+        ai_logger.info(f" REQUIREMENT SCORING STARTED - {len(requirements)} requirements, prompt length: {len(prompt)}")
+        result = complete_structured(llm_routing.REQUIREMENT_SCORING, prompt, "requirement scoring response")
+        comparison = apply_requirement_scores(requirements, result)
+        ai_logger.info(f"✅ REQUIREMENT SCORING COMPLETED - fit {comparison['summary']['overall_fit_percentage']}%")
+        return comparison
+    except Exception as e:
+        ai_logger.error(f"❌ REQUIREMENT SCORING FAILED - {type(e).__name__}: {str(e)}")
+        raise
+
+
+def merge_local_batch(documents, extracted):
+    """Merge locally extracted contact fields into each batched extraction result."""
+    for doc_id, data in extracted.items():
+        local_extractor.merge_local_fields(data, local_extractor.extract_local_fields(documents[doc_id]))
+    return extracted
+
+
+def _extract_batch(documents, doc_ids):
+    try:
+        prompt = build_batch_extraction_prompt({doc_id: documents[doc_id] for doc_id in doc_ids})
+        result = complete_structured(llm_routing.RESUME_EXTRACTION_BATCH, prompt, "batch extraction response")
+        extracted = split_batch_extraction(result, doc_ids)
+        return merge_local_batch(documents, extracted)
+    except Exception as e:
+        ai_logger.error(f"❌ BATCH EXTRACTION FAILED for {len(doc_ids)} resumes - {type(e).__name__}: {str(e)}")
+        return {}
+
+
+def extract_resume_fields_batch(documents):
+    """
+    Extract structured fields for many resumes, packing several per request.
+
+    ``documents`` maps a document id to its resume text.  Returns
+    ``(results, failures)``: parsed JSON per doc id, and an error message per
+    doc id that could not be extracted.  Entries missing or invalid in a
+    batched response are retried once on their own.
+    """
+    results, failures, retry = {}, {}, []
+    batches = plan_extraction_batches(documents)
+    ai_logger.info(f" BATCH EXTRACTION STARTED - {len(documents)} resumes in {len(batches)} requests")
+
+    multi = [batch for batch in batches if len(batch) > 1]
+    retry.extend(batch[0] for batch in batches if len(batch) == 1)
+    if multi:
+        with ThreadPoolExecutor(max_workers=min(len(multi), 4)) as pool:
+            for batch, extracted in zip(multi, pool.map(llm_ledger.attributed(lambda batch: _extract_batch(documents, batch)), multi)):
+                results.update(extracted)
+                retry.extend(doc_id for doc_id in batch if doc_id not in extracted)
+
+    def extract_single(doc_id):
+        try:
+            return doc_id, validate_resume_fields(extract_resume_fields(documents[doc_id])), None
+        except Exception as e:
+            return doc_id, None, str(e)
+
+    if retry:
+        metrics.incr('extraction_batch.single_calls', len(retry))
+        with ThreadPoolExecutor(max_workers=min(len(retry), 8)) as pool:
+            for doc_id, data, error in pool.map(llm_ledger.attributed(extract_single), retry):
+                if error is None:
+                    results[doc_id] = data
+                else:
+                    failures[doc_id] = error
+
+    ai_logger.info(f"✅ BATCH EXTRACTION COMPLETED - {len(results)} ok, {len(failures)} failed, {len(retry)} single calls")
+    return results, failures
+
+
+def build_section_prompt(section_type, segmented):
+    """Focused prompt for one resume section (experience also gets the education text)."""
+    sections = segmented["sections"]
+    values = {"section_text": sections[section_type]["text"]}
+    if section_type == "experience":
+        values["context"] = (sections.get("education") or {}).get("text", "")
+    return prompts.render(f"resume_section_{section_type}", **values)
+
+
+def plan_section_extraction(segmented, previous_sections=None, previous_data=None):
+    """
+    Split section types into ``(to_extract, reused)``.
+
+    Without a usable previous extraction every section present is
+    extracted.  Otherwise only sections whose text changed are; the fields of
+    the others are taken from ``previous_data``.
+    """
+    present = [section_type for section_type in segmenter.SECTION_FIELDS if section_type in segmented["sections"]]
+    if not previous_data or previous_data.get("extraction_status") == "partial":
+        return present, []
+    changed = segmenter.changed_sections(previous_sections, segmented)
+    if "education" in changed:
+        changed.add("experience")  # experience is classified against graduation dates
+    to_extract = [section_type for section_type in present if section_type in changed]
+    reused = [section_type for section_type in segmenter.SECTION_FIELDS if section_type not in changed]
+    return to_extract, reused
+
+
+def _section_result(section_type, data):
+    return {field: data.get(field) or [] for field in segmenter.SECTION_FIELDS[section_type]}
+
+
+def _assemble_sections(resume_text, extracted, reused, previous_data):
+    """Combine per-section results, reused fields and the local contact fields."""
+    data = {}
+    for section_type, fields in segmenter.SECTION_FIELDS.items():
+        source = previous_data if section_type in reused else extracted.get(section_type)
+        for field in fields:
+            data[field] = (source or {}).get(field) or []
+    return local_extractor.merge_local_fields(data, local_extractor.extract_local_fields(resume_text))
+
+
+def extract_resume_by_section(resume_text, previous_sections=None, previous_data=None):
+    """
+    Extract structured fields section by section, in parallel.
+
+    Returns ``(parsed_json, resume_sections)``.  Pass the stored
+    ``resume_sections``/``parsed_resume_data`` of a profile to only
+    re-extract the sections that changed.  Resumes without recognizable
+    sections, or a failed section call, fall back to extract_resume_fields().
+    """
+    _check_resume_text(resume_text)
+    segmented = segmenter.segment_resume(resume_text)
+    if not segmenter.is_segmentable(segmented):
+        ai_logger.info(" SECTION EXTRACTION SKIPPED - no usable sections, extracting the whole resume")
+        return extract_resume_fields(resume_text), segmented
+
+    to_extract, reused = plan_section_extraction(segmented, previous_sections, previous_data)
+    ai_logger.info(f" SECTION EXTRACTION STARTED - extracting {to_extract}, reusing {reused}")
+
+    def extract(section_type):
+        prompt = build_section_prompt(section_type, segmented)
+        return _section_result(section_type, complete_structured(llm_routing.RESUME_SECTION, prompt, f"{section_type} section response"))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(to_extract))) as pool:
+            extracted = dict(zip(to_extract, pool.map(llm_ledger.attributed(extract), to_extract)))
+    except Exception as e:
+        ai_logger.error(f"❌ SECTION EXTRACTION FAILED - {type(e).__name__}: {str(e)}, extracting the whole resume")
+        return extract_resume_fields(resume_text), segmented
+
+    metrics.incr('extraction.sections_extracted', len(to_extract))
+    metrics.incr('extraction.sections_reused', len(reused))
+    ai_logger.info(f"✅ SECTION EXTRACTION COMPLETED - {len(to_extract)} sections extracted")
+    return _assemble_sections(resume_text, extracted, reused, previous_data), segmented
+
+
+# ---------------------------------------------------------------------------
+# Async variants
+#
+# Same prompts and post-processing as above, but the network waits are done
+# with ``aload_data``/``acomplete`` so one event loop can keep many calls in
+# flight.  Used by the LLM sidecar (see ``llm_sidecar.py``).
+# ---------------------------------------------------------------------------
+
+async def aparse_resume_with_llama(resume_file):
+    """Async version of :func:`parse_resume_with_llama`."""
+    ai_logger.info(f" LLAMAPARSE (async) STARTED - File: {resume_file}")
+    try:
+        _check_resume_file(resume_file)
+        started = time.monotonic()
+        try:
+            documents = await parser.aload_data(resume_file)
+        except asyncio.CancelledError:  # aparse_resumes timed the file out
+            record_llamaparse(started, llm_ledger.TIMEOUT)
+            raise
+        except Exception:
+            record_llamaparse(started, llm_ledger.ERROR)
+            raise
+        text_content = "\n".join([doc.text for doc in documents])
+        record_llamaparse(started, text=text_content)
+        ai_logger.info(f"✅ LLAMAPARSE (async) COMPLETED - Extracted {len(text_content)} characters")
+        return text_content
+    except Exception as e:
+        ai_logger.error(f"❌ LLAMAPARSE (async) FAILED - File: {resume_file}, Error: {str(e)}")
+        raise
+
+
+async def aparse_resumes(resume_files, max_in_flight=None, timeout=None):
+    """
+    Parse many files concurrently, yielding ``(file, text, error)`` as each one finishes.
+
+    At most ``max_in_flight`` LlamaParse jobs run at once (default
+    ``settings.LLAMAPARSE_MAX_IN_FLIGHT``) and each file gets ``timeout``
+    seconds (default ``settings.LLAMAPARSE_FILE_TIMEOUT``).  A failed or
+    timed-out file is yielded with ``text=None`` and an error message, so one
+    bad file never stops the rest.
+    """
+    from django.conf import settings
+    max_in_flight = max_in_flight or getattr(settings, 'LLAMAPARSE_MAX_IN_FLIGHT', 8)
+    timeout = timeout or getattr(settings, 'LLAMAPARSE_FILE_TIMEOUT', 300)
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def parse_one(resume_file):
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                text = await asyncio.wait_for(aparse_resume_with_llama(resume_file), timeout)
+                return resume_file, text, None
+            except asyncio.TimeoutError:
+                metrics.incr('llamaparse.timeouts')
+                return resume_file, None, f"timed out after {timeout}s"
+            except Exception as e:
+                metrics.incr('llamaparse.errors')
+                return resume_file, None, f"{type(e).__name__}: {e}"
+            finally:
+                metrics.observe('llamaparse.latency', time.monotonic() - started)
+
+    tasks = [asyncio.ensure_future(parse_one(resume_file)) for resume_file in resume_files]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def parse_resumes(resume_files, max_in_flight=None, timeout=None):
+    """
+    Blocking generator over :func:`aparse_resumes`, for sync callers.
+
+    The event loop runs in a background thread; results are yielded in
+    completion order as ``(file, text, error)``.
+    """
+    results = queue.Queue()
+    finished = object()
+
+    def run():
+        async def consume():
+            async for result in aparse_resumes(resume_files, max_in_flight, timeout):
+                results.put(result)
+        try:
+            asyncio.run(consume())
+        except Exception as e:
+            ai_logger.error(f"❌ BULK LLAMAPARSE FAILED - {type(e).__name__}: {str(e)}")
+        finally:
+            results.put(finished)
+
+    thread = threading.Thread(target=run, name='llamaparse-bulk', daemon=True)
+    thread.start()
+    while True:
+        result = results.get()
+        if result is finished:
+            break
+        yield result
+    thread.join()
+
+
+async def aextract_resume_fields(resume_text):
+    """Async version of :func:`extract_resume_fields`."""
+    ai_logger.info(f" GEMINI EXTRACTION (async) STARTED - Text length: {len(resume_text)}")
+    try:
+        _check_resume_text(resume_text)
+        local = local_extractor.extract_local_fields(resume_text)
+        try:
+            prompt = build_extraction_prompt(resume_text)
+            result = await acomplete_structured(llm_routing.RESUME_EXTRACTION, prompt)
+        except Exception as e:
+            return partial_extraction(local, e)
+        result = local_extractor.merge_local_fields(result, local)
+        ai_logger.info(f"✅ GEMINI EXTRACTION (async) COMPLETED - Keys: {list(result.keys())}")
+        return result
+    except Exception as e:
+        ai_logger.error(f"❌ GEMINI EXTRACTION (async) FAILED - {type(e).__name__}: {str(e)}")
+        raise
+
+
+async def aextract_job_info(job_desc_text):
+    """Async version of :func:`extract_job_info`."""
+    try:
+        prompt = build_job_info_prompt(job_desc_text)
+        return await acomplete_structured(llm_routing.JOB_INFO, prompt, "job info response")
+    except Exception as e:
+        ai_logger.error(f"❌ JOB INFO (async) FAILED - {type(e).__name__}: {str(e)}")
+        return default_job_info()
+
+
+async def acompare_resume_with_jobdesc(resume_json, job_desc_text):
+    """Async version of :func:`compare_resume_with_jobdesc`."""
+    try:
+        prompt = build_comparison_prompt(resume_json, job_desc_text)
+        result = scoring.finalize_comparison(await acomplete_structured(llm_routing.COMPARISON, prompt, "comparison response"))
+        ai_logger.info(f"✅ RESUME COMPARISON (async) COMPLETED - {len(result.get('skill_matches', []))} skill matches")
+        return result
+    except Exception as e:
+        ai_logger.error(f"❌ RESUME COMPARISON (async) FAILED - {type(e).__name__}: {str(e)}")
+        raise
+
+
+async def acompare_resume_with_jobdescs(resume_json, job_desc_texts):
+    """Async version of :func:`compare_resume_with_jobdescs`."""
+    with llm_routing.shared_deadline():
+        return await _acompare_resume_with_jobdescs(resume_json, list(job_desc_texts))
+
+
+async def _acompare_resume_with_jobdescs(resume_json, job_desc_texts):
+    results = [None] * len(job_desc_texts)
+
+    if len(job_desc_texts) > 1 and fits_multi_comparison_budget(resume_json, job_desc_texts):
+        try:
+            prompt = build_multi_comparison_prompt(resume_json, job_desc_texts)
+            result = await acomplete_structured(llm_routing.COMPARISON_MULTI, prompt, "multi comparison response")
+            results = split_multi_comparison(result, len(job_desc_texts))
+        except Exception as e:
+            ai_logger.error(f"❌ MULTI-JD COMPARISON (async) FAILED - {type(e).__name__}: {str(e)}")
+
+    missing = [index for index, result in enumerate(results) if result is None]
+    singles = await asyncio.gather(
+        *(acompare_resume_with_jobdesc(resume_json, job_desc_texts[index]) for index in missing),
+        return_exceptions=True,
+    )
+    for index, result in zip(missing, singles):
+        results[index] = None if isinstance(result, Exception) else result
+    return results
+
+
+async def aextract_resume_fields_batch(documents):
+    """Async version of :func:`extract_resume_fields_batch`."""
+    results, failures, retry = {}, {}, []
+    batches = plan_extraction_batches(documents)
+
+    async def extract_batch(doc_ids):
+        try:
+            prompt = build_batch_extraction_prompt({doc_id: documents[doc_id] for doc_id in doc_ids})
+            result = await acomplete_structured(llm_routing.RESUME_EXTRACTION_BATCH, prompt, "batch extraction response")
+            extracted = split_batch_extraction(result, doc_ids)
+            return merge_local_batch(documents, extracted)
+        except Exception as e:
+            ai_logger.error(f"❌ BATCH EXTRACTION (async) FAILED for {len(doc_ids)} resumes - {type(e).__name__}: {str(e)}")
+            return {}
+
+    multi = [batch for batch in batches if len(batch) > 1]
+    retry.extend(batch[0] for batch in batches if len(batch) == 1)
+    for batch, extracted in zip(multi, await asyncio.gather(*(extract_batch(batch) for batch in multi))):
+        results.update(extracted)
+        retry.extend(doc_id for doc_id in batch if doc_id not in extracted)
+
+    async def extract_single(doc_id):
+        try:
+            return validate_resume_fields(await aextract_resume_fields(documents[doc_id])), None
+        except Exception as e:
+            return None, str(e)
+
+    if retry:
+        metrics.incr('extraction_batch.single_calls', len(retry))
+    for doc_id, (data, error) in zip(retry, await asyncio.gather(*(extract_single(doc_id) for doc_id in retry))):
+        if error is None:
+            results[doc_id] = data
+        else:
+            failures[doc_id] = error
+    return results, failures
+
+
+async def aextract_resume_by_section(resume_text, previous_sections=None, previous_data=None):
+    """Async version of :func:`extract_resume_by_section`."""
+    _check_resume_text(resume_text)
+    segmented = segmenter.segment_resume(resume_text)
+    if not segmenter.is_segmentable(segmented):
+        return await aextract_resume_fields(resume_text), segmented
+
+    to_extract, reused = plan_section_extraction(segmented, previous_sections, previous_data)
+
+    async def extract(section_type):
+        prompt = build_section_prompt(section_type, segmented)
+        data = await acomplete_structured(llm_routing.RESUME_SECTION, prompt, f"{section_type} section response")
+        return _section_result(section_type, data)
+
+    try:
+        extracted = dict(zip(to_extract, await asyncio.gather(*(extract(section_type) for section_type in to_extract))))
+    except Exception as e:
+        ai_logger.error(f"❌ SECTION EXTRACTION (async) FAILED - {type(e).__name__}: {str(e)}, extracting the whole resume")
+        return await aextract_resume_fields(resume_text), segmented
+
+    metrics.incr('extraction.sections_extracted', len(to_extract))
+    metrics.incr('extraction.sections_reused', len(reused))
+    return _assemble_sections(resume_text, extracted, reused, previous_data), segmented
+
+
+async def arescore_skill_matches(resume_json, skill_matches, indexes):
+    """Async version of :func:`rescore_skill_matches`."""
+    indexes = [index for index in indexes if 0 <= index < len(skill_matches)]
+    if not indexes:
+        return [dict(match) for match in skill_matches], []
+    prompt = build_rescore_prompt(resume_json, skill_matches, indexes)
+    result = await acomplete_structured(llm_routing.RESCORE, prompt, "rescore response")
+    updated, missing = apply_rescore(skill_matches, indexes, result)
+    metrics.incr('rescore.matches', len(indexes) - len(missing))
+    return updated, missing
+
+
+async def aextract_job_requirements(job_desc_text):
+    """Async version of :func:`extract_job_requirements`."""
+    prompt = build_job_requirements_prompt(job_desc_text)
+    result = await acomplete_structured(llm_routing.JOB_REQUIREMENTS, prompt, "job requirements response")
+    return normalize_requirements(result)
+
+
+async def acompare_resume_with_requirements(resume_json, requirements):
+    """Async version of :func:`compare_resume_with_requirements`."""
+    try:
+        prompt = build_requirement_scoring_prompt(resume_json, requirements)
+        result = await acomplete_structured(llm_routing.REQUIREMENT_SCORING, prompt, "requirement scoring response")
+        return apply_requirement_scores(requirements, result)
+    except Exception as e:
+        ai_logger.error(f"❌ REQUIREMENT SCORING (async) FAILED - {type(e).__name__}: {str(e)}")
+        raise
@@ -0,0 +1,195 @@
+"""
+Incrementally maintained analytics over ResumeAnalysis rows.
+
+Each analysis contributes its fit percentage, recommendation, month, the
+skills it scored 0 ("missing") and its areas of improvement.  That
+contribution is added to the user's ``AnalyticsRollup`` and to the global
+``SkillGap`` table when the analysis is saved for the first time, and
+subtracted when it is deleted (``post_save``/``post_delete`` handlers,
+connected in ``AccountsConfig.ready``).  A re-score swaps the old
+contribution for the new one (``record_changed``).  Reads are then a single
+row (per user) or an indexed top-N query (global) instead of loading every
+analysis.  ``python manage.py rebuild_rollups`` recomputes everything from
+scratch, e.g. after bulk edits that bypass the ORM.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import scoring
+from .models import AnalyticsRollup, ResumeAnalysis, SkillGap
+
+logger = logging.getLogger(__name__)
+
+MAX_LABEL_LENGTH = 200
+TOP_N = 5
+MAX_TOP_N = 100
+
+
+def _normalize(text):
+    label = " ".join(str(text or "").split())[:MAX_LABEL_LENGTH]
+    return label.lower(), label
+
+
+def _labels(values):
+    """{normalized: label} for a list of strings, each counted once."""
+    labels = {}
+    for value in values or []:
+        key, label = _normalize(value)
+        if key:
+            labels.setdefault(key, label)
+    return labels
+
+
+def contribution(analysis):
+    """What ``analysis`` adds to the rollups."""
+    summary = analysis.summary or {}
+    missing = [
+        match.get("skill") for match in analysis.skill_matches or []
+        if isinstance(match, dict) and scoring.match_score(match) == 0
+    ]
+    created_at = analysis.created_at or timezone.now()
+    return {
+        "fit": float(summary.get("overall_fit_percentage", analysis.match_score) or 0),
+        "recommendation": (analysis.detailed_analysis or {}).get("overall_recommendation") or "Unknown",
+        "month": created_at.strftime("%Y-%m"),
+        "missing_skills": _labels(missing),
+        "improvement_areas": _labels(summary.get("areas_of_improvement")),
+    }
+
+
+def _bump_counts(counts, labels, sign):
+    for key, label in labels.items():
+        current_label, count = counts.get(key, (label, 0))
+        count += sign
+        if count > 0:
+            counts[key] = [current_label, count]
+        else:
+            counts.pop(key, None)
+
+
+def _apply_user(user_profile_id, contrib, sign):
+    rollup = AnalyticsRollup.objects.select_for_update().filter(user_profile_id=user_profile_id).first()
+    if rollup is None:
+        if sign < 0:
+            return  # profile (and its rollup) is being deleted
+        # get_or_create: a concurrent first analysis of the same user may create the row first
+        AnalyticsRollup.objects.get_or_create(user_profile_id=user_profile_id)
+        rollup = AnalyticsRollup.objects.select_for_update().get(user_profile_id=user_profile_id)
+
+    rollup.analysis_count = max(0, rollup.analysis_count + sign)
+    rollup.fit_total = max(0.0, rollup.fit_total + sign * contrib["fit"]) if rollup.analysis_count else 0.0
+
+    recommendation = contrib["recommendation"]
+    count = rollup.recommendations.get(recommendation, 0) + sign
+    if count > 0:
+        rollup.recommendations[recommendation] = count
+    else:
+        rollup.recommendations.pop(recommendation, None)
+
+    month_count, month_total = rollup.monthly_fit.get(contrib["month"], (0, 0.0))
+    month_count += sign
+    if month_count > 0:
+        rollup.monthly_fit[contrib["month"]] = [month_count, round(month_total + sign * contrib["fit"], 2)]
+    else:
+        rollup.monthly_fit.pop(contrib["month"], None)
+
+    _bump_counts(rollup.missing_skills, contrib["missing_skills"], sign)
+    _bump_counts(rollup.improvement_areas, contrib["improvement_areas"], sign)
+    rollup.save()
+
+
+def _apply_global(labels, sign):
+    if not labels:
+        return
+    if sign > 0:
+        SkillGap.objects.bulk_create(
+            [SkillGap(skill=key, label=label) for key, label in labels.items()],
+            ignore_conflicts=True,
+        )
+    SkillGap.objects.filter(skill__in=list(labels)).update(
+        missing_count=F("missing_count") + sign, updated_at=timezone.now()
+    )
+    if sign < 0:
+        SkillGap.objects.filter(skill__in=list(labels), missing_count__lte=0).delete()
+
+
+def apply(user_profile_id, contrib, sign):
+    """Add (``sign=1``) or remove (``sign=-1``) one analysis' contribution."""
+    with transaction.atomic():
+        _apply_user(user_profile_id, contrib, sign)
+        _apply_global(contrib["missing_skills"], sign)
+
+
+def record_created(analysis):
+    apply(analysis.user_profile_id, contribution(analysis), 1)
+
+
+def record_deleted(analysis):
+    apply(analysis.user_profile_id, contribution(analysis), -1)
+
+
+def record_changed(analysis, before):
+    """Swap the ``before`` contribution (taken prior to the edit) for the current one."""
+    with transaction.atomic():
+        apply(analysis.user_profile_id, before, -1)
+        apply(analysis.user_profile_id, contribution(analysis), 1)
+
+
+def on_analysis_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        try:
+            record_created(instance)
+        except Exception as e:
+            logger.error(f"Failed to update analytics rollups for analysis {instance.pk}: {type(e).__name__}: {e}")
+
+
+def on_analysis_deleted(sender, instance, **kwargs):
+    try:
+        record_deleted(instance)
+    except Exception as e:
+        logger.error(f"Failed to update analytics rollups for deleted analysis {instance.pk}: {type(e).__name__}: {e}")
+
+
+def rebuild(chunk_size=2000):
+    """Recompute every rollup from the stored analyses; returns the number of analyses scanned."""
+    fields = ("id", "user_profile_id", "created_at", "match_score", "summary", "detailed_analysis", "skill_matches")
+    with transaction.atomic():
+        AnalyticsRollup.objects.all().delete()
+        SkillGap.objects.all().delete()
+        scanned = 0
+        for analysis in ResumeAnalysis.objects.only(*fields).order_by("user_profile_id", "id").iterator(chunk_size=chunk_size):
+            record_created(analysis)
+            scanned += 1
+    return scanned
+
+
+def _top(counts, limit):
+    ranked = sorted(counts.values(), key=lambda entry: (-entry[1], entry[0]))
+    return [{"label": label, "count": count} for label, count in ranked[:limit]]
+
+
+def user_stats(user_profile, limit=TOP_N):
+    """Dashboard/API view of one user's rollup (zeros when they have no analyses)."""
+    rollup = AnalyticsRollup.objects.filter(user_profile=user_profile).first() or AnalyticsRollup(user_profile=user_profile)
+    return {
+        "analysis_count": rollup.analysis_count,
+        "average_fit": rollup.average_fit,
+        "recommendations": dict(sorted(rollup.recommendations.items(), key=lambda item: -item[1])),
+        "fit_over_time": [
+            {"month": month, "count": count, "average_fit": round(total / count, 1)}
+            for month, (count, total) in sorted(rollup.monthly_fit.items())
+        ],
+        "top_missing_skills": _top(rollup.missing_skills, limit),
+        "top_improvement_areas": _top(rollup.improvement_areas, limit),
+    }
+
+
+def top_skill_gaps(limit=20):
+    """Most frequently missing skills across all users."""
+    return [
+        {"label": label, "count": count}
+        for label, count in SkillGap.objects.order_by("-missing_count", "label").values_list("label", "missing_count")[:limit]
+    ]
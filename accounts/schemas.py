@@ -0,0 +1,258 @@
+"""
+Response schemas for every Gemini call, defined once.
+
+The same JSON Schema is used twice: converted with ``to_gemini_schema`` it
+is sent as ``response_schema`` (with ``response_mime_type`` set to JSON) so
+the model is constrained to it, and ``validate`` checks the decoded reply
+against it with ``jsonschema``.  Schemas are keyed by prompt name (see
+``accounts.prompts``); validation failures are counted per task as
+``llm.<task>.schema_failures``.
+"""
+from functools import lru_cache
+
+import jsonschema
+
+from . import metrics
+from .segmenter import SECTION_FIELDS
+
+
+def _nullable(type_):
+    return {"type": [type_, "null"]}
+
+
+def _objects(**properties):
+    return {"type": "array", "items": {"type": "object", "properties": properties}}
+
+
+STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+CONTACT_PROPERTIES = {
+    "first_name": _nullable("string"),
+    "last_name": _nullable("string"),
+    "email": _nullable("string"),
+    "phone": _nullable("string"),
+}
+
+RESUME_PROPERTIES = {
+    "education": _objects(
+        institute=_nullable("string"),
+        degree=_nullable("string"),
+        cgpa=_nullable("number"),
+        start_year=_nullable("string"),
+        end_year=_nullable("string"),
+    ),
+    "experience": _objects(
+        type={"type": "string", "enum": ["work", "research"]},
+        designation=_nullable("string"),
+        start=_nullable("string"),
+        end=_nullable("string"),
+    ),
+    "skills": STRING_LIST,
+    "certifications": _objects(name=_nullable("string"), issuer=_nullable("string")),
+    "hackathons": STRING_LIST,
+    "publications": _objects(name=_nullable("string"), publisher=_nullable("string")),
+    "interests": STRING_LIST,
+    "projects": _objects(name=_nullable("string"), description=_nullable("string")),
+}
+
+# Contact fields are optional: current prompt versions leave them to the local extractor
+RESUME = {
+    "type": "object",
+    "properties": {**CONTACT_PROPERTIES, **RESUME_PROPERTIES},
+    "required": list(RESUME_PROPERTIES),
+}
+
+RESUME_BATCH = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"doc_id": {"type": "string"}, "data": RESUME},
+                "required": ["doc_id", "data"],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+JOB_INFO = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}, "company": {"type": "string"}},
+    "required": ["title", "company"],
+}
+
+SKILL_MATCH = {
+    "type": "object",
+    "properties": {
+        "skill": {"type": "string"},
+        "requirement": {"type": "string"},
+        "resume_evidence": _nullable("string"),
+        "score": {"type": "integer", "minimum": 0, "maximum": 2},
+        "category": {"type": "string", "enum": ["technical", "soft", "experience", "education"]},
+    },
+    "required": ["skill", "requirement", "score", "category"],
+}
+
+QUALITATIVE_SUMMARY = {
+    "type": "object",
+    "properties": {
+        "relevant_strengths": STRING_LIST,
+        "areas_of_improvement": STRING_LIST,
+        "suggested_learning_path": STRING_LIST,
+    },
+    "required": ["relevant_strengths", "areas_of_improvement", "suggested_learning_path"],
+}
+
+COMPARISON = {
+    "type": "object",
+    "properties": {
+        "skill_matches": {"type": "array", "items": SKILL_MATCH},
+        "summary": QUALITATIVE_SUMMARY,
+    },
+    "required": ["skill_matches", "summary"],
+}
+
+COMPARISON_MULTI = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"job_id": {"type": "string"}, **COMPARISON["properties"]},
+                "required": ["job_id", "skill_matches", "summary"],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+RESCORE = {
+    "type": "object",
+    "properties": {
+        "skill_matches": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "resume_evidence": _nullable("string"),
+                    "score": {"type": "integer", "minimum": 0, "maximum": 2},
+                },
+                "required": ["index", "score"],
+            },
+        },
+    },
+    "required": ["skill_matches"],
+}
+
+REQUIREMENT = {
+    "type": "object",
+    "properties": {
+        "skill": {"type": "string"},
+        "requirement": {"type": "string"},
+        "category": SKILL_MATCH["properties"]["category"],
+        "must_have": {"type": "boolean"},
+        "weight": {"type": "integer", "minimum": 1, "maximum": 3},
+    },
+    "required": ["skill", "requirement", "category", "must_have", "weight"],
+}
+
+JOB_REQUIREMENTS = {
+    "type": "object",
+    "properties": {"requirements": {"type": "array", "items": REQUIREMENT}},
+    "required": ["requirements"],
+}
+
+REQUIREMENT_SCORES = {
+    "type": "object",
+    "properties": {
+        "skill_matches": RESCORE["properties"]["skill_matches"],
+        "summary": QUALITATIVE_SUMMARY,
+    },
+    "required": ["skill_matches", "summary"],
+}
+
+
+def section_schema(section_type):
+    fields = SECTION_FIELDS[section_type]
+    return {
+        "type": "object",
+        "properties": {field: RESUME_PROPERTIES[field] for field in fields},
+        "required": list(fields),
+    }
+
+
+PROMPT_SCHEMAS = {
+    'resume_extraction': RESUME,
+    'resume_extraction_batch': RESUME_BATCH,
+    'job_info': JOB_INFO,
+    'comparison': COMPARISON,
+    'comparison_multi': COMPARISON_MULTI,
+    'rescore': RESCORE,
+    'job_requirements': JOB_REQUIREMENTS,
+    'requirement_scoring': REQUIREMENT_SCORES,
+    **{f'resume_section_{section_type}': section_schema(section_type) for section_type in SECTION_FIELDS},
+}
+
+# JSON Schema keywords Gemini's OpenAPI-style schema understands
+GEMINI_KEYWORDS = {"format", "description", "nullable", "enum", "required", "minItems", "maxItems"}
+
+
+def to_gemini_schema(schema):
+    """
+    Convert a JSON Schema to Gemini's ``response_schema`` dialect.
+
+    ``["x", "null"]`` types become ``nullable``, type names are upper-cased
+    and keywords Gemini rejects (bounds, ``additionalProperties``) are dropped;
+    those are still enforced by :func:`validate`.
+    """
+    converted = {}
+    type_ = schema.get("type")
+    if isinstance(type_, list):
+        if "null" in type_:
+            converted["nullable"] = True
+        type_ = next(t for t in type_ if t != "null")
+    if type_:
+        converted["type"] = type_.upper()
+    for key, value in schema.items():
+        if key == "properties":
+            converted[key] = {name: to_gemini_schema(sub) for name, sub in value.items()}
+        elif key == "items":
+            converted[key] = to_gemini_schema(value)
+        elif key in GEMINI_KEYWORDS:
+            converted[key] = value
+    if "enum" in converted and type_ != "string":
+        del converted["enum"]  # Gemini only supports string enums
+    return converted
+
+
+def schema_for(prompt):
+    """JSON Schema for a rendered prompt, or None for prompts without one."""
+    template = getattr(prompt, 'template', None)
+    return PROMPT_SCHEMAS.get(template.name) if template is not None else None
+
+
+@lru_cache(maxsize=None)
+def gemini_schema(name):
+    return to_gemini_schema(PROMPT_SCHEMAS[name])
+
+
+def validate(task, prompt, data):
+    """
+    Check ``data`` against the prompt's schema; raises ValueError on mismatch.
+
+    Failures are counted as ``llm.<task>.schema_failures``.
+    """
+    schema = schema_for(prompt)
+    if schema is None:
+        return data
+    try:
+        jsonschema.validate(data, schema)
+    except jsonschema.ValidationError as e:
+        metrics.incr(f'llm.{task}.schema_failures')
+        path = "/".join(str(part) for part in e.absolute_path) or "<root>"
+        raise ValueError(f"{task} response does not match its schema at {path}: {e.message}")
+    return data
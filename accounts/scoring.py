@@ -0,0 +1,115 @@
+"""
+Deterministic scoring over ``skill_matches``.
+
+Every match carries a 0-2 rubric ``score`` and a ``category``; totals, the
+fit percentage, per-category scores (as percentages) and the recommendation
+tier are all arithmetic over that list, so they are computed here instead of
+being trusted from the LLM.  Matches scored against a stored requirement
+list (see ``job_descriptions.compare_with_job``) also carry a 1-3 ``weight``
+that multiplies both their score and their maximum; others count once.
+"""
+
+MAX_SKILL_SCORE = 2
+MAX_WEIGHT = 3
+
+CATEGORY_FIELDS = {
+    "technical": "technical_skills_score",
+    "soft": "soft_skills_score",
+    "experience": "experience_score",
+    "education": "education_score",
+}
+
+# (minimum fit percentage, recommendation), highest first
+RECOMMENDATION_TIERS = (
+    (80, "Strong Match"),
+    (60, "Good Match"),
+    (40, "Moderate Match"),
+    (0, "Weak Match"),
+)
+
+QUALITATIVE_FIELDS = ("relevant_strengths", "areas_of_improvement", "suggested_learning_path")
+
+
+def match_score(match):
+    """The rubric score of one match, clamped to 0-2."""
+    try:
+        score = int(round(float(match.get("score", 0))))
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(MAX_SKILL_SCORE, score))
+
+
+def match_weight(match):
+    """The requirement weight of one match, clamped to 1-3 (1 when absent)."""
+    try:
+        weight = int(round(float(match.get("weight", 1))))
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(MAX_WEIGHT, weight))
+
+
+def match_category(match):
+    category = str(match.get("category") or "").strip().lower()
+    return category if category in CATEGORY_FIELDS else "technical"
+
+
+def recommendation_for(fit_percentage):
+    for minimum, recommendation in RECOMMENDATION_TIERS:
+        if fit_percentage >= minimum:
+            return recommendation
+    return RECOMMENDATION_TIERS[-1][1]
+
+
+def _percentage(total, maximum):
+    return round(100 * total / maximum) if maximum else 0
+
+
+def aggregate(skill_matches, summary=None, detailed_analysis=None):
+    """
+    Return ``(summary, detailed_analysis)`` computed from ``skill_matches``.
+
+    The qualitative lists of an existing ``summary`` (strengths, areas of
+    improvement, learning path) are kept as they are.
+    """
+    totals = {category: [0, 0] for category in CATEGORY_FIELDS}
+    for match in skill_matches:
+        if not isinstance(match, dict):
+            continue
+        entry = totals[match_category(match)]
+        weight = match_weight(match)
+        entry[0] += match_score(match) * weight
+        entry[1] += MAX_SKILL_SCORE * weight
+
+    total_score = sum(entry[0] for entry in totals.values())
+    max_possible_score = sum(entry[1] for entry in totals.values())
+    fit_percentage = _percentage(total_score, max_possible_score)
+
+    new_summary = {field: list((summary or {}).get(field) or []) for field in QUALITATIVE_FIELDS}
+    new_summary.update({
+        "total_score": total_score,
+        "max_possible_score": max_possible_score,
+        "overall_fit_percentage": fit_percentage,
+    })
+
+    new_detailed = {field: _percentage(*totals[category]) for category, field in CATEGORY_FIELDS.items()}
+    new_detailed["overall_recommendation"] = recommendation_for(fit_percentage)
+    for key, value in (detailed_analysis or {}).items():
+        new_detailed.setdefault(key, value)
+    return new_summary, new_detailed
+
+
+def finalize_comparison(result):
+    """
+    Normalize an LLM comparison result and fill in every computed field.
+
+    Keeps the skill matches (with scores clamped to 0-2 and known
+    categories) and the qualitative summary lists; totals, fit percentage,
+    category scores and the recommendation come from :func:`aggregate`.
+    """
+    skill_matches = []
+    for match in result.get("skill_matches") or []:
+        if isinstance(match, dict):
+            match = dict(match, score=match_score(match), category=match_category(match))
+            skill_matches.append(match)
+    summary, detailed_analysis = aggregate(skill_matches, result.get("summary"))
+    return {"skill_matches": skill_matches, "summary": summary, "detailed_analysis": detailed_analysis}
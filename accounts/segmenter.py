@@ -0,0 +1,105 @@
+"""
+Split LlamaParse resume markdown into typed sections.
+
+Section boundaries come from ``local_extractor.find_sections`` (markdown
+headings, bold lines, ALL CAPS lines and known heading words); each section
+is then typed as one of ``SECTION_TYPES`` from its heading, or from its
+content when the heading is unknown.  Sections of the same type are joined.
+
+The segmented form is stored on ``UserProfile.resume_sections`` so that a
+re-upload only needs to re-extract the sections whose text changed.
+"""
+import hashlib
+import re
+
+from .local_extractor import DATE_RANGE_RE, find_sections
+
+SEGMENTER_VERSION = 1
+
+SECTION_TYPES = ("contact", "education", "experience", "skills", "projects", "publications", "certifications", "other")
+
+# Resume fields extracted from each section type ("contact" is handled locally)
+SECTION_FIELDS = {
+    "education": ("education",),
+    "experience": ("experience",),
+    "skills": ("skills",),
+    "projects": ("projects",),
+    "publications": ("publications",),
+    "certifications": ("certifications",),
+    "other": ("hackathons", "interests"),
+}
+
+# Substrings of unknown headings, checked in order
+TITLE_HINTS = (
+    ("contact", "contact"),
+    ("experience", "experience"), ("employment", "experience"), ("intern", "experience"), ("work", "experience"),
+    ("education", "education"), ("academic", "education"), ("qualification", "education"),
+    ("skill", "skills"), ("technolog", "skills"), ("competenc", "skills"),
+    ("project", "projects"),
+    ("publication", "publications"), ("paper", "publications"),
+    ("certific", "certifications"), ("course", "certifications"), ("license", "certifications"),
+)
+
+DEGREE_RE = re.compile(r"\b(b\.?\s?tech|m\.?\s?tech|b\.?sc|m\.?sc|b\.?e\.?|m\.?e\.?|bachelor|master|ph\.?d|mba|cgpa|gpa|university|college)\b", re.IGNORECASE)
+
+
+def _hash(text):
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()[:16]
+
+
+def _guess_type(title, body):
+    lowered = title.lower()
+    for hint, section_type in TITLE_HINTS:
+        if hint in lowered:
+            return section_type
+    if DEGREE_RE.search(body):
+        return "education"
+    if DATE_RANGE_RE.search(body):
+        return "experience"
+    lines = [line for line in body.splitlines() if line.strip()]
+    if lines and sum(line.count(',') for line in lines) >= 2 * len(lines):
+        return "skills"
+    return "other"
+
+
+def segment_resume(text):
+    """
+    Segment resume markdown into ``{"version": ..., "sections": {type: {...}}}``.
+
+    Each section entry holds the joined ``text``, the original heading
+    ``titles`` and a ``hash`` of the text.
+    """
+    lines = text.splitlines()
+    sections = {}
+    for boundary in find_sections(text):
+        body = "\n".join(lines[boundary["start"]:boundary["end"]]).strip()
+        if not body:
+            continue
+        section_type = boundary["type"] or _guess_type(boundary["title"], body)
+        entry = sections.setdefault(section_type, {"titles": [], "parts": []})
+        entry["titles"].append(boundary["title"])
+        entry["parts"].append(body)
+
+    segmented = {}
+    for section_type in SECTION_TYPES:
+        if section_type in sections:
+            body = "\n\n".join(sections[section_type]["parts"])
+            segmented[section_type] = {"titles": sections[section_type]["titles"], "text": body, "hash": _hash(body)}
+    return {"version": SEGMENTER_VERSION, "sections": segmented}
+
+
+def changed_sections(old, new):
+    """Section types whose text differs between two segmentations (all of them if ``old`` is unusable)."""
+    new_sections = new.get("sections", {})
+    if not old or old.get("version") != SEGMENTER_VERSION:
+        return set(new_sections) | set(SECTION_FIELDS)
+    old_sections = old.get("sections", {})
+    return {
+        section_type for section_type in set(old_sections) | set(new_sections)
+        if (old_sections.get(section_type) or {}).get("hash") != (new_sections.get(section_type) or {}).get("hash")
+    }
+
+
+def is_segmentable(segmented):
+    """Whether per-section extraction is worthwhile (at least two LLM sections were found)."""
+    return sum(1 for section_type in segmented.get("sections", {}) if section_type in SECTION_FIELDS) >= 2
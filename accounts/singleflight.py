@@ -0,0 +1,221 @@
+"""
+Single-flight coalescing of identical long-running requests.
+
+Double clicks, browser retries and refreshes on the profile/dashboard POSTs
+would otherwise each start their own 30-160s LLM pipeline (and save their
+own ResumeAnalysis).  ``run_once(key, fn)`` makes every caller with the
+same key share a single run:
+
+* within a process, concurrent callers wait on the running call;
+* across processes, a lock in the Django cache (``settings.SINGLEFLIGHT_CACHE``)
+  lets one worker run while the others poll for its result.  This needs a
+  shared cache backend (Redis/Memcached/database); with the default
+  local-memory cache only the in-process part applies.
+
+A finished result stays in the cache for ``SINGLEFLIGHT_RESULT_TTL`` seconds,
+so a retry arriving just after completion gets it too.  Suppressed
+duplicates are counted as ``singleflight.coalesced`` (same process) and
+``singleflight.coalesced_remote`` (another process).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5
+
+_MISSING = object()
+
+
+def request_key(user_id, task, *inputs):
+    """Key for ``task`` run by ``user_id`` on ``inputs`` (strings or bytes)."""
+    digest = hashlib.sha256()
+    for value in inputs:
+        digest.update(value if isinstance(value, bytes) else str(value).encode('utf-8'))
+        digest.update(b'\0')
+    return f"{user_id}:{task}:{digest.hexdigest()[:32]}"
+
+
+def file_digest(uploaded_file):
+    """SHA-256 of an uploaded file's content; the file is rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def _settings():
+    return (
+        caches[getattr(settings, 'SINGLEFLIGHT_CACHE', 'default')],
+        getattr(settings, 'SINGLEFLIGHT_TIMEOUT', 300),
+        getattr(settings, 'SINGLEFLIGHT_RESULT_TTL', 30),
+    )
+
+
+def _cache_keys(key):
+    return f"singleflight:lock:{key}", f"singleflight:result:{key}"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_lock = threading.Lock()
+_flights = {}
+
+
+def run_once(key, fn):
+    """
+    Run ``fn()`` once for all concurrent callers with the same ``key``.
+
+    Returns ``(result, leader)`` where ``leader`` is False when the result
+    came from another caller's run.  Errors of the shared run are raised in
+    every waiting caller.
+    """
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        metrics.incr('singleflight.coalesced')
+        _, timeout, _ = _settings()
+        if not flight.done.wait(timeout):
+            metrics.incr('singleflight.wait_timeouts')
+            raise TimeoutError("Timed out waiting for an identical request to finish")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, False
+
+    try:
+        flight.result, leader = _run_shared(key, fn)
+        return flight.result, leader
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _run_shared(key, fn):
+    """Cross-process part of run_once(): take the cache lock or wait for its holder's result."""
+    cache, timeout, result_ttl = _settings()
+    lock_key, result_key = _cache_keys(key)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            result = cache.get(result_key, _MISSING)
+            if result is not _MISSING:
+                metrics.incr('singleflight.coalesced_remote')
+                return result, False
+            if cache.add(lock_key, os.getpid(), timeout):
+                break
+            if time.monotonic() > deadline:
+                metrics.incr('singleflight.wait_timeouts')
+                raise TimeoutError("Timed out waiting for an identical request to finish")
+            time.sleep(POLL_INTERVAL)
+    except TimeoutError:
+        raise
+    except Exception as e:
+        # A broken cache must not block the request; run without cross-process coalescing
+        logger.warning(f"Single-flight cache unavailable ({type(e).__name__}: {e}), running uncoalesced")
+        return fn(), True
+
+    try:
+        result = fn()
+        cache.set(result_key, result, result_ttl)
+        metrics.incr('singleflight.leaders')
+        return result, True
+    finally:
+        cache.delete(lock_key)
+
+
+_async_flights = {}
+
+
+async def arun_once(key, coro_fn):
+    """Async version of :func:`run_once`; ``coro_fn()`` returns the awaitable to share."""
+    future = _async_flights.get(key)
+    if future is not None:
+        metrics.incr('singleflight.coalesced')
+        _, timeout, _ = _settings()
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout), False
+        except asyncio.TimeoutError:
+            metrics.incr('singleflight.wait_timeouts')
+            raise TimeoutError("Timed out waiting for an identical request to finish")
+
+    future = _async_flights[key] = asyncio.get_running_loop().create_future()
+    try:
+        result, leader = await _arun_shared(key, coro_fn)
+        future.set_result(result)
+        return result, leader
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        _async_flights.pop(key, None)
+
+
+async def _arun_shared(key, coro_fn):
+    cache, timeout, result_ttl = _settings()
+    lock_key, result_key = _cache_keys(key)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            result = await cache.aget(result_key, _MISSING)
+            if result is not _MISSING:
+                metrics.incr('singleflight.coalesced_remote')
+                return result, False
+            if await cache.aadd(lock_key, os.getpid(), timeout):
+                break
+            if time.monotonic() > deadline:
+                metrics.incr('singleflight.wait_timeouts')
+                raise TimeoutError("Timed out waiting for an identical request to finish")
+            await asyncio.sleep(POLL_INTERVAL)
+    except TimeoutError:
+        raise
+    except Exception as e:
+        logger.warning(f"Single-flight cache unavailable ({type(e).__name__}: {e}), running uncoalesced")
+        return await coro_fn(), True
+
+    try:
+        result = await coro_fn()
+        await cache.aset(result_key, result, result_ttl)
+        metrics.incr('singleflight.leaders')
+        return result, True
+    finally:
+        await cache.adelete(lock_key)
+
+
+def stats(data=None):
+    """Duplicate-suppression counters from a metrics snapshot."""
+    counters = (data or metrics.snapshot())['counters']
+    leaders = counters.get('singleflight.leaders', 0)
+    coalesced = counters.get('singleflight.coalesced', 0) + counters.get('singleflight.coalesced_remote', 0)
+    return {
+        'runs': leaders,
+        'duplicates_suppressed': coalesced,
+        'duplicates_suppressed_remote': counters.get('singleflight.coalesced_remote', 0),
+        'wait_timeouts': counters.get('singleflight.wait_timeouts', 0),
+    }
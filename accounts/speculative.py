@@ -0,0 +1,258 @@
+"""
+Speculative pre-processing of inputs the user is still preparing.
+
+The profile and dashboard pages post a selected resume/job-description file,
+or pasted job text once it stops changing, to ``/speculate/`` (debounced in
+``static/js/speculate.js``).  The input-only steps then start in a
+background thread while the user is still on the page:
+
+* a file is parsed to text with LlamaParse and the text cached per user
+  under the file's SHA-256 for ``SPECULATIVE_TTL`` seconds;
+* pasted job text is stored as a ``JobDescription`` with its title/company
+  and requirement list extracted (the row is the cache, keyed by its text
+  hash).
+
+On submit, ``document_text`` and ``wait_for_job`` use the finished result,
+or wait for the run still in progress, instead of starting over.
+
+Cost is bounded: each user gets ``SPECULATIVE_BUDGET`` speculative runs per
+hour (0 turns speculation off), at most ``SPECULATIVE_WORKERS`` run at once
+per process with ``SPECULATIVE_QUEUE_SIZE`` more queued, a newer input from
+the same user cancels their older queued run of the same kind, and a run
+still queued after ``SPECULATIVE_MAX_QUEUE_WAIT`` seconds is dropped.  A
+run that has started can't be interrupted and finishes; ``stats()`` shows
+how many results were used.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections
+
+from . import job_descriptions, llm_ledger, metrics, singleflight
+from .llm_client import parse_resume_with_llama
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # the upload limit shown on the pages
+UPLOAD_EXTENSIONS = ('.pdf', '.doc', '.docx', '.txt')
+
+KIND_DOCUMENT = 'document'
+KIND_JOB = 'job'
+
+STARTED = 'started'
+RUNNING = 'running'
+CACHED = 'cached'
+BUSY = 'busy'
+OVER_BUDGET = 'over_budget'
+DISABLED = 'disabled'
+
+_lock = threading.Lock()
+_executor = None
+_inflight = {}  # key -> Future
+_latest = {}    # (user_id, kind) -> key of the user's newest run
+
+
+def _settings():
+    return (
+        getattr(settings, 'SPECULATIVE_WORKERS', 2),
+        getattr(settings, 'SPECULATIVE_QUEUE_SIZE', 4),
+        getattr(settings, 'SPECULATIVE_BUDGET', 10),
+        getattr(settings, 'SPECULATIVE_TTL', 900),
+        getattr(settings, 'SPECULATIVE_MAX_QUEUE_WAIT', 30),
+    )
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_settings()[0], thread_name_prefix='speculative')
+        return _executor
+
+
+def document_key(user_id, digest):
+    return singleflight.request_key(user_id, 'speculative_document', digest)
+
+
+def job_key(job_text):
+    # Job rows are shared, so a run started by any user is reused
+    return f"speculative_job:{job_descriptions.text_hash(job_text)}"
+
+
+def _result_key(key):
+    return f"speculative:result:{key}"
+
+
+def _charge(user_id):
+    """Count one run against the user's hourly budget; False when it is used up."""
+    budget = _settings()[2]
+    budget_key = f"speculative:budget:{user_id}:{int(time.time() // 3600)}"
+    cache.add(budget_key, 0, 3600)
+    try:
+        return cache.incr(budget_key) <= budget
+    except ValueError:  # expired between add and incr
+        cache.set(budget_key, 1, 3600)
+        return True
+
+
+def _admit(user_id, key):
+    """Why a new run for ``key`` should not start, or None."""
+    workers, queue_size, budget, _, _ = _settings()
+    if budget <= 0:
+        return DISABLED
+    with _lock:
+        if key in _inflight:
+            return RUNNING
+        pending = len(_inflight)
+    if cache.get(_result_key(key)) is not None:
+        return CACHED
+    if pending >= workers + queue_size:
+        metrics.incr('speculative.busy')
+        return BUSY
+    if not _charge(user_id):
+        metrics.incr('speculative.over_budget')
+        return OVER_BUDGET
+    return None
+
+
+def _run(key, work, queued_at, cleanup):
+    if time.monotonic() - queued_at > _settings()[4]:
+        metrics.incr('speculative.expired')
+        if cleanup:
+            cleanup()
+        return
+    close_old_connections()
+    started = time.monotonic()
+    try:
+        cache.set(_result_key(key), work(), _settings()[3])
+        metrics.incr('speculative.finished')
+    finally:
+        metrics.observe('speculative.run', time.monotonic() - started)
+        close_old_connections()
+
+
+def _submit(user_id, kind, key, work, cleanup=None):
+    """Queue ``work`` (returns the value to cache) and cancel the user's older queued run of this kind."""
+    queued_at = time.monotonic()
+    executor = _get_executor()
+
+    def charged_work():
+        with llm_ledger.charged_to(user_id):
+            return work()
+    with _lock:
+        duplicate = key in _inflight
+        if not duplicate:
+            previous = _inflight.get(_latest.get((user_id, kind)))
+            future = executor.submit(_run, key, charged_work, queued_at, cleanup)
+            _inflight[key] = future
+            _latest[(user_id, kind)] = key
+    if duplicate:
+        if cleanup:
+            cleanup()
+        return RUNNING
+    # Outside the lock: cancel() runs the done callback, which takes it
+    if previous is not None and previous.cancel():
+        metrics.incr('speculative.cancelled')
+
+    def done(finished):
+        with _lock:
+            if _inflight.get(key) is finished:
+                del _inflight[key]
+        if finished.cancelled():
+            if cleanup:
+                cleanup()
+        elif finished.exception() is not None:
+            metrics.incr('speculative.failed')
+            logger.warning(f"Speculative {kind} run failed: {type(finished.exception()).__name__}: {finished.exception()}")
+
+    future.add_done_callback(done)
+    metrics.incr('speculative.started')
+    return STARTED
+
+
+def start_document(user_id, uploaded_file):
+    """Start parsing ``uploaded_file`` to text in the background; returns a status string."""
+    key = document_key(user_id, singleflight.file_digest(uploaded_file))
+    refused = _admit(user_id, key)
+    if refused:
+        return refused
+
+    fs = FileSystemStorage()
+    file_path = fs.path(fs.save(uploaded_file.name, uploaded_file))
+
+    def remove():
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logger.warning(f"Could not clean up speculative upload: {e}")
+
+    def work():
+        try:
+            return parse_resume_with_llama(file_path)
+        finally:
+            remove()
+
+    return _submit(user_id, KIND_DOCUMENT, key, work, cleanup=remove)
+
+
+def start_job(user_id, job_text):
+    """Start storing ``job_text`` and extracting its title/company and requirements in the background."""
+    key = job_key(job_text)
+    refused = _admit(user_id, key)
+    if refused:
+        return refused
+
+    def work():
+        return job_descriptions.resolve_job(job_text, with_requirements=True).pk
+
+    return _submit(user_id, KIND_JOB, key, work)
+
+
+def _wait(key):
+    with _lock:
+        future = _inflight.get(key)
+    if future is not None:
+        try:
+            future.result(timeout=getattr(settings, 'SINGLEFLIGHT_TIMEOUT', 300))
+        except Exception:
+            pass  # cancelled, failed or too slow: the caller does the work itself
+    result = cache.get(_result_key(key))
+    if result is not None:
+        metrics.incr('speculative.claimed')
+    return result
+
+
+def document_text(user_id, digest, parse):
+    """Text of the uploaded file with ``digest``, from its speculative parse if there was one, else ``parse()``."""
+    text = _wait(document_key(user_id, digest))
+    return text if text is not None else parse()
+
+
+def wait_for_job(job_text):
+    """Let a speculative extraction of ``job_text`` that is still running finish before the job is resolved."""
+    _wait(job_key(job_text))
+
+
+def stats(data=None):
+    """Speculative runs and how many of their results were used, from a metrics snapshot."""
+    counters = (data or metrics.snapshot())['counters']
+    finished = counters.get('speculative.finished', 0)
+    claimed = counters.get('speculative.claimed', 0)
+    with _lock:
+        pending = len(_inflight)
+    return {
+        'started': counters.get('speculative.started', 0),
+        'finished': finished,
+        'claimed': claimed,
+        'unclaimed': max(0, finished - claimed),
+        'cancelled': counters.get('speculative.cancelled', 0) + counters.get('speculative.expired', 0),
+        'refused': counters.get('speculative.busy', 0) + counters.get('speculative.over_budget', 0),
+        'failed': counters.get('speculative.failed', 0),
+        'pending': pending,
+    }
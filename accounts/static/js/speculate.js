@@ -0,0 +1,63 @@
+// Speculative pre-processing (accounts/speculative.py): once a selected file or pasted
+// job description stops changing, send it to the server so parsing starts before submit.
+// Failures are ignored; the form submit does the work itself when nothing was prepared.
+(function () {
+    const url = document.currentScript.dataset.url;
+    const MIN_CHARS = 200;  // SPECULATIVE_MIN_CHARS default; the server refuses shorter text
+    const TEXT_DEBOUNCE_MS = 1500;
+    const FILE_DEBOUNCE_MS = 500;
+    const MAX_FILE_BYTES = 10 * 1024 * 1024;
+    let lastSent = null;
+
+    function csrfToken() {
+        const input = document.querySelector('[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    function send(field, value, fingerprint) {
+        if (fingerprint === lastSent) {
+            return;
+        }
+        lastSent = fingerprint;
+        const body = new FormData();
+        body.append(field, value);
+        fetch(url, {
+            method: 'POST',
+            body: body,
+            credentials: 'same-origin',
+            headers: {'X-CSRFToken': csrfToken(), 'Accept': 'application/json'}
+        }).catch(function () {});
+    }
+
+    function debounce(fn, delay) {
+        let timer = null;
+        return function () {
+            clearTimeout(timer);
+            timer = setTimeout(fn, delay);
+        };
+    }
+
+    window.speculateOnFile = function (input, field) {
+        if (!input) {
+            return;
+        }
+        input.addEventListener('change', debounce(function () {
+            const file = input.files[0];
+            if (file && file.size <= MAX_FILE_BYTES) {
+                send(field, file, `${field}:${file.name}:${file.size}:${file.lastModified}`);
+            }
+        }, FILE_DEBOUNCE_MS));
+    };
+
+    window.speculateOnText = function (textarea) {
+        if (!textarea) {
+            return;
+        }
+        textarea.addEventListener('input', debounce(function () {
+            const text = textarea.value.trim();
+            if (text.length >= MIN_CHARS) {
+                send('job_text', text, 'job_text:' + text);
+            }
+        }, TEXT_DEBOUNCE_MS));
+    };
+})();
@@ -1,3 +1,699 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import threading
+from datetime import date, datetime
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import include, path
+
+from . import (
+    admission, async_views, experience, exports, fields, job_descriptions, llm_client, llm_ledger, llm_routing,
+    local_extractor, metrics, near_duplicates, rescoring, resume_parser, rollups, schemas, scoring, segmenter, singleflight,
+    views,
+)
+from .job_descriptions import DEFAULT_INFO
+from .models import AnalyticsRollup, JobDescription, LLMCall, ResumeAnalysis, SkillGap, UserProfile
+
+# The async views, for tests run with ROOT_URLCONF='accounts.tests'
+urlpatterns = [
+    path('async/dashboard/', async_views.dashboard),
+    path('async/profile/', async_views.profile),
+    path('', include('resume_matcher.urls')),
+]
+
+# Templates extend base.html, which needs {% static %} without a collectstatic manifest
+PLAIN_STATIC = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+class JobDescriptionDedupTests(TestCase):
+    def test_whitespace_variants_share_one_row_but_case_does_not(self):
+        with mock.patch.object(job_descriptions, 'extract_job_info', return_value={'title': 'Engineer', 'company': 'Acme'}):
+            first = job_descriptions.resolve_job("Senior Engineer\nPython, Django")
+            again = job_descriptions.resolve_job("  Senior   Engineer\r\nPython,  Django ")
+            other = job_descriptions.resolve_job("senior engineer\npython, django")
+        self.assertEqual(first.pk, again.pk)
+        self.assertNotEqual(first.pk, other.pk)
+        self.assertEqual(JobDescription.objects.count(), 2)
+
+    def test_extracted_info_is_reused(self):
+        with mock.patch.object(job_descriptions, 'extract_job_info', return_value={'title': 'Engineer', 'company': 'Acme'}) as extract:
+            job_descriptions.resolve_job("Backend engineer, Go and Postgres")
+            job = job_descriptions.resolve_job("Backend engineer, Go and Postgres")
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual((job.title, job.company), ('Engineer', 'Acme'))
+        self.assertTrue(job.info_extracted)
+
+    def test_failed_extraction_is_not_cached(self):
+        with mock.patch.object(job_descriptions, 'extract_job_info', return_value=dict(DEFAULT_INFO)) as extract:
+            job = job_descriptions.resolve_job("Data analyst, SQL")
+            job_descriptions.resolve_job("Data analyst, SQL")
+        self.assertEqual(extract.call_count, 2)
+        self.assertEqual(job.title, DEFAULT_INFO['title'])
+        self.assertFalse(JobDescription.objects.get(pk=job.pk).info_extracted)
+
+        with mock.patch.object(job_descriptions, 'extract_job_info', return_value={'title': 'Analyst', 'company': 'Initech'}):
+            job = job_descriptions.resolve_job("Data analyst, SQL")
+        self.assertEqual(job.title, 'Analyst')
+        self.assertTrue(JobDescription.objects.get(pk=job.pk).info_extracted)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_callers_share_one_run(self):
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'parsed'
+
+        def caller():
+            results.append(singleflight.run_once('user:1:upload', work))
+
+        threads = [threading.Thread(target=caller) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('parsed', False), ('parsed', False), ('parsed', True)])
+
+    def test_errors_reach_every_caller(self):
+        with self.assertRaises(ValueError):
+            singleflight.run_once('user:1:broken', mock.Mock(side_effect=ValueError("bad file")))
+
+
+@override_settings(ADMISSION_GLOBAL_LIMIT=4, ADMISSION_USER_LIMIT=1, ADMISSION_QUEUE_SIZE=0, STORAGES=PLAIN_STATIC)
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = User(pk=1, username='alice')
+        self.started, self.release = threading.Event(), threading.Event()
+        self.runs = []
+
+        def analyze(request):
+            def work():
+                self.runs.append(1)
+                self.started.set()
+                self.release.wait(5)
+                return 'done'
+            result, _ = singleflight.run_once(admission.request_key(request), work)
+            return HttpResponse(result)
+
+        self.view = admission.admission_controlled(analyze)
+
+    def post(self, data, **headers):
+        request = self.factory.post('/dashboard/', data, **headers)
+        request.user = self.user
+        return self.view(request)
+
+    def test_duplicate_joins_and_distinct_request_is_refused(self):
+        responses = []
+        first = threading.Thread(target=lambda: responses.append(self.post({'job_description': 'Go developer'})))
+        first.start()
+        self.started.wait(5)
+        duplicate = threading.Thread(target=lambda: responses.append(self.post({'job_description': 'Go developer'})))
+        duplicate.start()
+
+        with self.assertTemplateUsed('account/try_later.html'):
+            refused = self.post({'job_description': 'Rust developer'})
+        self.assertEqual(refused.status_code, 429)
+        self.assertTrue(refused['Retry-After'].isdigit())
+
+        self.release.set()
+        first.join(5)
+        duplicate.join(5)
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(len(self.runs), 1)
+        self.assertEqual(admission._gate.running, 0)
+        self.assertFalse(admission._gate.per_user)
+
+    def test_xhr_clients_get_json(self):
+        admission._gate.per_user[self.user.pk]['another request'] = 1
+        try:
+            response = self.post({'job_description': 'Go developer'}, HTTP_ACCEPT='application/json')
+        finally:
+            del admission._gate.per_user[self.user.pk]
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(json.loads(response.content)['status'], 'error')
+
+
+@override_settings(STORAGES=PLAIN_STATIC, ROOT_URLCONF='accounts.tests')
+class AsyncAdmissionTests(TestCase):
+    async def test_refused_page_posts_get_the_try_later_page(self):
+        user = await User.objects.acreate_user('dora', password='x')
+        await self.async_client.aforce_login(user)
+        admission._gate.per_user[user.pk]['another request'] = 1
+        try:
+            response = await self.async_client.post('/async/dashboard/', {'job_text': 'Go developer'})
+        finally:
+            del admission._gate.per_user[user.pk]
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'account/try_later.html')
+        self.assertTrue(response['Retry-After'].isdigit())
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('bob', password='x')
+        self.profile = UserProfile.objects.create(user=self.user)
+
+    def analyze(self, fit, missing):
+        return ResumeAnalysis.objects.create(
+            user_profile=self.profile,
+            match_score=fit,
+            summary={'overall_fit_percentage': fit, 'areas_of_improvement': ['Testing']},
+            detailed_analysis={'overall_recommendation': 'Good fit'},
+            skill_matches=[{'skill': skill, 'score': 0} for skill in missing] + [{'skill': 'Python', 'score': 2}],
+        )
+
+    def test_create_and_delete_keep_rollups_in_step(self):
+        first = self.analyze(80, ['Kubernetes'])
+        self.analyze(60, ['kubernetes', 'Terraform'])
+        stats = rollups.user_stats(self.profile)
+        self.assertEqual(stats['analysis_count'], 2)
+        self.assertEqual(stats['average_fit'], 70)
+        self.assertEqual(stats['recommendations'], {'Good fit': 2})
+        self.assertEqual(stats['top_missing_skills'][0], {'label': 'Kubernetes', 'count': 2})
+        self.assertEqual(SkillGap.objects.get(skill='kubernetes').missing_count, 2)
+
+        first.delete()
+        stats = rollups.user_stats(self.profile)
+        self.assertEqual(stats['analysis_count'], 1)
+        self.assertEqual(stats['average_fit'], 60)
+        self.assertEqual(SkillGap.objects.get(skill='kubernetes').missing_count, 1)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        self.analyze(90, ['Go'])
+        self.analyze(50, ['Go', 'SQL'])
+        incremental = rollups.user_stats(self.profile)
+        self.assertEqual(rollups.rebuild(), 2)
+        self.assertEqual(rollups.user_stats(self.profile), incremental)
+
+    def test_contribution_lands_when_the_row_already_exists(self):
+        # What a concurrent first analysis of the same user leaves behind
+        AnalyticsRollup.objects.create(user_profile=self.profile)
+        self.analyze(75, [])
+        self.assertEqual(AnalyticsRollup.objects.get(user_profile=self.profile).analysis_count, 1)
+
+    def test_limit_is_validated(self):
+        for skill in ('A', 'B', 'C'):
+            self.analyze(50, [skill])
+        self.client.force_login(self.user)
+        for limit, expected in (('abc', 3), ('-5', 1), ('0', 1), ('2', 2), ('100000', 3)):
+            response = self.client.get('/analytics/', {'limit': limit})
+            self.assertEqual(response.status_code, 200, limit)
+            self.assertEqual(len(response.json()['top_missing_skills']), expected, limit)
+
+
+class DedupedJSONFieldTests(TestCase):
+    def setUp(self):
+        self.parsed = {
+            'first_name': 'Ann', 'skills': ['Python', 'SQL'], 'projects': [{'name': 'Matcher'}],
+            'summary': 'Backend developer', 'work_experience': [{'company': 'Acme'}],
+        }
+        user = User.objects.create_user('ann')
+        self.profile = UserProfile.objects.create(
+            user=user, first_name='Ann', skills=['Python', 'SQL'], projects=[], parsed_resume_data=self.parsed,
+        )
+
+    def test_round_trip(self):
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual(profile.parsed_resume_data, self.parsed)
+
+    def test_only_matching_keys_are_left_out(self):
+        stored = UserProfile.objects.values_list('parsed_resume_data', flat=True).get(pk=self.profile.pk)
+        self.assertNotIn('first_name', stored)
+        self.assertNotIn('skills', stored)
+        self.assertEqual(stored['projects'], [{'name': 'Matcher'}])  # differs from the column
+        self.assertNotIn(UserProfile._meta.get_field('parsed_resume_data').FROM_COLUMNS_KEY, stored)
+
+    def test_deferred_columns_load_in_one_query(self):
+        profile = UserProfile.objects.only('id', 'parsed_resume_data').get(pk=self.profile.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(profile.parsed_resume_data, self.parsed)
+
+    def stored_blob(self):
+        # The raw column, marker included (from_db_value takes it out)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT parsed_resume_data FROM {UserProfile._meta.db_table} WHERE id = %s", [self.profile.pk])
+            return fields.decode(cursor.fetchone()[0])
+
+    def test_recompute_experience_keeps_repeated_keys_out(self):
+        self.parsed['experience'] = [{'company': 'Acme', 'start': '01-2020', 'end': '12-2021', 'type': 'work'}]
+        self.profile.parsed_resume_data = self.parsed
+        self.profile.save()
+
+        call_command('recompute_experience', stdout=StringIO())
+
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual((profile.work_experience_years, profile.work_experience_months), (2, 0))
+        stored = self.stored_blob()
+        self.assertNotIn('skills', stored)
+        self.assertNotIn('first_name', stored)
+        self.assertEqual(sorted(stored['_from_columns']), ['first_name', 'skills'])
+        self.assertEqual(profile.parsed_resume_data['skills'], ['Python', 'SQL'])
+        self.assertEqual(profile.parsed_resume_data['work_experience'], {'years': 2, 'months': 0})
+
+
+class LedgerBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('carol', password='x')
+        for target in ('_ensure_writer', 'close_old_connections'):
+            patcher = mock.patch.object(llm_ledger, target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        llm_ledger.flush()
+
+    def test_queued_and_written_calls_count_toward_today(self):
+        with llm_ledger.charged_to(self.user.pk):
+            llm_ledger.record('comparison', 'gemini-2.5-flash', 1.2, input_tokens=1000, output_tokens=200)
+            llm_ledger.record('comparison', 'gemini-2.5-flash', 0.4, llm_ledger.TIMEOUT)
+        llm_ledger.record('job_info', 'gemini-2.5-flash', 0.3, input_tokens=50)  # not charged to anyone
+        self.assertEqual(llm_ledger.tokens_used_today(self.user.pk), 1200)
+
+        self.assertEqual(llm_ledger.flush(), 3)
+        self.assertEqual(LLMCall.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(llm_ledger.tokens_used_today(self.user.pk), 1200)
+
+    @override_settings(LLM_DAILY_TOKEN_BUDGET=1000)
+    def test_posts_are_refused_once_the_budget_is_used(self):
+        with llm_ledger.charged_to(self.user.pk):
+            llm_ledger.record('comparison', 'gemini-2.5-flash', 1.0, input_tokens=900, output_tokens=100)
+        llm_ledger.flush()
+        self.client.force_login(self.user)
+        response = self.client.post('/analyze-multiple/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['status'], 'over_budget')
+        self.assertIn('Retry-After', response)
+
+    @override_settings(LLM_DAILY_TOKEN_BUDGET=1000, STORAGES=PLAIN_STATIC, ROOT_URLCONF='accounts.tests')
+    async def test_async_views_check_the_budget(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/async/dashboard/')
+        self.assertRedirects(response, '/profile/', fetch_redirect_response=False)
+
+        with llm_ledger.charged_to(self.user.pk):
+            llm_ledger.record('comparison', 'gemini-2.5-flash', 1.0, input_tokens=1000)
+        await sync_to_async(llm_ledger.flush)()
+        response = await self.async_client.post('/async/dashboard/')
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'account/try_later.html')
+
+    @override_settings(LLM_DAILY_TOKEN_BUDGET=1000, STORAGES=PLAIN_STATIC)
+    def test_page_posts_get_the_try_later_page(self):
+        with llm_ledger.charged_to(self.user.pk):
+            llm_ledger.record('comparison', 'gemini-2.5-flash', 1.0, input_tokens=1000)
+        llm_ledger.flush()
+        self.client.force_login(self.user)
+        response = self.client.post('/analyze-multiple/')
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'account/try_later.html')
+        self.assertContains(response, 'It resets at midnight UTC.', status_code=429)
+        self.assertIn('Retry-After', response)
+
+
+def reply(payload):
+    return SimpleNamespace(text=payload if isinstance(payload, str) else json.dumps(payload))
+
+
+VALID_COMPARISON = {
+    'skill_matches': [{'skill': 'Python', 'requirement': '3+ years of Python', 'score': 2, 'category': 'technical'}],
+    'summary': {'relevant_strengths': ['Python'], 'areas_of_improvement': [], 'suggested_learning_path': []},
+}
+
+
+class SchemaTests(SimpleTestCase):
+    def setUp(self):
+        self.prompt = resume_parser.build_comparison_prompt({'skills': ['Python']}, "Python developer")
+
+    def failures(self):
+        return metrics.snapshot()['counters'].get('llm.comparison.schema_failures', 0)
+
+    def test_valid_payload_passes(self):
+        self.assertEqual(schemas.validate('comparison', self.prompt, VALID_COMPARISON), VALID_COMPARISON)
+
+    def test_out_of_range_score_is_rejected_and_counted(self):
+        before = self.failures()
+        bad = json.loads(json.dumps(VALID_COMPARISON))
+        bad['skill_matches'][0]['score'] = 5
+        with self.assertRaisesRegex(ValueError, 'skill_matches/0/score'):
+            schemas.validate('comparison', self.prompt, bad)
+        self.assertEqual(self.failures(), before + 1)
+
+    def test_missing_required_key_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "'summary' is a required property"):
+            schemas.validate('comparison', self.prompt, {'skill_matches': []})
+
+    def test_gemini_schema_dialect(self):
+        converted = schemas.to_gemini_schema(schemas.SKILL_MATCH)
+        self.assertEqual(converted['type'], 'OBJECT')
+        self.assertTrue(converted['properties']['resume_evidence']['nullable'])
+        self.assertNotIn('minimum', converted['properties']['score'])  # still enforced by validate()
+        self.assertEqual(converted['required'], schemas.SKILL_MATCH['required'])
+
+
+class StructuredCompletionTests(TestCase):
+    def setUp(self):
+        self.prompt = resume_parser.build_comparison_prompt({'skills': ['Python']}, "Python developer")
+
+    def test_invalid_reply_is_asked_for_again(self):
+        with mock.patch.object(llm_routing, 'complete', side_effect=[reply("Sorry, no JSON"), reply(VALID_COMPARISON)]) as complete:
+            result = resume_parser.complete_structured(llm_routing.COMPARISON, self.prompt)
+        self.assertEqual(complete.call_count, 2)
+        self.assertEqual(result, VALID_COMPARISON)
+
+    def test_gives_up_after_the_last_attempt(self):
+        with mock.patch.object(llm_routing, 'complete', return_value=reply({'skill_matches': []})) as complete:
+            with self.assertRaises(ValueError):
+                resume_parser.complete_structured(llm_routing.COMPARISON, self.prompt)
+        self.assertEqual(complete.call_count, resume_parser.SCHEMA_ATTEMPTS)
+
+    def test_failed_comparison_raises_instead_of_scoring_zero(self):
+        with mock.patch.object(llm_routing, 'complete', return_value=reply({'skill_matches': []})):
+            with self.assertRaises(ValueError):
+                resume_parser.compare_resume_with_jobdesc({'skills': ['Python']}, "Python developer")
+
+    def test_failed_comparison_is_not_saved(self):
+        profile = UserProfile.objects.create(user=User.objects.create_user('dana'))
+        job = JobDescription.objects.create(text_hash='x' * 64, text="Python developer", info_extracted=True)
+        with mock.patch.object(views.speculative, 'wait_for_job'), \
+                mock.patch.object(job_descriptions, 'resolve_job', return_value=job), \
+                mock.patch.object(llm_routing, 'complete', return_value=reply({'skill_matches': []})):
+            with self.assertRaises(ValueError):
+                views.analyze_job_description(profile, {'skills': ['Python']}, "Python developer")
+        self.assertFalse(ResumeAnalysis.objects.exists())
+
+    def test_multi_comparison_saves_only_successful_jobs(self):
+        user = User.objects.create_user('erin', password='x')
+        UserProfile.objects.create(user=user, parsed_resume_data={'skills': ['Python']})
+        jobs = [
+            JobDescription.objects.create(text_hash=str(index) * 64, text=f"Job {index}", info_extracted=True)
+            for index in range(2)
+        ]
+        self.client.force_login(user)
+        with mock.patch.object(job_descriptions, 'resolve_jobs', return_value=jobs), \
+                mock.patch.object(job_descriptions, 'compare_with_jobs', return_value=[{**VALID_COMPARISON, 'summary': {'overall_fit_percentage': 80}}, None]):
+            self.client.post('/analyze-multiple/', {'job_texts': "Job 0\n---\nJob 1"})
+        self.assertEqual(list(ResumeAnalysis.objects.values_list('job_id', flat=True)), [jobs[0].pk])
+
+
+class ExperienceTests(SimpleTestCase):
+    TODAY = datetime(2024, 6, 15)
+
+    def work_months(self, *experience_lists):
+        work, _ = experience.bulk_experience_totals(experience_lists, today=self.TODAY)
+        return work.tolist()
+
+    def test_months_are_counted_inclusively(self):
+        self.assertEqual(self.work_months([{'start': '01-2020', 'end': '12-2020'}]), [12])
+        self.assertEqual(self.work_months([{'start': '03-2021', 'end': '03-2021'}]), [1])
+        # A bare year starts in January and ends in December
+        self.assertEqual(self.work_months([{'start': '2019', 'end': '2019'}]), [12])
+
+    def test_overlapping_intervals_are_merged(self):
+        jobs = [
+            {'start': '01-2020', 'end': '06-2020'},
+            {'start': '04-2020', 'end': '12-2020'},
+            {'start': '01-2021', 'end': '03-2021'},
+        ]
+        self.assertEqual(self.work_months(jobs), [15])
+        self.assertEqual(experience.merge_and_sum(jobs), 15)
+
+    def test_profiles_and_kinds_are_kept_apart(self):
+        first = [{'start': '01-2020', 'end': '12-2020'}]
+        second = [
+            {'start': '06-2023', 'end': 'CURRENT', 'designation': 'Research Assistant'},
+            {'start': '05-2023', 'end': '01-2019'},  # ends before it starts
+            {'start': 'someday', 'end': '2020'},
+        ]
+        work, research = experience.bulk_experience_totals([first, second, []], today=self.TODAY)
+        self.assertEqual(work.tolist(), [12, 0, 0])
+        self.assertEqual(research.tolist(), [0, 13, 0])
+
+
+class LocalExtractorTests(SimpleTestCase):
+    def test_two_digit_years_pivot_ten_years_ahead(self):
+        today = date(2024, 3, 1)
+        self.assertEqual(local_extractor.expand_year('98', today), '1998')
+        self.assertEqual(local_extractor.expand_year('05', today), '2005')
+        self.assertEqual(local_extractor.expand_year('34', today), '2034')
+        self.assertEqual(local_extractor.expand_year('35', today), '1935')
+
+    def test_dates_are_normalized(self):
+        with mock.patch.object(local_extractor.datetime, 'date', wraps=date) as fake_date:
+            fake_date.today.return_value = date(2024, 3, 1)
+            self.assertEqual(local_extractor.normalize_date("Jun '98"), '06-1998')
+            self.assertEqual(local_extractor.normalize_date("Sept 21"), '09-2021')
+        self.assertEqual(local_extractor.normalize_date('01/2020'), '01-2020')
+        self.assertEqual(local_extractor.normalize_date('2018'), '2018')
+        self.assertEqual(local_extractor.normalize_date('Present'), 'CURRENT')
+
+    def test_missing_experience_dates_come_from_the_text(self):
+        text = "Acme Corp, Software Engineer\nJan 2019 - Present\nBeta Labs\n03/2016 - 12/2018"
+        data = {'experience': [
+            {'company': 'Acme Corp', 'start': 'Jan 2019', 'end': None},
+            {'company': 'Beta Labs', 'start': '03-2016', 'end': '12-2018'},
+        ]}
+        local_extractor.merge_date_ranges(data, local_extractor.find_date_ranges(text))
+        self.assertEqual(data['experience'][0]['end'], 'CURRENT')
+        self.assertEqual(data['experience'][1]['end'], '12-2018')
+
+    def test_contact_fields(self):
+        text = "Jane Doe\njane.doe@example.com | +1 (555) 123-4567\n\nEducation\nB.Sc, 2015 - 2018"
+        self.assertEqual(local_extractor.find_emails(text), ['jane.doe@example.com'])
+        self.assertEqual(len(local_extractor.find_phones(text)), 1)
+        self.assertEqual(local_extractor.guess_name(text), ('Jane', 'Doe'))
+
+
+class SegmenterTests(SimpleTestCase):
+    RESUME = (
+        "Jane Doe\njane@example.com\n\n"
+        "## Education\nB.Tech, XYZ University, 2015 - 2019\n\n"
+        "## Experience\nAcme Corp, Engineer, 2019 - Present\n\n"
+        "## Skills\nPython, Django, SQL, Docker\n"
+    )
+
+    def test_sections_are_found_by_heading(self):
+        segmented = segmenter.segment_resume(self.RESUME)
+        sections = segmented['sections']
+        self.assertEqual(set(sections), {'contact', 'education', 'experience', 'skills'})
+        self.assertEqual(sections['skills']['titles'], ['Skills'])
+        self.assertIn('Acme Corp', sections['experience']['text'])
+        self.assertTrue(segmenter.is_segmentable(segmented))
+        self.assertFalse(segmenter.is_segmentable(segmenter.segment_resume("Just a paragraph of text.")))
+
+    def test_only_edited_sections_change(self):
+        old = segmenter.segment_resume(self.RESUME)
+        new = segmenter.segment_resume(self.RESUME.replace('Docker', 'Kubernetes'))
+        self.assertEqual(segmenter.changed_sections(old, new), {'skills'})
+        self.assertEqual(segmenter.changed_sections(old, old), set())
+        # An older segmenter version re-extracts everything
+        self.assertTrue({'education', 'experience', 'skills'} <= segmenter.changed_sections(dict(old, version=0), new))
+
+
+class RescoringTests(SimpleTestCase):
+    MATCHES = [
+        {'skill': 'Docker', 'category': 'technical', 'resume_evidence': ''},
+        {'skill': 'Python', 'category': 'technical', 'resume_evidence': 'Built the matcher in Python'},
+        {'skill': 'Teamwork', 'category': 'soft', 'resume_evidence': ''},
+        {'skill': 'B.Sc Computer Science', 'category': 'education', 'resume_evidence': ''},
+    ]
+
+    def test_diff_lists_added_and_removed_items(self):
+        diff = rescoring.diff_resume({'skills': ['Python', 'SQL']}, {'skills': ['python', 'Docker'], 'interests': []})
+        self.assertEqual(diff, {'skills': {'added': ['Docker'], 'removed': ['SQL']}})
+        self.assertEqual(rescoring.diff_resume({'skills': ['Python']}, {'skills': ['Python']}), {})
+
+    def test_only_matches_the_change_can_affect_are_selected(self):
+        diff = rescoring.diff_resume({'skills': ['Python']}, {'skills': ['Python', 'Docker']})
+        self.assertEqual(rescoring.affected_matches(self.MATCHES, diff), [0])
+        self.assertEqual(rescoring.affected_matches(self.MATCHES, {}), [])
+
+    def test_education_changes_affect_every_education_match(self):
+        diff = rescoring.diff_resume({'education': []}, {'education': [{'degree': 'M.Sc', 'institution': 'XYZ'}]})
+        self.assertEqual(rescoring.affected_matches(self.MATCHES, diff), [3])
+
+    def test_removed_items_quoted_as_evidence_are_affected(self):
+        old = {'projects': [{'name': 'Built the matcher', 'description': 'in Python'}], 'skills': ['Python']}
+        new = {'projects': [], 'skills': ['Python']}
+        diff = rescoring.diff_resume(old, new)
+        self.assertIn(1, rescoring.affected_matches(self.MATCHES, diff))
+
+
+class ScoringTests(SimpleTestCase):
+    def test_aggregate_weights_each_match(self):
+        matches = [
+            {'skill': 'Python', 'score': 2, 'category': 'technical', 'weight': 3},
+            {'skill': 'Go', 'score': 0, 'category': 'technical'},
+            {'skill': 'Teamwork', 'score': 1, 'category': 'soft'},
+        ]
+        summary, detailed = scoring.aggregate(matches, {'relevant_strengths': ['Python']})
+        self.assertEqual(summary['total_score'], 7)
+        self.assertEqual(summary['max_possible_score'], 10)
+        self.assertEqual(summary['overall_fit_percentage'], 70)
+        self.assertEqual(summary['relevant_strengths'], ['Python'])
+        self.assertEqual(detailed['technical_skills_score'], 75)
+        self.assertEqual(detailed['soft_skills_score'], 50)
+        self.assertEqual(detailed['experience_score'], 0)
+        self.assertEqual(detailed['overall_recommendation'], 'Good Match')
+
+    def test_recommendation_tiers(self):
+        self.assertEqual(scoring.recommendation_for(100), 'Strong Match')
+        self.assertEqual(scoring.recommendation_for(80), 'Strong Match')
+        self.assertEqual(scoring.recommendation_for(79), 'Good Match')
+        self.assertEqual(scoring.recommendation_for(40), 'Moderate Match')
+        self.assertEqual(scoring.recommendation_for(39), 'Weak Match')
+
+    def test_finalize_clamps_scores_and_categories(self):
+        result = scoring.finalize_comparison({'skill_matches': [
+            {'skill': 'Rust', 'score': 5, 'category': 'Languages', 'weight': 9},
+            {'skill': 'Ownership', 'score': '-1', 'category': 'Soft'},
+            'not a match',
+        ]})
+        self.assertEqual([m['score'] for m in result['skill_matches']], [2, 0])
+        self.assertEqual([m['category'] for m in result['skill_matches']], ['technical', 'soft'])
+        self.assertEqual(result['summary']['total_score'], 6)
+        self.assertEqual(result['summary']['max_possible_score'], 8)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('alice', password='pw')
+        profile = UserProfile.objects.create(user=user, first_name='Alice', skills=['Python', 'SQL'])
+        self.analysis = ResumeAnalysis.objects.create(
+            user_profile=profile, job_title='Engineer', job_company='Acme', match_score=70.0,
+            skill_matches=[{'skill': 'Python', 'score': 2}],
+            summary={'overall_fit_percentage': 70, 'total_score': 7, 'max_possible_score': 10},
+            detailed_analysis={'overall_recommendation': 'Good Match'},
+        )
+
+    def test_csv_has_a_header_and_json_encoded_lists(self):
+        rows = list(csv.reader(''.join(exports.iter_export('analyses', 'csv')).splitlines()))
+        self.assertEqual(rows[0], exports.ANALYSIS_COLUMNS)
+        self.assertEqual(len(rows), 2)
+        row = dict(zip(rows[0], rows[1]))
+        self.assertEqual(row['username'], 'alice')
+        self.assertEqual(row['overall_fit_percentage'], '70')
+        self.assertEqual(row['overall_recommendation'], 'Good Match')
+        self.assertEqual(row['is_stale'], 'False')
+        self.assertEqual(json.loads(row['skill_matches']), [{'skill': 'Python', 'score': 2}])
+
+    def test_jsonl_has_one_object_per_line(self):
+        lines = list(exports.iter_export('profiles', 'jsonl'))
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith('\n'))
+        row = json.loads(lines[0])
+        self.assertEqual(list(row), exports.PROFILE_COLUMNS)
+        self.assertEqual(row['username'], 'alice')
+        self.assertEqual(row['skills'], ['Python', 'SQL'])
+
+    def test_rows_are_streamed_in_constant_queries(self):
+        ResumeAnalysis.objects.create(user_profile=self.analysis.user_profile, job_title='Analyst')
+        with self.assertNumQueries(1):
+            rows = list(exports.iter_export('analyses', 'jsonl'))
+        self.assertEqual([json.loads(line)['job_title'] for line in rows], ['Engineer', 'Analyst'])
+
+
+class NearDuplicateTests(SimpleTestCase):
+    POSTING = (
+        "Senior Backend Engineer at Acme. You will design and build scalable APIs in Python and Django, "
+        "own our Postgres data model, mentor junior engineers and work closely with product on the roadmap. "
+        "Requirements: five years of backend experience, strong SQL, experience with Celery, Redis and Docker, "
+        "and a habit of writing tests. Nice to have: Kubernetes and AWS."
+    )
+
+    def test_copies_with_board_chrome_are_near_duplicates(self):
+        copy = f"Apply now\n{self.POSTING}\nhttps://jobs.example.com/123\nEqual opportunity employer"
+        sig = near_duplicates.signature(self.POSTING)
+        self.assertEqual(len(sig), near_duplicates.NUM_PERM)
+        self.assertEqual(near_duplicates.similarity(sig, near_duplicates.signature(copy)), 1.0)
+        self.assertEqual(near_duplicates.signature(''), [])
+
+    def test_index_applies_the_threshold(self):
+        edited = self.POSTING.replace("Nice to have: Kubernetes and AWS.", "Nice to have: GCP.")
+        unrelated = (
+            "Registered nurse for the night shift in a busy cardiac ward. Responsibilities include patient "
+            "assessment, medication administration and coordinating with physicians and families."
+        )
+        index = near_duplicates.LSHIndex()
+        for job_id, text in enumerate([self.POSTING, edited, unrelated], start=1):
+            index.add(job_id, near_duplicates.signature(text))
+
+        sig = near_duplicates.signature(self.POSTING)
+        close = near_duplicates.similarity(sig, near_duplicates.signature(edited))
+        self.assertGreater(close, 0.7)
+        self.assertLess(close, 1.0)
+        self.assertEqual([job_id for job_id, _ in index.query(sig, 0.7)], [1, 2])
+        self.assertEqual([job_id for job_id, _ in index.query(sig, 0.99)], [1])
+
+
+class RequirementScoringTests(SimpleTestCase):
+    def test_requirements_are_normalized(self):
+        requirements = resume_parser.normalize_requirements({'requirements': [
+            {'skill': ' Python ', 'requirement': '3+ years of  Python', 'category': 'technical', 'weight': 3},
+            {'skill': 'python', 'category': 'technical'},
+            {'skill': 'Teamwork', 'category': 'Soft', 'must_have': False, 'weight': 7},
+            {'skill': ''},
+            'not a requirement',
+        ]})
+        self.assertEqual(requirements, [
+            {'skill': 'Python', 'requirement': '3+ years of Python', 'category': 'technical', 'must_have': True, 'weight': 3},
+            {'skill': 'Teamwork', 'requirement': 'Teamwork', 'category': 'soft', 'must_have': False, 'weight': 3},
+        ])
+        with self.assertRaises(ValueError):
+            resume_parser.normalize_requirements({'requirements': []})
+
+    def test_scores_are_weighted_and_skipped_requirements_score_zero(self):
+        requirements = [
+            {'skill': 'Python', 'requirement': 'Python', 'category': 'technical', 'must_have': True, 'weight': 3},
+            {'skill': 'Go', 'requirement': 'Go', 'category': 'technical', 'must_have': False, 'weight': 1},
+        ]
+        result = resume_parser.apply_requirement_scores(requirements, {'skill_matches': [
+            {'index': 0, 'score': 2, 'resume_evidence': 'Five years of Python'},
+            {'index': 'x', 'score': 2},
+        ]})
+        python, go = result['skill_matches']
+        self.assertEqual((python['score'], python['weight'], python['must_have']), (2, 3, True))
+        self.assertEqual((go['score'], go['resume_evidence'], go['must_have']), (0, '', False))
+        self.assertEqual(result['summary']['total_score'], 6)
+        self.assertEqual(result['summary']['max_possible_score'], 8)
+        self.assertEqual(result['summary']['overall_fit_percentage'], 75)
+
+
+class SidecarClientTests(SimpleTestCase):
+    def test_async_calls_time_out_while_the_sidecar_is_not_reading(self):
+        async def call_stalled_sidecar():
+            # Accepts the connection but never reads, so sending a large body blocks
+            server = await asyncio.start_server(lambda reader, writer: None, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                with override_settings(LLM_SIDECAR_URL=f'http://127.0.0.1:{port}', LLM_SIDECAR_TIMEOUT=0.5):
+                    await llm_client._acall('compare', {'resume_text': 'x' * (16 << 20)})
+            finally:
+                server.close()
+
+        with self.assertRaises(llm_client.SidecarError):
+            asyncio.run(asyncio.wait_for(call_stalled_sidecar(), 10))
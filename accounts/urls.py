@@ -1,13 +1,28 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if getattr(settings, 'USE_ASYNC_VIEWS', False):
+    # ASGI deployments: serve the LLM-backed pages from the async views
+    from . import async_views
+    profile_view, dashboard_view = async_views.profile, async_views.dashboard
+else:
+    profile_view, dashboard_view = views.profile, views.dashboard
+
 urlpatterns = [
     path('', views.home, name='home'),
-    path('profile/', views.profile, name='profile'),  # upload resume once
+    path('profile/', profile_view, name='profile'),  # upload resume once
     path('update_profile/', views.update_profile, name='update_profile'),
     path('auto-fill-profile/', views.auto_fill_profile, name='auto_fill_profile'), 
-    path('dashboard/', views.dashboard, name='dashboard'),  # upload job description
+    path('dashboard/', dashboard_view, name='dashboard'),  # upload job description
+    path('speculate/', views.speculate, name='speculate'),  # background parsing while the user is still on the form
+    path('analyze-multiple/', views.analyze_multiple, name='analyze_multiple'),  # one resume vs several job descriptions
     path('delete-analysis/<int:analysis_id>/', views.delete_analysis, name='delete_analysis'),  # delete analysis
     path('analysis-details/<int:analysis_id>/', views.get_analysis_details, name='get_analysis_details'),  # get analysis details
+    path('refresh-analysis/<int:analysis_id>/', views.refresh_analysis, name='refresh_analysis'),  # re-score after profile edits
     path('debug-profile/', views.debug_profile, name='debug_profile'),  # debug endpoint
+    path('analytics/', views.analytics, name='analytics'),  # the user's analysis rollup
+    path('analytics/skill-gaps/', views.skill_gaps, name='skill_gaps'),  # staff-only global skill gaps
+    path('metrics/', views.metrics_view, name='metrics'),  # staff-only runtime metrics
+    path('export/<str:kind>/', views.export_data, name='export_data'),  # staff-only CSV/JSONL export (analyses, profiles)
 ]
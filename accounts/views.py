@@ -1,20 +1,231 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.files.storage import FileSystemStorage
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+import copy
 import json
 import logging
-from .forms import ResumeUploadForm, JobDescUploadForm, UserProfileForm
+from .forms import ResumeUploadForm, JobDescUploadForm, MultiJobDescForm, UserProfileForm
 from .models import UserProfile, ResumeAnalysis
-from .resume_parser import parse_resume_with_llama, extract_resume_fields, calculate_experience, compare_resume_with_jobdesc, extract_job_info
+from .experience import calculate_experience
+# LLM calls go through the sidecar client; it falls back to in-process calls when no sidecar is configured
+from .llm_client import parse_resume_with_llama, extract_resume_by_section, compare_resume_with_jobdesc, rescore_skill_matches, sidecar_metrics
+from .rescoring import affected_matches, diff_resume
+from . import admission, db_routers, exports, job_descriptions, llm_ledger, local_extractor, metrics, near_duplicates, rollups, scoring, singleflight, speculative
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+def apply_partial_resume(user_profile, parsed_json):
+    """Apply only the fields a partial extraction found; the rest of the profile is kept."""
+    found = {key: value for key, value in parsed_json.items() if key in local_extractor.CONTACT_FIELDS and value}
+    for key, value in found.items():
+        setattr(user_profile, key, value)
+    merged = {**(user_profile.parsed_resume_data or {}), **found, 'extraction_status': 'partial'}
+    user_profile.parsed_resume_data = merged
+    logger.debug(f"Partial extraction: updated {list(found)}, kept the rest of the profile")
+    return merged
+
+
+def apply_parsed_resume(user_profile, parsed_json):
+    """Copy the structured resume JSON onto the profile columns (does not save); returns the data applied."""
+    if parsed_json.get('extraction_status') == 'partial':
+        return apply_partial_resume(user_profile, parsed_json)
+    user_profile.parsed_resume_data = parsed_json
+    
+    # Update profile fields
+    logger.debug(f"Updating profile fields with new data:")
+    logger.debug(f"  - first_name: {parsed_json.get('first_name', '')}")
+    logger.debug(f"  - last_name: {parsed_json.get('last_name', '')}")
+    logger.debug(f"  - email: {parsed_json.get('email', '')}")
+    logger.debug(f"  - phone: {parsed_json.get('phone', '')}")
+    
+    user_profile.first_name = parsed_json.get('first_name', '')
+    user_profile.last_name = parsed_json.get('last_name', '')
+    user_profile.email = parsed_json.get('email', '')
+    user_profile.phone = parsed_json.get('phone', '')
+    
+    # Education (store as JSON array)
+    user_profile.education = parsed_json.get('education', [])
+    
+    # Experience (store as JSON array)
+    user_profile.experience = parsed_json.get('experience', [])
+    
+    # Update experience totals
+    work_exp = parsed_json.get('work_experience', {})
+    user_profile.work_experience_years = work_exp.get('years', 0)
+    user_profile.work_experience_months = work_exp.get('months', 0)
+    
+    research_exp = parsed_json.get('research_experience', {})
+    user_profile.research_experience_years = research_exp.get('years', 0)
+    user_profile.research_experience_months = research_exp.get('months', 0)
+    
+    logger.debug(f"Updated experience totals:")
+    logger.debug(f"  - Work: {user_profile.work_experience_years} years, {user_profile.work_experience_months} months")
+    logger.debug(f"  - Research: {user_profile.research_experience_years} years, {user_profile.research_experience_months} months")
+    
+    # Lists
+    user_profile.skills = parsed_json.get('skills', [])
+    user_profile.certifications = parsed_json.get('certifications', [])
+    user_profile.hackathons = parsed_json.get('hackathons', [])
+    user_profile.publications = parsed_json.get('publications', [])
+    user_profile.interests = parsed_json.get('interests', [])
+    user_profile.projects = parsed_json.get('projects', [])
+    return parsed_json
+
+def analysis_kwargs(user_profile, job, comparison_result, parsed_resume):
+    """Field values for a ResumeAnalysis of the stored JobDescription ``job``."""
+    summary = comparison_result.get('summary', {})
+    return dict(
+        user_profile=user_profile,
+        job=job,
+        resume_hash=near_duplicates.resume_version(parsed_resume),
+        job_title=job.title or 'Job Analysis',
+        job_company=job.company or 'Unknown Company',
+        skill_matches=comparison_result.get('skill_matches', []),
+        summary=summary,
+        detailed_analysis=comparison_result.get('detailed_analysis', {}),
+        match_score=summary.get('overall_fit_percentage', 0.0)
+    )
+
+def process_resume_upload(user_profile, resume_file):
+    """Parse an uploaded resume, extract its fields and save them on the profile."""
+    # Save file to storage
+    fs = FileSystemStorage()
+    filename = fs.save(resume_file.name, resume_file)
+    file_path = fs.path(filename)
+    logger.debug(f"File saved to: {file_path}")
+
+    # Parse resume text with LlamaParse (already done if the file was speculatively parsed on selection)
+    logger.debug("Starting LlamaParse extraction...")
+    resume_text = speculative.document_text(
+        user_profile.user_id, singleflight.file_digest(resume_file), lambda: parse_resume_with_llama(file_path)
+    )
+    logger.debug(f"LlamaParse completed. Text length: {len(resume_text)}")
+
+    # Extract fields with Gemini
+    logger.debug("Starting Gemini extraction...")
+    parsed_json, resume_sections = extract_resume_by_section(
+        resume_text, user_profile.resume_sections, user_profile.parsed_resume_data
+    )
+    logger.debug(f"Gemini extraction completed. JSON keys: {list(parsed_json.keys())}")
+
+    # Calculate experience
+    logger.debug("Calculating experience...")
+    logger.debug(f"Experience data before calculation: {parsed_json.get('experience', [])}")
+    exp_totals = calculate_experience(parsed_json)
+    parsed_json.update(exp_totals)
+    logger.debug(f"Experience calculated: {exp_totals}")
+    logger.debug(f"Final parsed_json keys: {list(parsed_json.keys())}")
+
+    # Update user profile with parsed data
+    logger.debug("Updating user profile with parsed data...")
+    user_profile.resume_file = resume_file
+    if parsed_json.get('extraction_status') != 'partial':
+        # A partial result keeps the old fields, so it keeps the sections they were extracted from
+        user_profile.resume_sections = resume_sections
+    parsed_json = apply_parsed_resume(user_profile, parsed_json)
+    user_profile.save()
+
+    # Verify the data was saved
+    logger.debug(f"Profile saved. Verifying data:")
+    logger.debug(f"  - Saved first_name: {user_profile.first_name}")
+    logger.debug(f"  - Saved last_name: {user_profile.last_name}")
+    logger.debug(f"  - Saved email: {user_profile.email}")
+    logger.debug(f"  - Saved phone: {user_profile.phone}")
+    return parsed_json
+
+def analyze_job_description(user_profile, parsed_resume, job_text):
+    """Compare the resume with a job description and save the analysis; returns the comparison result."""
+    logger.debug("Starting resume vs job description comparison...")
+    logger.debug(f"Resume data keys: {list(parsed_resume.keys())}")
+    logger.debug(f"Job description length: {len(job_text)}")
+    
+    try:
+        # Shared job description row; for a new posting title/company and the requirement
+        # list are extracted with Gemini in parallel
+        speculative.wait_for_job(job_text)
+        job = job_descriptions.resolve_job(job_text, with_requirements=True)
+        logger.debug(f"Job description {job.id}: Title='{job.title}', Company='{job.company}'")
+    except Exception as e:
+        # Compare the text without saving the analysis
+        logger.error(f"Error resolving job description: {type(e).__name__}: {e}")
+        return compare_resume_with_jobdesc(parsed_resume, job_text)
+    
+    # Scored against the posting's stored requirement list
+    comparison_result = job_descriptions.compare_with_job(parsed_resume, job, extract=False)
+    logger.debug("Comparison completed successfully")
+    
+    # Save analysis to database
+    try:
+        # Save structured analysis data
+        analysis = ResumeAnalysis.objects.create(
+            **analysis_kwargs(user_profile, job, comparison_result, parsed_resume)
+        )
+        logger.debug(f"Analysis saved with ID: {analysis.id}")
+    except Exception as e:
+        print(f"Error saving analysis: {e}")  # Don't fail if database save fails
+    return comparison_result
+
+def reused_analysis_message(analysis, similarity):
+    return (
+        f"ℹ️ Showing your analysis of a near-identical job description from "
+        f"{analysis.created_at:%b %d, %Y} ({similarity:.0%} similar). "
+        f"Tick \"Run a fresh analysis\" and submit again for a new one."
+    )
+
+def analysis_history_version(user_profile):
+    """
+    Cache key part for the dashboard history/analytics fragment: changes when
+    an analysis is added, deleted or re-scored, or the profile is saved
+    (which is when analyses get marked stale).
+    """
+    stats = ResumeAnalysis.objects.filter(user_profile=user_profile).aggregate(
+        latest=Max('id'), count=Count('id'), rescored=Max('rescored_at')
+    )
+    rescored = stats['rescored'].timestamp() if stats['rescored'] else 0
+    return f"{user_profile.updated_at.timestamp()}:{stats['latest']}:{stats['count']}:{rescored}"
+
+def mark_stale_analyses(user_profile, old_resume, new_resume):
+    """Record which skill_matches of each saved analysis a profile edit may have changed."""
+    diff = diff_resume(old_resume, new_resume)
+    if not diff:
+        return 0
+    stale = []
+    for analysis in user_profile.analyses.only('id', 'skill_matches', 'stale_matches'):
+        indexes = affected_matches(analysis.skill_matches, diff)
+        if indexes:
+            analysis.stale_matches = sorted(set(analysis.stale_matches) | set(indexes))
+            stale.append(analysis)
+    ResumeAnalysis.objects.bulk_update(stale, ['stale_matches'])
+    metrics.incr('rescore.analyses_marked', len(stale))
+    logger.debug(f"Profile edit changed {sorted(diff)}; {len(stale)} analyses marked stale")
+    return len(stale)
+
+def refresh_stale_analysis(analysis, resume_json):
+    """Re-score the stale skill matches of ``analysis`` and recompute its summary locally."""
+    skill_matches, missing = rescore_skill_matches(resume_json, analysis.skill_matches, analysis.stale_matches)
+    before = rollups.contribution(analysis)
+    summary, detailed_analysis = scoring.aggregate(skill_matches, analysis.summary, analysis.detailed_analysis)
+    analysis.skill_matches = skill_matches
+    analysis.summary = summary
+    analysis.detailed_analysis = detailed_analysis
+    analysis.match_score = summary['overall_fit_percentage']
+    analysis.stale_matches = missing
+    analysis.rescored_at = timezone.now()
+    analysis.resume_hash = near_duplicates.resume_version(resume_json)
+    analysis.save(update_fields=['skill_matches', 'summary', 'detailed_analysis', 'match_score', 'stale_matches', 'rescored_at', 'resume_hash'])
+    rollups.record_changed(analysis, before)
+    return analysis
+
 @login_required
 def home(request):
     """
@@ -37,6 +248,8 @@ def home(request):
     return redirect('profile')
 
 @login_required
+@llm_ledger.budgeted
+@admission.admission_controlled
 def profile(request):
     """
     Profile page: Upload resume, parse it once, store JSON in user session and database.
@@ -74,88 +287,15 @@ def profile(request):
             resume_file = form.cleaned_data['resume']
             logger.debug(f"Resume file received: {resume_file.name}, size: {resume_file.size}")
             
-            # Save file to storage
-            fs = FileSystemStorage()
-            filename = fs.save(resume_file.name, resume_file)
-            file_path = fs.path(filename)
-            logger.debug(f"File saved to: {file_path}")
+            # Identical uploads already in flight (double submits, retries) share one pipeline run
+            upload_key = singleflight.request_key(request.user.id, 'resume_upload', singleflight.file_digest(resume_file))
 
             try:
-            # Parse resume text with LlamaParse
-                logger.debug("Starting LlamaParse extraction...")
-                resume_text = parse_resume_with_llama(file_path)
-                logger.debug(f"LlamaParse completed. Text length: {len(resume_text)}")
-
-            # Extract fields with Gemini
-                logger.debug("Starting Gemini extraction...")
-                parsed_json = extract_resume_fields(resume_text)
-                logger.debug(f"Gemini extraction completed. JSON keys: {list(parsed_json.keys())}")
-
-            # Calculate experience
-                logger.debug("Calculating experience...")
-                logger.debug(f"Experience data before calculation: {parsed_json.get('experience', [])}")
-                exp_totals = calculate_experience(parsed_json)
-                parsed_json.update(exp_totals)
-                logger.debug(f"Experience calculated: {exp_totals}")
-                logger.debug(f"Final parsed_json keys: {list(parsed_json.keys())}")
-
-                # Save JSON in session and database
-                logger.debug("Saving parsed data to session...")
-                request.session['parsed_resume'] = parsed_json
-                logger.debug("Session saved successfully")
-                
-                # Update user profile with parsed data
-                logger.debug("Updating user profile with parsed data...")
-                user_profile.resume_file = resume_file
-                user_profile.parsed_resume_data = parsed_json
-                
-                # Update profile fields
-                logger.debug(f"Updating profile fields with new data:")
-                logger.debug(f"  - first_name: {parsed_json.get('first_name', '')}")
-                logger.debug(f"  - last_name: {parsed_json.get('last_name', '')}")
-                logger.debug(f"  - email: {parsed_json.get('email', '')}")
-                logger.debug(f"  - phone: {parsed_json.get('phone', '')}")
-                
-                user_profile.first_name = parsed_json.get('first_name', '')
-                user_profile.last_name = parsed_json.get('last_name', '')
-                user_profile.email = parsed_json.get('email', '')
-                user_profile.phone = parsed_json.get('phone', '')
-                
-                # Education (store as JSON array)
-                user_profile.education = parsed_json.get('education', [])
-                
-                # Experience (store as JSON array)
-                user_profile.experience = parsed_json.get('experience', [])
-                
-                # Update experience totals
-                work_exp = parsed_json.get('work_experience', {})
-                user_profile.work_experience_years = work_exp.get('years', 0)
-                user_profile.work_experience_months = work_exp.get('months', 0)
-                
-                research_exp = parsed_json.get('research_experience', {})
-                user_profile.research_experience_years = research_exp.get('years', 0)
-                user_profile.research_experience_months = research_exp.get('months', 0)
-                
-                logger.debug(f"Updated experience totals:")
-                logger.debug(f"  - Work: {user_profile.work_experience_years} years, {user_profile.work_experience_months} months")
-                logger.debug(f"  - Research: {user_profile.research_experience_years} years, {user_profile.research_experience_months} months")
-                
-                # Lists
-                user_profile.skills = parsed_json.get('skills', [])
-                user_profile.certifications = parsed_json.get('certifications', [])
-                user_profile.hackathons = parsed_json.get('hackathons', [])
-                user_profile.publications = parsed_json.get('publications', [])
-                user_profile.interests = parsed_json.get('interests', [])
-                user_profile.projects = parsed_json.get('projects', [])
-                
-                user_profile.save()
-                
-                # Verify the data was saved
-                logger.debug(f"Profile saved. Verifying data:")
-                logger.debug(f"  - Saved first_name: {user_profile.first_name}")
-                logger.debug(f"  - Saved last_name: {user_profile.last_name}")
-                logger.debug(f"  - Saved email: {user_profile.email}")
-                logger.debug(f"  - Saved phone: {user_profile.phone}")
+                parsed_json, leader = singleflight.run_once(
+                    upload_key, lambda: process_resume_upload(user_profile, resume_file)
+                )
+                if not leader:
+                    logger.debug("Identical upload was already processed; reusing its result")
                 
                 # Clear old session data and set new data
                 if 'parsed_resume' in request.session:
@@ -163,7 +303,10 @@ def profile(request):
                 request.session['parsed_resume'] = parsed_json
                 logger.debug("Session data updated with new resume data")
                 
-                messages.success(request, "✅ Resume uploaded and parsed successfully!")
+                if parsed_json.get('extraction_status') == 'partial':
+                    messages.warning(request, "⚠️ Resume uploaded, but only contact details could be extracted. Please re-upload later or edit your profile.")
+                else:
+                    messages.success(request, "✅ Resume uploaded and parsed successfully!")
                 return redirect('profile')
                 
             except Exception as e:
@@ -190,7 +333,8 @@ def profile(request):
     return render(request, 'account/profile.html', {
         'resume_form': form,
         'parsed_resume': parsed_resume,
-        'user_profile': user_profile
+        'user_profile': user_profile,
+        'fragment_cache_ttl': settings.FRAGMENT_CACHE_TTL,
     })
 
 
@@ -227,6 +371,9 @@ def update_profile(request):
         user_profile = UserProfile.objects.create(user=request.user)
     
     if request.method == "POST":
+        # Keep the previous resume data to find analyses affected by the edit
+        old_resume = copy.deepcopy(user_profile.parsed_resume_data)
+        
         # Update profile fields from form data
         user_profile.first_name = request.POST.get('first_name', '')
         user_profile.last_name = request.POST.get('last_name', '')
@@ -343,6 +490,10 @@ def update_profile(request):
         user_profile.save()
         print("Updated parsed resume JSON after manual update:")
         print(json.dumps(user_profile.parsed_resume_data, indent=2))
+        
+        stale_count = mark_stale_analyses(user_profile, old_resume, user_profile.parsed_resume_data) if old_resume else 0
+        if stale_count:
+            messages.info(request, f"ℹ️ {stale_count} saved analyses may be out of date. Refresh them from the dashboard.")
         messages.success(request, "✅ Profile updated successfully!")
     
     return redirect('profile')
@@ -427,6 +578,7 @@ def auto_fill_profile(request):
 
 @login_required
 @require_http_methods(["DELETE"])
+@db_routers.replica_reads
 def delete_analysis(request, analysis_id):
     """Delete a resume analysis"""
     try:
@@ -439,6 +591,30 @@ def delete_analysis(request, analysis_id):
 
 
 @login_required
+@require_http_methods(["POST"])
+@db_routers.replica_reads
+@llm_ledger.budgeted
+@admission.admission_controlled
+def refresh_analysis(request, analysis_id):
+    """Re-score only the skill matches invalidated by profile edits"""
+    analysis = get_object_or_404(ResumeAnalysis, id=analysis_id, user_profile__user=request.user)
+    if not analysis.is_stale:
+        return JsonResponse({'status': 'success', 'message': 'Analysis is already up to date', 'match_score': analysis.match_score})
+    try:
+        refresh_stale_analysis(analysis, analysis.user_profile.parsed_resume_data)
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Analysis refreshed',
+            'match_score': analysis.match_score,
+            'stale_matches': len(analysis.stale_matches),
+        })
+    except Exception as e:
+        logger.error(f"Error refreshing analysis {analysis_id}: {type(e).__name__}: {str(e)}")
+        return JsonResponse({'status': 'error', 'message': 'Failed to refresh analysis'}, status=500)
+
+
+@login_required
+@db_routers.replica_reads
 def get_analysis_details(request, analysis_id):
     """Get detailed analysis data for modal view"""
     try:
@@ -454,13 +630,41 @@ def get_analysis_details(request, analysis_id):
             'match_score': analysis.match_score,
             'overall_fit_percentage': analysis.get_overall_fit_percentage(),
             'overall_recommendation': analysis.get_overall_recommendation(),
-            'skill_matches_count': analysis.get_skill_matches_count()
+            'skill_matches_count': analysis.get_skill_matches_count(),
+            'is_stale': analysis.is_stale,
+            'stale_matches': analysis.stale_matches,
+            'rescored_at': analysis.rescored_at.isoformat() if analysis.rescored_at else None
         })
     except Exception as e:
         logger.error(f"Error getting analysis details {analysis_id}: {str(e)}")
         return JsonResponse({'error': 'Failed to get analysis details'}, status=500)
 
 @login_required
+@require_http_methods(["POST"])
+@llm_ledger.budgeted
+def speculate(request):
+    """
+    Start parsing a selected file, or storing pasted job text, before the
+    form is submitted (see accounts/speculative.py). Returns at once.
+    """
+    uploaded = request.FILES.get('resume') or request.FILES.get('job_desc')
+    job_text = request.POST.get('job_text', '').strip()
+    if uploaded:
+        if uploaded.size > speculative.MAX_UPLOAD_BYTES or not uploaded.name.lower().endswith(speculative.UPLOAD_EXTENSIONS):
+            return JsonResponse({'status': 'error', 'message': 'Unsupported file'}, status=400)
+        status = speculative.start_document(request.user.id, uploaded)
+    elif len(job_text) >= settings.SPECULATIVE_MIN_CHARS:
+        status = speculative.start_job(request.user.id, job_text)
+    else:
+        return JsonResponse({'status': 'error', 'message': 'Nothing to prepare'}, status=400)
+    logger.debug(f"Speculative request from {request.user.username}: {status}")
+    return JsonResponse({'status': status})
+
+
+@login_required
+@db_routers.replica_reads
+@llm_ledger.budgeted
+@admission.admission_controlled
 def dashboard(request):
     """
     Dashboard: Upload job description and compare with parsed resume JSON.
@@ -499,6 +703,7 @@ def dashboard(request):
             if form.cleaned_data.get('job_desc'):
                 job_file = form.cleaned_data['job_desc']
                 logger.debug(f"Job file received: {job_file.name}, size: {job_file.size}")
+                job_digest = singleflight.file_digest(job_file)
                 
                 # Save file to storage
                 fs = FileSystemStorage()
@@ -509,7 +714,12 @@ def dashboard(request):
                 try:
                     # Use LlamaParse to extract text from job description file
                     logger.debug("Starting LlamaParse extraction for job description...")
-                    job_text = parse_resume_with_llama(file_path)
+                    job_text, _ = singleflight.run_once(
+                        singleflight.request_key(request.user.id, 'job_desc_upload', job_digest),
+                        lambda: speculative.document_text(
+                            request.user.id, job_digest, lambda: parse_resume_with_llama(file_path)
+                        ),
+                    )
                     logger.debug(f"Job description text extracted, length: {len(job_text)}")
                     logger.debug(f"Job description preview: {job_text[:200]}...")
                     
@@ -534,42 +744,24 @@ def dashboard(request):
                 job_text = form.cleaned_data['job_text']
                 logger.debug(f"Job description text received, length: {len(job_text)}")
             
-            if job_text:
+            prior_analysis, similarity = None, 0.0
+            if job_text and not form.cleaned_data.get('force_fresh'):
+                # A near-identical posting already analyzed against this resume version is shown right away
+                prior_analysis, similarity = near_duplicates.find_prior_analysis(user_profile, job_text, parsed_resume)
+            if prior_analysis is not None:
+                comparison_result = prior_analysis.comparison_result()
+                messages.info(request, reused_analysis_message(prior_analysis, similarity))
+            elif job_text:
                 try:
-                    # Compare resume vs job description via Gemini
-                    logger.debug("Starting resume vs job description comparison...")
-                    logger.debug(f"Resume data keys: {list(parsed_resume.keys())}")
-                    logger.debug(f"Job description length: {len(job_text)}")
-                    
-                    comparison_result = compare_resume_with_jobdesc(parsed_resume, job_text)
-                    logger.debug("Comparison completed successfully")
-                    
-                    # Save analysis to database
-                    try:
-                        # Extract job title and company using Gemini for better accuracy
-                        logger.debug("Extracting job title and company from job description...")
-                        job_info = extract_job_info(job_text)
-                        job_title = job_info.get('title', 'Job Analysis')
-                        job_company = job_info.get('company', 'Unknown Company')
-                        logger.debug(f"Extracted job info: Title='{job_title}', Company='{job_company}'")
-                        
-                        # Save structured analysis data
-                        analysis = ResumeAnalysis.objects.create(
-                            user_profile=user_profile,
-                            job_description=job_text,
-                            job_title=job_title,
-                            job_company=job_company,
-                            skill_matches=comparison_result.get('skill_matches', []),
-                            summary=comparison_result.get('summary', {}),
-                            detailed_analysis=comparison_result.get('detailed_analysis', {}),
-                            match_score=comparison_result.get('summary', {}).get('overall_fit_percentage', 0.0),
-                            # Legacy fields for backward compatibility
-                            relevant_points=comparison_result.get('summary', {}).get('relevant_strengths', []),
-                            improvement_needed=comparison_result.get('summary', {}).get('areas_of_improvement', [])
-                        )
-                        logger.debug(f"Analysis saved with ID: {analysis.id}")
-                    except Exception as e:
-                        print(f"Error saving analysis: {e}")  # Don't fail if database save fails
+                    # Compare resume vs job description via Gemini; identical requests in flight share one run
+                    analysis_key = singleflight.request_key(
+                        request.user.id, 'analysis', job_text, json.dumps(parsed_resume, sort_keys=True)
+                    )
+                    comparison_result, leader = singleflight.run_once(
+                        analysis_key, lambda: analyze_job_description(user_profile, parsed_resume, job_text)
+                    )
+                    if not leader:
+                        logger.debug("Identical analysis was already running; reused its result")
                         
                 except Exception as e:
                     logger.error(f"CRITICAL ERROR in job description analysis: {str(e)}")
@@ -580,14 +772,125 @@ def dashboard(request):
     else:
         form = JobDescUploadForm()
 
-    # Get analysis history
+    # History and analytics are only queried when their cached fragment is missing
     analysis_history = ResumeAnalysis.objects.filter(user_profile=user_profile).order_by('-created_at')[:10]
-    logger.debug(f"Found {analysis_history.count()} analysis records")
     
     return render(request, 'account/dashboard.html', {
         'job_form': form,
+        'multi_job_form': MultiJobDescForm(),
         'comparison_result': comparison_result,
         'parsed_resume': parsed_resume,
         'user_profile': user_profile,
-        'analysis_history': analysis_history
+        'analysis_history': analysis_history,
+        'analytics': SimpleLazyObject(lambda: rollups.user_stats(user_profile)),
+        'history_version': analysis_history_version(user_profile),
+        'fragment_cache_ttl': settings.FRAGMENT_CACHE_TTL,
     })
+
+
+@login_required
+@require_http_methods(["POST"])
+@db_routers.replica_reads
+@llm_ledger.budgeted
+@admission.admission_controlled
+def analyze_multiple(request):
+    """
+    Compare the resume against several pasted job descriptions at once.
+
+    Each job is scored against its stored requirement list; jobs without one
+    share a single call with all their texts (see compare_resume_with_jobdescs).
+    One ResumeAnalysis is saved per job.
+    """
+    try:
+        user_profile = request.user.profile
+    except UserProfile.DoesNotExist:
+        return redirect('profile')
+
+    parsed_resume = request.session.get('parsed_resume') or user_profile.parsed_resume_data
+    if not parsed_resume:
+        return redirect('profile')
+
+    form = MultiJobDescForm(request.POST)
+    if not form.is_valid():
+        for error in form.errors.get('job_texts', []):
+            messages.error(request, f"❌ {error}")
+        return redirect('dashboard')
+
+    job_texts = form.cleaned_data['job_texts']
+    logger.debug(f"Multi-JD analysis requested for {len(job_texts)} job descriptions")
+    try:
+        jobs = job_descriptions.resolve_jobs(job_texts, with_requirements=True)
+        results = job_descriptions.compare_with_jobs(parsed_resume, jobs)
+
+        # Failed comparisons (None) are reported, not saved as zero scores
+        for job, comparison_result in zip(jobs, results):
+            if comparison_result is None:
+                continue
+            analysis = ResumeAnalysis.objects.create(
+                **analysis_kwargs(user_profile, job, comparison_result, parsed_resume)
+            )
+            logger.debug(f"Analysis saved with ID: {analysis.id}")
+        analyzed = sum(result is not None for result in results)
+        if analyzed == len(results):
+            messages.success(request, f"✅ Analyzed {analyzed} job descriptions. See the results in your history below.")
+        elif analyzed:
+            messages.warning(request, f"⚠️ Analyzed {analyzed} of {len(results)} job descriptions; the others could not be analyzed, please try them again.")
+        else:
+            messages.error(request, "❌ Error analyzing job descriptions. Please try again.")
+    except Exception as e:
+        logger.error(f"CRITICAL ERROR in multi-JD analysis: {type(e).__name__}: {str(e)}")
+        messages.error(request, f"❌ Error analyzing job descriptions: {str(e)}")
+    return redirect('dashboard')
+
+
+def limit_param(request, default):
+    """``?limit=`` as an int in [1, rollups.MAX_TOP_N]; ``default`` when missing or not a number."""
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return min(max(limit, 1), rollups.MAX_TOP_N)
+
+
+@login_required
+def analytics(request):
+    """The user's analysis rollup: average fit over time, recommendations, top gaps"""
+    try:
+        user_profile = request.user.profile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'error': 'No profile found'}, status=404)
+    return JsonResponse(rollups.user_stats(user_profile, limit=limit_param(request, rollups.TOP_N)))
+
+
+@user_passes_test(lambda user: user.is_staff)
+def skill_gaps(request):
+    """Staff-only: skills most often missing across all analyses"""
+    return JsonResponse({'skill_gaps': rollups.top_skill_gaps(limit_param(request, 20))})
+
+
+@user_passes_test(lambda user: user.is_staff)
+def metrics_view(request):
+    """Staff-only JSON dump of this process's metrics (and the LLM sidecar's, if configured)."""
+    local = metrics.snapshot()
+    data = {'web': local, 'llm_tasks': metrics.llm_task_stats(local), 'singleflight': singleflight.stats(local),
+            'admission': admission.stats(local), 'speculative': speculative.stats(local),
+            'llm_ledger': llm_ledger.stats(local)}
+    try:
+        remote = sidecar_metrics()
+    except Exception as e:
+        remote = {'error': str(e)}
+    if remote is not None:
+        data['sidecar'] = remote
+        if 'counters' in remote:
+            data['llm_tasks'] = metrics.llm_task_stats(remote)
+    return JsonResponse(data)
+
+
+@user_passes_test(lambda user: user.is_staff)
+def export_data(request, kind):
+    """Staff-only streaming export of all analyses or profiles (?format=csv|jsonl)."""
+    fmt = request.GET.get('format', 'csv')
+    if kind not in exports.EXPORTS or fmt not in exports.FORMATS:
+        raise Http404("Unknown export")
+    logger.debug(f"Streaming {kind} export as {fmt} for {request.user.username}")
+    return exports.streaming_response(kind, fmt)
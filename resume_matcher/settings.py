@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -25,6 +26,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = os.getenv('DEBUG', 'False').lower() in ('1', 'true', 'yes')
+
 
 ALLOWED_HOSTS = [
     'talentsynthresumermatcher-production.up.railway.app',
@@ -80,12 +84,119 @@ ACCOUNT_LOGIN_ON_SIGNUP = True
 ACCOUNT_ALLOW_SIGNUPS = False  # This disables traditional signup
 SOCIALACCOUNT_ALLOW_SIGNUPS = True 
 
+# LLM sidecar (python manage.py run_llm_sidecar). Leave empty to call the LLMs in-process.
+# Examples: http://127.0.0.1:8765  or  unix:///tmp/llm_sidecar.sock
+LLM_SIDECAR_URL = os.getenv('LLM_SIDECAR_URL', '')
+LLM_SIDECAR_TIMEOUT = int(os.getenv('LLM_SIDECAR_TIMEOUT', '180'))
+
+# Per-task Gemini routing: accounts/llm_routing.py DEFAULT_ROUTES holds every route; entries here
+# override keys of a task's route, e.g. {'comparison': {'deadline': 90}}. Keep deadline + fallback_deadline
+# under LLM_SIDECAR_TIMEOUT; a call is cut off before the sidecar client gives up either way.
+LLM_ROUTES = {
+    task: {'model': model}
+    for task, model in (
+        ('resume_extraction', os.getenv('LLM_EXTRACTION_MODEL')),
+        ('job_info', os.getenv('LLM_JOB_INFO_MODEL')),
+        ('comparison', os.getenv('LLM_COMPARISON_MODEL')),
+    )
+    if model
+}
+
+# Two-phase comparison (accounts/job_descriptions.py): extract each job description's requirement list
+# once, then score every resume against only that list. False compares with the full text every time.
+TWO_PHASE_COMPARISON = os.getenv('TWO_PHASE_COMPARISON', 'True').lower() in ('1', 'true', 'yes')
+
+# Multi-JD comparison: one request per resume while the combined input stays under this budget
+MULTI_JD_MAX_JOBS = 10
+MULTI_JD_TOKEN_BUDGET = int(os.getenv('MULTI_JD_TOKEN_BUDGET', '30000'))
+
+# Batched resume extraction (bulk ingestion): resumes per request are chosen to fit these budgets
+EXTRACTION_BATCH_TOKEN_BUDGET = int(os.getenv('EXTRACTION_BATCH_TOKEN_BUDGET', '24000'))
+EXTRACTION_BATCH_OUTPUT_TOKENS_PER_DOC = 1200
+
+# Pin a prompt to an older version from accounts/prompts.py, e.g. {'comparison': 2}
+PROMPT_VERSIONS = {}
+
+# LLM call ledger (accounts/llm_ledger.py): entries are written in the background every
+# LLM_LEDGER_FLUSH_INTERVAL seconds or once LLM_LEDGER_BATCH_SIZE are queued; beyond
+# LLM_LEDGER_MAX_PENDING unwritten entries new ones are dropped (and counted).
+LLM_LEDGER_FLUSH_INTERVAL = float(os.getenv('LLM_LEDGER_FLUSH_INTERVAL', '2'))
+LLM_LEDGER_BATCH_SIZE = int(os.getenv('LLM_LEDGER_BATCH_SIZE', '200'))
+LLM_LEDGER_MAX_PENDING = int(os.getenv('LLM_LEDGER_MAX_PENDING', '10000'))
+# Input plus output tokens a user may use per UTC day before their uploads/analyses get a 429; 0 = no limit
+LLM_DAILY_TOKEN_BUDGET = int(os.getenv('LLM_DAILY_TOKEN_BUDGET', '0'))
+
+# Concurrent LlamaParse (bulk parsing): files parsed at once, and seconds allowed per file
+LLAMAPARSE_MAX_IN_FLIGHT = int(os.getenv('LLAMAPARSE_MAX_IN_FLIGHT', '8'))
+LLAMAPARSE_FILE_TIMEOUT = int(os.getenv('LLAMAPARSE_FILE_TIMEOUT', '300'))
+
+# Cache backend: 'locmem' (per process, default), 'file', 'redis' or 'memcached' at CACHE_LOCATION.
+# Single-flight coalescing and the rendered-fragment cache use it; share one between workers in production.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': {
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'redis': 'django.core.cache.backends.redis.RedisCache',
+            'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        }[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', {
+            'locmem': 'resume-matcher',
+            'file': os.path.join(BASE_DIR, '.cache'),
+            'redis': 'redis://127.0.0.1:6379/1',
+            'memcached': '127.0.0.1:11211',
+        }[CACHE_BACKEND]),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+    }
+}
+if CACHE_BACKEND == 'locmem':
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000'))}
+
+# Rendered profile sections and dashboard history (seconds). Keys change whenever the data does,
+# so this only bounds how long unused entries occupy the cache.
+FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', '3600'))
+
+# Single-flight coalescing of identical in-flight uploads/analyses (accounts/singleflight.py).
+# Cross-process coalescing needs a cache shared by all workers.
+SINGLEFLIGHT_CACHE = os.getenv('SINGLEFLIGHT_CACHE', 'default')
+SINGLEFLIGHT_TIMEOUT = int(os.getenv('SINGLEFLIGHT_TIMEOUT', '300'))
+SINGLEFLIGHT_RESULT_TTL = int(os.getenv('SINGLEFLIGHT_RESULT_TTL', '30'))
+
+# Admission control for LLM-backed POSTs (accounts/admission.py), per worker process.
+# Keep the global limit below the worker's thread count so page loads stay responsive; 0 disables.
+ADMISSION_GLOBAL_LIMIT = int(os.getenv('ADMISSION_GLOBAL_LIMIT', '4'))
+ADMISSION_USER_LIMIT = int(os.getenv('ADMISSION_USER_LIMIT', '1'))
+ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '8'))
+ADMISSION_MAX_WAIT = int(os.getenv('ADMISSION_MAX_WAIT', '15'))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '30'))
+
+# Speculative parsing of a selected file / pasted job text before submit (accounts/speculative.py).
+# Runs per user per hour (0 disables), background threads and queue per process, result lifetime,
+# longest a run may wait in the queue, and the shortest pasted text worth preparing.
+SPECULATIVE_BUDGET = int(os.getenv('SPECULATIVE_BUDGET', '10'))
+SPECULATIVE_WORKERS = int(os.getenv('SPECULATIVE_WORKERS', '2'))
+SPECULATIVE_QUEUE_SIZE = int(os.getenv('SPECULATIVE_QUEUE_SIZE', '4'))
+SPECULATIVE_TTL = int(os.getenv('SPECULATIVE_TTL', '900'))
+SPECULATIVE_MAX_QUEUE_WAIT = int(os.getenv('SPECULATIVE_MAX_QUEUE_WAIT', '30'))
+SPECULATIVE_MIN_CHARS = int(os.getenv('SPECULATIVE_MIN_CHARS', '200'))
+
+# Reuse a user's earlier analysis when a new job description is at least this similar
+# (estimated Jaccard over word shingles, accounts/near_duplicates.py); 0 disables.
+JD_NEAR_DUPLICATE_THRESHOLD = float(os.getenv('JD_NEAR_DUPLICATE_THRESHOLD', '0.9'))
+
+# Compression of the large JSON columns (accounts/fields.py). 'zstd' needs the zstandard package and
+# 'msgpack' the msgpack package; without them values are written with zlib/JSON. Existing rows stay readable.
+COMPRESSED_JSON_CODEC = os.getenv('COMPRESSED_JSON_CODEC', 'zlib')
+COMPRESSED_JSON_SERIALIZER = os.getenv('COMPRESSED_JSON_SERIALIZER', 'json')
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,7 +204,6 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
 ]
 
 ROOT_URLCONF = 'resume_matcher.urls'
@@ -116,17 +226,65 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'resume_matcher.wsgi.application'
+ASGI_APPLICATION = 'resume_matcher.asgi.application'
+
+# Serve profile/dashboard from accounts/async_views.py. Only useful under an ASGI server.
+USE_ASYNC_VIEWS = os.getenv('USE_ASYNC_VIEWS', 'False').lower() in ('1', 'true', 'yes')
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql for production (DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT); SQLite otherwise.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'resume_matcher'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+            'OPTIONS': {'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5'))},
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    # WAL lets readers run alongside the single writer; writers wait up to DB_BUSY_TIMEOUT
+    # seconds for the lock instead of failing, and take it at BEGIN so they never have to
+    # upgrade a read lock mid-transaction (which fails immediately with "database is locked").
+    if os.getenv('DB_SQLITE_TUNING', 'True').lower() in ('1', 'true', 'yes'):
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'timeout': int(os.getenv('DB_BUSY_TIMEOUT', '20')),
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+# Keep connections open across requests (seconds; 0 closes after each request, None never),
+# checking they still work before reusing them.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Optional read replica (same credentials, DB_REPLICA_HOST/DB_REPLICA_PORT): views marked with
+# accounts.db_routers.replica_reads read the analysis history and details from it.
+if DB_ENGINE == 'postgresql' and os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['accounts.db_routers.ReplicaRouter']
+
+# After a user's write, their reads stay on the primary this long (seconds) to cover replication lag
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', '5'))
 
 
 # Password validation
@@ -170,6 +328,26 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'accounts', 'static'),
 ]
 
+# In production (DEBUG off) collectstatic writes content-hashed, gzip/brotli-compressed copies that
+# WhiteNoise serves with a far-future, immutable Cache-Control. The hashed names come from the manifest
+# collectstatic writes, so it is used only once that exists (or while collectstatic runs); development
+# serves the app's static files as they are.
+STATIC_MANIFEST = not DEBUG and (
+    os.path.exists(os.path.join(STATIC_ROOT, 'staticfiles.json')) or 'collectstatic' in sys.argv
+)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage'
+            if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+# Cache lifetime for files without a content hash in their name (hashed ones are cached for 10 years)
+WHITENOISE_MAX_AGE = int(os.getenv('WHITENOISE_MAX_AGE', '3600'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 